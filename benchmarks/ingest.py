@@ -0,0 +1,105 @@
+"""
+Compare the ingest throughput of equivalent YAML, JSON and JSON lines
+definitions.
+
+    python benchmarks/ingest.py [--files 200] [--metrics 50] [--repeat 3]
+
+Each format gets a directory with the same fact sources and metrics, which
+is read and schema validated like a dry run does. The best of `--repeat`
+runs is reported.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eppo_metrics_sync import helper  # noqa: E402
+from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync  # noqa: E402
+
+
+def definitions(file_number, metric_count):
+    facts = [{'name': f'fact_{file_number}_{i}', 'column': f'column_{i}'} for i in range(metric_count)]
+    fact_source = {
+        'name': f'source_{file_number}',
+        'sql': f'SELECT * FROM analytics.source_{file_number}',
+        'timestamp_column': 'ts',
+        'entities': [{'entity_name': 'User', 'column': 'user_id'}],
+        'facts': facts,
+    }
+    metrics = [
+        {
+            'name': f'Metric {file_number}.{i}',
+            'description': 'Generated for the ingest benchmark',
+            'entity': 'User',
+            'numerator': {'fact_name': fact['name'], 'operation': 'sum', 'winsorization_upper_percentile': 0.99},
+            'denominator': {'fact_name': facts[0]['name'], 'operation': 'count'},
+        }
+        for i, fact in enumerate(facts)
+    ]
+    return [{'fact_sources': [fact_source]}, {'metrics': metrics}]
+
+
+def write_directory(root, extension, file_count, metric_count):
+    directory = os.path.join(root, extension.lstrip('.'))
+    os.makedirs(directory)
+    size = 0
+    for file_number in range(file_count):
+        documents = definitions(file_number, metric_count)
+        if extension == '.yaml':
+            content = yaml.safe_dump_all(documents, sort_keys=False)
+        elif extension == '.jsonl':
+            content = ''.join(json.dumps(d) + '\n' for d in documents)
+        else:
+            content = json.dumps({**documents[0], **documents[1]})
+        # JSON definitions are only discovered with the .eppo infix
+        suffix = extension if extension == '.yaml' else '.eppo' + extension
+        path = os.path.join(directory, f'definitions_{file_number}{suffix}')
+        with open(path, 'w') as f:
+            f.write(content)
+        size += len(content)
+    return directory, size
+
+
+def best_time(directory, repeat):
+    best = None
+    for _ in range(repeat):
+        eppo_metrics_sync = EppoMetricsSync(directory=directory)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            eppo_metrics_sync.read_yaml_files()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(eppo_metrics_sync.fact_sources) + len(eppo_metrics_sync.metrics)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=200)
+    parser.add_argument('--metrics', type=int, default=50, help='Metrics per file')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f'JSON parser: {helper.json_loads.__module__}')
+    with tempfile.TemporaryDirectory() as root:
+        baseline = None
+        for extension in ('.yaml', '.json', '.jsonl'):
+            directory, size = write_directory(root, extension, args.files, args.metrics)
+            elapsed, count = best_time(directory, args.repeat)
+            baseline = baseline or elapsed
+            print(
+                f'{extension:7} {size / 1e6:7.2f} MB {elapsed:7.3f}s '
+                f'{size / 1e6 / elapsed:8.2f} MB/s {count / elapsed:10.0f} definitions/s '
+                f'{baseline / elapsed:6.1f}x'
+            )
+
+
+if __name__ == '__main__':
+    main()
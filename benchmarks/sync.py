@@ -0,0 +1,78 @@
+"""
+Measure sync throughput against a local fake of the Eppo API.
+
+    python benchmarks/sync.py [--syncs 20] [--metrics 2000] [--latency 0.05]
+
+Every sync uploads the same generated payload through the client's HTTP
+path; client-side timings are reported along with the fake server's
+request statistics.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eppo_metrics_sync.api import sync_definitions  # noqa: E402
+from eppo_metrics_sync.testing import FakeEppoServer  # noqa: E402
+
+
+def payload(metric_count):
+    fact_source = {
+        'name': 'purchases',
+        'sql': 'SELECT * FROM analytics.purchases',
+        'timestamp_column': 'ts',
+        'entities': [{'entity_name': 'User', 'column': 'user_id'}],
+        'facts': [{'name': f'fact_{i}', 'column': f'column_{i}'} for i in range(metric_count)],
+    }
+    metrics = [
+        {
+            'name': f'Metric {i}',
+            'entity': 'User',
+            'numerator': {'fact_name': f'fact_{i}', 'operation': 'sum'},
+        }
+        for i in range(metric_count)
+    ]
+    return [fact_source], metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--syncs', type=int, default=20)
+    parser.add_argument('--metrics', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds the fake server adds to a response')
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    fact_sources, metrics = payload(args.metrics)
+    os.environ.setdefault('EPPO_API_KEY', 'benchmark')
+    os.environ['EPPO_SYNC_TAG'] = 'benchmark'
+    with FakeEppoServer(latency=args.latency, error_rate=args.error_rate, seed=0, record_requests=False) as server:
+        os.environ['EPPO_API_HOST'] = server.host
+        failures = 0
+        durations = []
+        for _ in range(args.syncs):
+            start = time.perf_counter()
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    sync_definitions(fact_sources, metrics)
+            except Exception:
+                failures += 1
+            durations.append(time.perf_counter() - start)
+
+    total = sum(durations)
+    stats = server.stats.summary()
+    print(
+        f'{args.syncs} sync(s) of {args.metrics} metric(s), {failures} failed: '
+        f'{total / args.syncs * 1000:.1f} ms per sync, '
+        f'{stats["bytes_received"] / 1e6 / total:.2f} MB/s uploaded'
+    )
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,10 @@
-from .eppo_metrics_sync import EppoMetricsSync
\ No newline at end of file
+def __getattr__(name):
+    # imported lazily so that commands which never parse YAML (such as
+    # syncing a prebuilt bundle) do not pay for yaml and jsonschema imports
+    if name == 'EppoMetricsSync':
+        from .eppo_metrics_sync import EppoMetricsSync
+        return EppoMetricsSync
+    if name in ('RepositorySnapshot', 'read_snapshot'):
+        from . import snapshot
+        return getattr(snapshot, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
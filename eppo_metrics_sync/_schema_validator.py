@@ -0,0 +1,425 @@
+"""
+Generated by eppo_metrics_sync.schema_codegen from
+schema/eppo_metric_schema.json. Do not edit by hand; run
+
+    python -m eppo_metrics_sync.schema_codegen
+
+after changing the schema.
+"""
+from numbers import Number
+
+SCHEMA_SHA256 = '721cd6aa0e1419ca623c0f6097c0ad41827c36eb46423d396bdc3f176e5c6d66'
+
+
+def _is_number(data):
+    if type(data) is int or type(data) is float:
+        return True
+    return isinstance(data, Number) and not isinstance(data, bool)
+
+
+def _is_integer(data):
+    if isinstance(data, bool):
+        return False
+    if isinstance(data, int):
+        return True
+    return isinstance(data, float) and data.is_integer()
+
+
+def _accept(data):
+    return True
+
+
+
+def _validate_0(data):
+    if not (isinstance(data, str)):
+        return False
+    return True
+
+
+def _validate_1(data):
+    if not (isinstance(data, dict)):
+        return False
+    if 'entity_name' not in data:
+        return False
+    if 'column' not in data:
+        return False
+    for key, value in data.items():
+        validator = _PROPERTIES_0.get(key)
+        if validator is None or not validator(value):
+            return False
+    return True
+
+
+def _validate_2(data):
+    if not (isinstance(data, list)):
+        return False
+    for item in data:
+        if not _validate_1(item):
+            return False
+    return True
+
+
+def _validate_3(data):
+    if not (isinstance(data, str) or data is None):
+        return False
+    return True
+
+
+def _validate_4(data):
+    if not (isinstance(data, str) and data in ('increase', 'decrease')):
+        return False
+    return True
+
+
+def _validate_5(data):
+    if not (isinstance(data, dict)):
+        return False
+    if 'name' not in data:
+        return False
+    for key, value in data.items():
+        validator = _PROPERTIES_1.get(key)
+        if validator is None or not validator(value):
+            return False
+    return True
+
+
+def _validate_6(data):
+    if not (isinstance(data, list)):
+        return False
+    for item in data:
+        if not _validate_5(item):
+            return False
+    return True
+
+
+def _validate_7(data):
+    if not (isinstance(data, bool)):
+        return False
+    return True
+
+
+def _validate_8(data):
+    if not (isinstance(data, dict)):
+        return False
+    if 'name' not in data:
+        return False
+    if 'column' not in data:
+        return False
+    for key, value in data.items():
+        validator = _PROPERTIES_2.get(key)
+        if validator is None or not validator(value):
+            return False
+    return True
+
+
+def _validate_9(data):
+    if not (isinstance(data, list)):
+        return False
+    for item in data:
+        if not _validate_8(item):
+            return False
+    return True
+
+
+def _validate_10(data):
+    if isinstance(data, dict):
+        if 'name' not in data:
+            return False
+        if 'sql' not in data:
+            return False
+        if 'timestamp_column' not in data:
+            return False
+        if 'entities' not in data:
+            return False
+        if 'facts' not in data:
+            return False
+        for key, value in data.items():
+            validator = _PROPERTIES_3.get(key)
+            if validator is None or not validator(value):
+                return False
+    return True
+
+
+def _validate_11(data):
+    if not (isinstance(data, list)):
+        return False
+    for item in data:
+        if not _validate_10(item):
+            return False
+    return True
+
+
+def _validate_12(data):
+    if not (isinstance(data, str) and data in ('simple', 'ratio', 'percentile')):
+        return False
+    return True
+
+
+def _validate_13(data):
+    if not (isinstance(data, str) and data in ('decimal', 'percent')):
+        return False
+    return True
+
+
+def _validate_14(data):
+    if not (_is_number(data)):
+        return False
+    return True
+
+
+def _validate_15(data):
+    if not (_is_number(data) or data is None):
+        return False
+    return True
+
+
+def _validate_16(data):
+    if not (isinstance(data, str) and data in ('sum', 'count', 'distinct_entity', 'threshold', 'conversion', 'retention', 'count_distinct', 'last_value', 'first_value')):
+        return False
+    return True
+
+
+def _validate_17(data):
+    if not (isinstance(data, str) and data in ('equals', 'not_equals')):
+        return False
+    return True
+
+
+def _validate_18(data):
+    if not (isinstance(data, list)):
+        return False
+    for item in data:
+        if not _validate_0(item):
+            return False
+    return True
+
+
+def _validate_19(data):
+    if not (isinstance(data, dict)):
+        return False
+    if 'fact_property' not in data:
+        return False
+    if 'operation' not in data:
+        return False
+    if 'values' not in data:
+        return False
+    for key, value in data.items():
+        validator = _PROPERTIES_4.get(key)
+        if validator is None or not validator(value):
+            return False
+    return True
+
+
+def _validate_20(data):
+    if not (isinstance(data, list)):
+        return False
+    for item in data:
+        if not _validate_19(item):
+            return False
+    return True
+
+
+def _validate_21(data):
+    if not (isinstance(data, str) and data in ('gt', 'gte')):
+        return False
+    return True
+
+
+def _validate_22(data):
+    if not (isinstance(data, str) and data in ('sum', 'count')):
+        return False
+    return True
+
+
+def _validate_23(data):
+    if not (isinstance(data, str) and data in ('minutes', 'hours', 'days', 'weeks')):
+        return False
+    return True
+
+
+def _validate_24(data):
+    if not (isinstance(data, dict)):
+        return False
+    if 'comparison_operator' not in data:
+        return False
+    if 'aggregation_type' not in data:
+        return False
+    if 'breach_value' not in data:
+        return False
+    for key, value in data.items():
+        validator = _PROPERTIES_5.get(key)
+        if validator is None or not validator(value):
+            return False
+    return True
+
+
+def _validate_25(data):
+    if not (isinstance(data, str) and data in ('minutes', 'hours', 'days', 'weeks', 'calendar_days')):
+        return False
+    return True
+
+
+def _validate_26(data):
+    if not (isinstance(data, dict)):
+        return False
+    if 'fact_name' not in data:
+        return False
+    if 'operation' not in data:
+        return False
+    for key, value in data.items():
+        validator = _PROPERTIES_6.get(key)
+        if validator is None or not validator(value):
+            return False
+    return True
+
+
+def _validate_27(data):
+    if not (isinstance(data, str) and data in ('sum', 'count', 'distinct_entity', 'count_distinct', 'last_value', 'first_value')):
+        return False
+    return True
+
+
+def _validate_28(data):
+    if not (isinstance(data, dict)):
+        return False
+    if 'fact_name' not in data:
+        return False
+    if 'operation' not in data:
+        return False
+    for key, value in data.items():
+        validator = _PROPERTIES_7.get(key)
+        if validator is None or not validator(value):
+            return False
+    return True
+
+
+def _validate_29(data):
+    if not (_is_number(data)):
+        return False
+    if _is_number(data):
+        if data < 0:
+            return False
+        if data > 1:
+            return False
+    return True
+
+
+def _validate_30(data):
+    if not (isinstance(data, dict)):
+        return False
+    if 'fact_name' not in data:
+        return False
+    if 'percentile_value' not in data:
+        return False
+    for key, value in data.items():
+        validator = _PROPERTIES_8.get(key)
+        if validator is None or not validator(value):
+            return False
+    return True
+
+
+def _validate_31(data):
+    if not (isinstance(data, dict)):
+        return False
+    if 'name' not in data:
+        return False
+    if 'entity' not in data:
+        return False
+    for key, value in data.items():
+        validator = _PROPERTIES_9.get(key)
+        if validator is None or not validator(value):
+            return False
+    return True
+
+
+def _validate_32(data):
+    if not (isinstance(data, list)):
+        return False
+    for item in data:
+        if not _validate_31(item):
+            return False
+    return True
+
+
+def _validate_33(data):
+    if not (isinstance(data, dict)):
+        return False
+    return True
+
+
+def _validate_34(data):
+    if not (isinstance(data, str) or _is_number(data) or isinstance(data, bool)):
+        return False
+    return True
+
+
+def _validate_35(data):
+    if not (isinstance(data, list)):
+        return False
+    if isinstance(data, list) and len(data) < 1:
+        return False
+    for item in data:
+        if not _validate_34(item):
+            return False
+    return True
+
+
+def _validate_36(data):
+    if not (isinstance(data, dict)):
+        return False
+    for key, value in data.items():
+        if not _PROPERTIES_10.get(key, _validate_35)(value):
+            return False
+    return True
+
+
+def _validate_37(data):
+    if not (isinstance(data, dict)):
+        return False
+    if 'template' not in data:
+        return False
+    if 'parameters' not in data:
+        return False
+    for key, value in data.items():
+        validator = _PROPERTIES_11.get(key)
+        if validator is None or not validator(value):
+            return False
+    return True
+
+
+def _validate_38(data):
+    if not (isinstance(data, list)):
+        return False
+    for item in data:
+        if not _validate_37(item):
+            return False
+    return True
+
+
+def _validate_39(data):
+    if not (isinstance(data, dict)):
+        return False
+    for key, value in data.items():
+        validator = _PROPERTIES_12.get(key)
+        if validator is not None and not validator(value):
+            return False
+    return True
+
+
+_PROPERTIES_0 = {'entity_name': _validate_0, 'column': _validate_0}
+_PROPERTIES_1 = {'name': _validate_0, 'column': _validate_3, 'description': _validate_0, 'desired_change': _validate_4}
+_PROPERTIES_2 = {'name': _validate_0, 'column': _validate_0, 'description': _validate_0, 'include_experiment_computation': _validate_7}
+_PROPERTIES_3 = {'name': _validate_0, 'sql': _validate_0, 'timestamp_column': _validate_0, 'reference_url': _validate_0, 'entities': _validate_2, 'facts': _validate_6, 'properties': _validate_9, 'always_full_refresh': _validate_7, 'partition_date': _validate_0}
+_PROPERTIES_4 = {'fact_property': _validate_0, 'operation': _validate_17, 'values': _validate_18}
+_PROPERTIES_5 = {'comparison_operator': _validate_21, 'aggregation_type': _validate_22, 'breach_value': _validate_14, 'timeframe_unit': _validate_23, 'timeframe_value': _accept}
+_PROPERTIES_6 = {'fact_name': _validate_0, 'operation': _validate_16, 'filters': _validate_20, 'retention_threshold_days': _validate_14, 'conversion_threshold_days': _validate_14, 'enable_aging_subject_filter': _validate_7, 'threshold_metric_settings': _validate_24, 'aggregation_timeframe_start_value': _validate_14, 'aggregation_timeframe_end_value': _validate_14, 'aggregation_timeframe_unit': _validate_25, 'winsorization_lower_percentile': _validate_14, 'winsorization_upper_percentile': _validate_14, 'winsor_lower_fixed_value': _validate_14, 'winsor_upper_fixed_value': _validate_14}
+_PROPERTIES_7 = {'fact_name': _validate_0, 'operation': _validate_27, 'filters': _validate_20, 'aggregation_timeframe_start_value': _validate_14, 'aggregation_timeframe_end_value': _validate_14, 'aggregation_timeframe_unit': _validate_25, 'enable_aging_subject_filter': _validate_7, 'winsorization_lower_percentile': _validate_14, 'winsorization_upper_percentile': _validate_14, 'winsor_lower_fixed_value': _validate_14, 'winsor_upper_fixed_value': _validate_14}
+_PROPERTIES_8 = {'fact_name': _validate_0, 'percentile_value': _validate_29, 'filters': _validate_20}
+_PROPERTIES_9 = {'name': _validate_0, 'description': _validate_0, 'type': _validate_12, 'entity': _validate_0, 'is_guardrail': _validate_7, 'metric_display_style': _validate_13, 'minimum_detectable_effect': _validate_14, 'reference_url': _validate_0, 'guardrail_cutoff': _validate_15, 'numerator': _validate_26, 'denominator': _validate_28, 'percentile': _validate_30, 'desired_change': _validate_4}
+_PROPERTIES_10 = {}
+_PROPERTIES_11 = {'template': _validate_33, 'parameters': _validate_36}
+_PROPERTIES_12 = {'sync_tag': _validate_0, 'reference_url': _validate_0, 'fact_sources': _validate_11, 'metrics': _validate_32, 'metric_templates': _validate_38}
+
+
+def is_valid(data):
+    return _validate_39(data)
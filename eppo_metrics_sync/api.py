@@ -0,0 +1,178 @@
+"""
+The HTTP side of a sync. Kept free of YAML and schema imports so that
+pre-validated payloads can be uploaded without loading them.
+"""
+import json
+import os
+import requests
+
+from eppo_metrics_sync.instrumentation import NULL_RECORDER
+
+DEFAULT_API_HOST = 'https://eppo.cloud'
+SYNC_PATH = '/api/v1/metrics/sync'
+
+# the endpoint as configured at import time, kept for backwards compatibility
+API_ENDPOINT = f"{os.getenv('EPPO_API_HOST', DEFAULT_API_HOST)}{SYNC_PATH}"
+
+
+def api_endpoint():
+    """
+    The sync endpoint, read from EPPO_API_HOST on every request so that a
+    host set after import, e.g. of a local fake server, is used.
+    """
+    return f"{os.getenv('EPPO_API_HOST', DEFAULT_API_HOST).rstrip('/')}{SYNC_PATH}"
+
+
+def determine_sync_tag(sync_prefix):
+    if sync_prefix is not None:
+        return sync_prefix
+
+    return os.getenv('EPPO_SYNC_TAG')
+
+
+def reference_url_from_environment():
+    return os.getenv('EPPO_REFERENCE_URL') or ''
+
+
+def attach_reference_url(payload, reference_url=None):
+    """
+    Optionally attach reference url to the payload if one exists. Without
+    `reference_url`, it is read from the environment; '' attaches none.
+    """
+
+    if reference_url is None:
+        reference_url = reference_url_from_environment()
+    if not reference_url:
+        return payload
+
+    payload["reference_url"] = reference_url
+    return payload
+
+
+def _api_key():
+    api_key = os.getenv('EPPO_API_KEY')
+    if not api_key:
+        raise Exception('EPPO_API_KEY not set in environment variables. Please set and try again')
+    return api_key
+
+
+def _sync_tag(sync_prefix):
+    sync_tag = determine_sync_tag(sync_prefix)
+    if not sync_tag:
+        raise Exception('EPPO_SYNC_TAG not set in environment variables. Please set and try again')
+    return sync_tag
+
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path) as cache_file:
+            cache = json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def _save_cache(cache_path, cache):
+    temporary_path = f'{cache_path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'w') as cache_file:
+        json.dump(cache, cache_file)
+    os.replace(temporary_path, cache_path)
+
+
+def fetch_definitions(sync_prefix=None, cache_path=None, recorder=NULL_RECORDER):
+    """
+    Return the fact sources and metrics currently synced under the sync
+    tag as {'fact_sources': [...], 'metrics': [...]}.
+
+    This assumes the API answers `GET {SYNC_PATH}?sync_tag=...` with the
+    synced definitions, which the documented API, only ever POSTed to,
+    does not promise. If the endpoint answers 404 or 405 the definitions
+    cannot be read and ValueError is raised, rather than planning against
+    an empty sync tag and listing every definition as created.
+
+    With a cache_path, the last response and its ETag are kept there and
+    the request is made conditional, so unchanged remote state is not
+    downloaded again.
+    """
+    api_key = _api_key()
+    sync_tag = _sync_tag(sync_prefix)
+
+    endpoint = api_endpoint()
+    cache = _load_cache(cache_path) if cache_path else {}
+    cache_key = f'{endpoint} {sync_tag}'
+    cached = cache.get(cache_key)
+
+    headers = {"X-Eppo-Token": api_key, "Accept": "application/json"}
+    if cached and cached.get('etag'):
+        headers['If-None-Match'] = cached['etag']
+
+    with recorder.span('fetch', sync_tag=sync_tag):
+        response = requests.get(endpoint, params={'sync_tag': sync_tag}, headers=headers)
+
+    if response.status_code == 304 and cached:
+        return cached['definitions']
+    if response.status_code in (404, 405):
+        raise ValueError(
+            f"The Eppo API at {endpoint} does not serve the synced definitions "
+            f"(GET answered {response.status_code}), so plan and apply are unavailable; "
+            f"sync without them instead"
+        )
+    if response.status_code < 400:
+        body = response.json()
+        definitions = {
+            'fact_sources': body.get('fact_sources') or [],
+            'metrics': body.get('metrics') or [],
+        }
+    else:
+        raise Exception(f"Request failed {response.status_code}: {response.text}")
+
+    if cache_path:
+        etag = response.headers.get('ETag')
+        if etag:
+            cache[cache_key] = {'etag': etag, 'definitions': definitions}
+        else:
+            cache.pop(cache_key, None)
+        _save_cache(cache_path, cache)
+    return definitions
+
+
+def sync_definitions(
+        fact_sources,
+        metrics,
+        sync_prefix=None,
+        allow_upgrades=False,
+        recorder=NULL_RECORDER,
+        reference_url=None
+):
+    """
+    Replace the contents of the sync tag with the given, already validated,
+    fact sources and metrics. `reference_url` is attached as
+    attach_reference_url attaches it.
+    """
+    api_key = _api_key()
+    sync_tag = _sync_tag(sync_prefix)
+
+    headers = {"X-Eppo-Token": api_key, "Content-Type": "application/json"}
+    payload = {
+        "sync_tag": sync_tag,
+        "fact_sources": fact_sources,
+        "metrics": metrics
+    }
+    payload = attach_reference_url(payload, reference_url)
+
+    # encoded here rather than by requests so the payload size can be recorded
+    with recorder.span('encode'):
+        body = json.dumps(payload, allow_nan=False).encode('utf-8')
+    recorder.set('payload_bytes', len(body))
+    recorder.set('fact_sources', len(fact_sources))
+    recorder.set('metrics', len(metrics))
+
+    with recorder.span('upload', sync_tag=sync_tag):
+        response = requests.post(f'{api_endpoint()}{"?allow_upgrades=true" if allow_upgrades else ""}', data=body, headers=headers)
+
+    if response.status_code < 400:
+        print('Metrics synced')
+    else:
+        raise Exception(f"Request failed {response.status_code}: {response.text}")
+
+    return response
@@ -0,0 +1,170 @@
+"""
+Validation of many independent repositories in one process.
+
+A batch file lists the repositories, each with its own options:
+
+    repositories:
+      - directory: tenants/growth
+      - directory: tenants/search
+        name: search
+        schema: dbt-model
+        dbt_model_prefix: warehouse.analytics
+        sync_prefix: search
+
+Relative directories are relative to the batch file. The repositories
+are validated like `--dryrun` validates them, by a pool of worker
+processes that load the modules and the compiled schema once and then
+validate one repository after another. The result is a single report:
+
+    {"format": "eppo-metrics-sync-batch-report", "version": 1, "passed": false,
+     "repositories": 2, "failed": 1, "elapsed_seconds": 1.2,
+     "results": [{"name": "tenants/growth", "passed": true, "files": 12,
+                  "fact_sources": 3, "metrics": 40, "errors": [],
+                  "elapsed_seconds": 0.4, ...}, ...]}
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml
+
+REPORT_FORMAT = 'eppo-metrics-sync-batch-report'
+REPORT_VERSION = 1
+
+REPOSITORY_KEYS = frozenset(['directory', 'name', 'schema', 'dbt_model_prefix', 'sync_prefix', 'include', 'exclude'])
+
+
+def read_batch_file(path):
+    """
+    Return the repositories of a batch file as dicts with every key of
+    REPOSITORY_KEYS. Raises ValueError if the file is malformed.
+    """
+    try:
+        with open(path) as f:
+            content = yaml.safe_load(f)
+    except (OSError, yaml.YAMLError) as e:
+        raise ValueError(f"Error loading batch file '{path}': {e}")
+
+    entries = content.get('repositories') if isinstance(content, dict) else None
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"Batch file '{path}' must have a non-empty 'repositories' list")
+    base = os.path.dirname(os.path.abspath(path))
+    repositories = []
+    for position, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict) or not isinstance(entry.get('directory'), str):
+            raise ValueError(f"Repository {position} in '{path}' must have a directory")
+        unknown = sorted(set(entry) - REPOSITORY_KEYS)
+        if unknown:
+            raise ValueError(f"Repository {position} in '{path}' has unknown key(s): {', '.join(unknown)}")
+        repositories.append({
+            'name': entry.get('name') or entry['directory'],
+            'directory': os.path.join(base, entry['directory']),
+            'schema': entry.get('schema') or 'eppo',
+            'dbt_model_prefix': entry.get('dbt_model_prefix'),
+            'sync_prefix': entry.get('sync_prefix'),
+            'include': entry.get('include'),
+            'exclude': entry.get('exclude'),
+        })
+    return repositories
+
+
+def _load_schema():
+    # compiles the schema validator into this process's cache, so every
+    # repository a worker validates shares it
+    from eppo_metrics_sync.schema_validation import bundled_schema_validator
+    bundled_schema_validator()
+
+
+def validate_repository(repository):
+    """
+    Validate one repository like a dry run and return its report entry.
+    """
+    from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+
+    start = time.perf_counter()
+    result = {
+        'name': repository['name'],
+        'directory': repository['directory'],
+        'schema_type': repository['schema'],
+        'sync_prefix': repository['sync_prefix'],
+    }
+    errors = []
+    eppo_metrics_sync = None
+    # the progress a dry run prints is not part of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            eppo_metrics_sync = EppoMetricsSync(
+                directory=repository['directory'],
+                schema_type=repository['schema'],
+                dbt_model_prefix=repository['dbt_model_prefix'],
+                sync_prefix=repository['sync_prefix'],
+                include=repository['include'],
+                exclude=repository['exclude'],
+                # workers cannot start process pools of their own
+                parse_workers=1
+            )
+            eppo_metrics_sync.read_yaml_files()
+            if repository['sync_prefix'] is not None:
+                eppo_metrics_sync._add_sync_prefix()
+            eppo_metrics_sync.validate()
+        except ValueError as e:
+            errors = list(eppo_metrics_sync.validation_errors if eppo_metrics_sync else []) or [str(e)]
+        except Exception as e:
+            errors = [f'{type(e).__name__}: {e}']
+
+    discovery = eppo_metrics_sync.discovery if eppo_metrics_sync else None
+    result.update({
+        'passed': not errors,
+        'files': len(discovery.files) if discovery else 0,
+        'fact_sources': len(eppo_metrics_sync.fact_sources) if eppo_metrics_sync else 0,
+        'metrics': len(eppo_metrics_sync.metrics) if eppo_metrics_sync else 0,
+        'errors': errors,
+        'elapsed_seconds': round(time.perf_counter() - start, 6),
+        'worker': os.getpid(),
+    })
+    return result
+
+
+def run_batch(repositories, workers=None):
+    """
+    Validate every repository, `workers` at a time (one per CPU by
+    default; 1 validates them one by one in this process), and return the
+    report.
+    """
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    start = time.perf_counter()
+    # loaded before the pool starts, so forked workers inherit it
+    _load_schema()
+    if workers <= 1 or len(repositories) <= 1:
+        results = [validate_repository(repository) for repository in repositories]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(repositories)), initializer=_load_schema) as executor:
+            results = list(executor.map(validate_repository, repositories))
+
+    failed = sum(1 for result in results if not result['passed'])
+    return {
+        'format': REPORT_FORMAT,
+        'version': REPORT_VERSION,
+        'passed': failed == 0,
+        'repositories': len(results),
+        'failed': failed,
+        'elapsed_seconds': round(time.perf_counter() - start, 6),
+        'results': results,
+    }
+
+
+def write_report(report, path):
+    """
+    Write the report as JSON to `path`, or to stdout for '-'.
+    """
+    if path == '-':
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+        f.write('\n')
@@ -0,0 +1,69 @@
+"""
+Precompiled payload bundles.
+
+A bundle is a gzip-compressed file holding a one-line JSON header and the
+validated fact sources and metrics as JSON. The header records a SHA-256
+checksum of the payload bytes, which is verified before anything in the
+bundle is used. Reading a bundle needs neither yaml nor jsonschema.
+"""
+import gzip
+import hashlib
+import json
+import os
+
+BUNDLE_FORMAT = 'eppo-metrics-sync-bundle'
+BUNDLE_VERSION = 1
+
+
+def write_bundle(path, fact_sources, metrics, sync_prefix=None):
+    """
+    Write a bundle to `path` and return its header.
+    """
+    payload = json.dumps(
+        {'fact_sources': fact_sources, 'metrics': metrics},
+        separators=(',', ':')
+    ).encode('utf-8')
+    header = {
+        'format': BUNDLE_FORMAT,
+        'version': BUNDLE_VERSION,
+        'sha256': hashlib.sha256(payload).hexdigest(),
+        'sync_prefix': sync_prefix,
+        'fact_source_count': len(fact_sources),
+        'metric_count': len(metrics),
+    }
+
+    # write next to the target and rename, so a failed build never leaves
+    # a truncated bundle behind
+    temporary_path = f'{path}.tmp'
+    with open(temporary_path, 'wb') as raw_file:
+        # no file name and a fixed mtime make identical definitions produce identical bundles
+        with gzip.GzipFile(filename='', fileobj=raw_file, mode='wb', mtime=0) as bundle_file:
+            bundle_file.write(json.dumps(header).encode('utf-8') + b'\n')
+            bundle_file.write(payload)
+    os.replace(temporary_path, path)
+    return header
+
+
+def read_bundle(path):
+    """
+    Read and verify a bundle, returning (header, payload) where payload has
+    'fact_sources' and 'metrics'.
+    """
+    try:
+        with gzip.open(path, 'rb') as bundle_file:
+            header_line = bundle_file.readline()
+            payload = bundle_file.read()
+        header = json.loads(header_line)
+    except (OSError, EOFError, ValueError) as e:
+        raise ValueError(f"Unable to read bundle '{path}': {e}")
+
+    if not isinstance(header, dict) or header.get('format') != BUNDLE_FORMAT:
+        raise ValueError(f"'{path}' is not an eppo metrics sync bundle")
+    if header.get('version') != BUNDLE_VERSION:
+        raise ValueError(
+            f"Unsupported bundle version {header.get('version')} in '{path}', expected {BUNDLE_VERSION}"
+        )
+    if hashlib.sha256(payload).hexdigest() != header.get('sha256'):
+        raise ValueError(f"Checksum mismatch in bundle '{path}', it may be corrupted")
+
+    return header, json.loads(payload)
@@ -0,0 +1,129 @@
+"""
+Portable warm-cache artifacts.
+
+An artifact is a gzip-compressed snapshot of a SQLite index (see
+index.py): the parsed definitions, per-file schema errors and content
+hashes of a repository. Its one-line JSON header records the tool
+version and the hash of the bundled schema it was built with. An artifact
+from another version or schema is not imported, as its parse results
+may not be valid any more. Paths in the index are relative to the
+definitions directory, so an artifact can move between checkouts.
+Imported files are recognised by their content hash, since a fresh
+checkout has different modification times.
+"""
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+
+from eppo_metrics_sync.index import INDEX_VERSION, tool_version
+from eppo_metrics_sync.schema_codegen import SCHEMA_PATH, schema_sha256
+
+CACHE_FORMAT = 'eppo-metrics-sync-cache'
+CACHE_VERSION = 1
+
+
+def bundled_schema_sha256():
+    with open(SCHEMA_PATH, 'rb') as schema_file:
+        return schema_sha256(schema_file.read())
+
+
+def cache_key():
+    """
+    A key for CI cache actions; artifacts with different keys are never
+    interchangeable.
+    """
+    return f'eppo-metrics-sync-{tool_version()}-{bundled_schema_sha256()[:16]}'
+
+
+def _snapshot(db_path):
+    # the backup API gives a consistent copy even of a database in use
+    with tempfile.TemporaryDirectory() as directory:
+        snapshot_path = os.path.join(directory, 'index.sqlite')
+        source = sqlite3.connect(db_path)
+        target = sqlite3.connect(snapshot_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        with open(snapshot_path, 'rb') as snapshot_file:
+            return snapshot_file.read()
+
+
+def export_cache(db_path, path):
+    """
+    Write the index at `db_path` to a cache artifact at `path` and return
+    its header.
+    """
+    if not os.path.isfile(db_path):
+        raise ValueError(f"No index at '{db_path}', run the index command or a dry run with --index first")
+    content = _snapshot(db_path)
+    header = {
+        'format': CACHE_FORMAT,
+        'version': CACHE_VERSION,
+        'key': cache_key(),
+        'tool_version': tool_version(),
+        'schema_sha256': bundled_schema_sha256(),
+        'index_version': INDEX_VERSION,
+        'sha256': hashlib.sha256(content).hexdigest(),
+    }
+    temporary_path = f'{path}.tmp'
+    with open(temporary_path, 'wb') as raw_file:
+        with gzip.GzipFile(filename='', fileobj=raw_file, mode='wb', mtime=0) as cache_file:
+            cache_file.write(json.dumps(header).encode('utf-8') + b'\n')
+            cache_file.write(content)
+    os.replace(temporary_path, path)
+    return header
+
+
+def read_cache_header(path):
+    try:
+        with gzip.open(path, 'rb') as cache_file:
+            header = json.loads(cache_file.readline())
+    except (OSError, EOFError, ValueError) as e:
+        raise ValueError(f"Unable to read cache artifact '{path}': {e}")
+    if not isinstance(header, dict) or header.get('format') != CACHE_FORMAT:
+        raise ValueError(f"'{path}' is not an eppo metrics sync cache artifact")
+    return header
+
+
+def compatibility_problem(header):
+    """
+    Return why an artifact cannot be used by this installation, or None.
+    """
+    if header.get('version') != CACHE_VERSION:
+        return f"cache format version {header.get('version')}, expected {CACHE_VERSION}"
+    if header.get('tool_version') != tool_version():
+        return f"built by version {header.get('tool_version')}, this is {tool_version()}"
+    if header.get('schema_sha256') != bundled_schema_sha256():
+        return 'built with a different schema'
+    if header.get('index_version') != INDEX_VERSION:
+        return f"index version {header.get('index_version')}, expected {INDEX_VERSION}"
+    return None
+
+
+def import_cache(path, db_path):
+    """
+    Replace the index at `db_path` with the one in a cache artifact.
+    Returns (header, None) on success and (header, reason) when the
+    artifact is incompatible, in which case nothing is written.
+    """
+    header = read_cache_header(path)
+    problem = compatibility_problem(header)
+    if problem:
+        return header, problem
+
+    with gzip.open(path, 'rb') as cache_file:
+        cache_file.readline()
+        content = cache_file.read()
+    if hashlib.sha256(content).hexdigest() != header.get('sha256'):
+        raise ValueError(f"Checksum mismatch in cache artifact '{path}', it may be corrupted")
+
+    temporary_path = f'{db_path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'wb') as db_file:
+        db_file.write(content)
+    os.replace(temporary_path, db_path)
+    return header, None
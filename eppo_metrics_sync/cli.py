@@ -0,0 +1,637 @@
+import argparse
+import contextlib
+import os
+import sys
+
+PROG = 'python -m eppo_metrics_sync'
+
+DEFAULT_INDEX_PATH = '.eppo-index.sqlite'
+
+DEFAULT_REMOTE_CACHE_PATH = '.eppo-remote-cache.json'
+
+DEFAULT_PARTITION_STATE_PATH = '.eppo-partition-state.json'
+
+
+def add_source_arguments(parser, directory_nargs=None):
+    """
+    Arguments describing where definitions are read from and how they are
+    interpreted, shared by every command that reads a directory.
+    """
+    parser.add_argument("directory", nargs=directory_nargs, help="The directory of yaml files to process")
+    parser.add_argument("--schema", help="One of: eppo[default], dbt-model, mixed (dbt property files and eppo definitions)", default='eppo')
+    parser.add_argument(
+        "--dbt-model-prefix",
+        help="The warehouse and schema where the dbt models live",
+        default=None
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        help="Only load files matching this glob, relative to the directory (repeatable)",
+        default=None
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        help="Skip files and directories matching this glob, relative to the directory (repeatable)",
+        default=None
+    )
+    limits = parser.add_argument_group(
+        "YAML limits",
+        "Files crossing one of these are skipped and reported as errors"
+    )
+    limits.add_argument("--max-file-bytes", type=int, help="Largest file size in bytes (default: 128 MiB)", default=None)
+    limits.add_argument("--max-yaml-aliases", type=int, help="Most aliases in a file (default: 10000)", default=None)
+    limits.add_argument(
+        "--max-yaml-nodes",
+        type=int,
+        help="Most nodes in a file, counting the nodes an alias refers to every time it is used (default: 5000000)",
+        default=None
+    )
+    limits.add_argument("--max-yaml-depth", type=int, help="Deepest nesting of collections (default: 64)", default=None)
+
+
+def create_yaml_limits(args):
+    from eppo_metrics_sync.limits import DEFAULT_LIMITS, YamlLimits
+    values = {
+        'max_file_bytes': args.max_file_bytes,
+        'max_aliases': args.max_yaml_aliases,
+        'max_nodes': args.max_yaml_nodes,
+        'max_depth': args.max_yaml_depth,
+    }
+    return YamlLimits(**{
+        key: getattr(DEFAULT_LIMITS, key) if value is None else value
+        for key, value in values.items()
+    })
+
+
+def add_lock_dir_argument(parser):
+    parser.add_argument(
+        "--lock-dir",
+        help="Serialize syncs to the same sync tag on this host through this directory, "
+             "sending only the newest of any queued syncs (default: $EPPO_SYNC_LOCK_DIR)",
+        default=os.getenv('EPPO_SYNC_LOCK_DIR')
+    )
+
+
+def create_coordinator(lock_dir):
+    if not lock_dir:
+        return None
+    from eppo_metrics_sync.coordination import FileBackend, SyncCoordinator
+    return SyncCoordinator(FileBackend(lock_dir))
+
+
+def build_sync_parser():
+    parser = argparse.ArgumentParser(
+        prog=PROG,
+        description="Scan specified directory for Eppo yaml files and sync with Eppo",
+        epilog="Other commands: sync, plan, apply, merge, build, index, query, cache, diff, batch. Run '%(prog)s <command> --help' for details."
+    )
+    add_source_arguments(parser, directory_nargs='?')
+    parser.add_argument("--allow-upgrades", action="store_true", help="Allow existing non-certified metrics/fact sources to become certified")
+    parser.add_argument("--dryrun", action="store_true", help="Run in dry run mode")
+    parser.add_argument("--sync-prefix", help="Used for testing in a shared Q/A workspace. "
+                                              "Will use this as a sync tag and append all fact and metric definitions with this prefix.",
+                        required=False
+                        )
+    parser.add_argument(
+        "--changed-since",
+        help="Only fully validate files changed since this git ref (requires --dryrun). "
+             "Unchanged files are only summarized for cross-file checks, from the index "
+             f"(--index, default: {DEFAULT_INDEX_PATH}); files the index does not hold yet are parsed",
+        default=None
+    )
+    parser.add_argument(
+        "--index",
+        help="Path of a SQLite index (see the index command) used to skip reparsing unchanged files",
+        default=None
+    )
+    parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        help="Only validate the I-th of N deterministic partitions of the files (requires --dryrun) "
+             "and write a shard summary for the merge command",
+        default=None
+    )
+    parser.add_argument(
+        "--shard-summary",
+        help="Where to write the shard summary (default: shard-I-of-N.json in the current directory, "
+             "which must be outside the validated directory)",
+        default=None
+    )
+    parser.add_argument(
+        "--bundle",
+        help="Sync a payload bundle written by the build command instead of reading a directory",
+        default=None
+    )
+    add_lock_dir_argument(parser)
+    parser.add_argument(
+        "--results",
+        metavar="PATH",
+        help="Stream per-file results, errors and a summary to this file as JSON lines while the run "
+             "progresses ('-' for stdout, moving other output to stderr)",
+        default=None
+    )
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Stop reading and validating at the first error"
+    )
+    parser.add_argument(
+        "--partition-by-directory",
+        action="store_true",
+        help="Sync every top-level subdirectory to its own sync tag, <sync tag>/<subdirectory>, "
+             "validating and syncing each independently"
+    )
+    parser.add_argument(
+        "--partition-map",
+        metavar="PATH",
+        help="Sync the partitions described in this YAML file to their own sync tags",
+        default=None
+    )
+    parser.add_argument(
+        "--partition-state",
+        metavar="PATH",
+        help="Where the payload last synced to each partition's sync tag is recorded, so that "
+             f"unchanged partitions are skipped (default: {DEFAULT_PARTITION_STATE_PATH})",
+        default=DEFAULT_PARTITION_STATE_PATH
+    )
+    parser.add_argument(
+        "--partition-workers",
+        type=int,
+        help="How many partitions are synced at the same time (default: 4)",
+        default=4
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        help="Worker processes parsing very large YAML files in chunks (default: one per CPU, 1 to disable)",
+        default=None
+    )
+    parser.add_argument(
+        "--metrics-file",
+        help="Write run metrics to this OpenMetrics textfile (e.g. for node-exporter's textfile collector)",
+        default=None
+    )
+    parser.add_argument(
+        "--trace-file",
+        help="Append OpenTelemetry-style spans of the run to this file as JSON lines",
+        default=None
+    )
+    return parser
+
+
+def run_sync(argv):
+    parser = build_sync_parser()
+    args = parser.parse_args(argv)
+
+    if args.bundle:
+        if args.directory or args.dryrun or args.sync_prefix:
+            parser.error("--bundle cannot be combined with a directory, --dryrun or --sync-prefix")
+    elif not args.directory:
+        parser.error("the following arguments are required: directory")
+    if args.changed_since and not args.dryrun:
+        parser.error("--changed-since can only be used with --dryrun")
+    partitioned = args.partition_by_directory or args.partition_map
+    if partitioned:
+        if args.partition_by_directory and args.partition_map:
+            parser.error("--partition-by-directory and --partition-map cannot be combined")
+        if args.bundle or args.shard or args.changed_since or args.index or args.results:
+            parser.error("partitioned syncs cannot be combined with --bundle, --shard, --changed-since, "
+                         "--index or --results")
+    shard = None
+    if args.shard:
+        if not args.dryrun:
+            parser.error("--shard can only be used with --dryrun")
+        from eppo_metrics_sync.sharding import parse_shard
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+        if not args.shard_summary:
+            directory = os.path.realpath(args.directory)
+            if os.path.commonpath([directory, os.path.realpath(os.getcwd())]) == directory:
+                # the summary of one shard would be read by the next one
+                parser.error("--shard-summary is required when running inside the directory being validated")
+            args.shard_summary = f'shard-{shard[0]}-of-{shard[1]}.json'
+
+    from eppo_metrics_sync.instrumentation import create_recorder, recorded_run
+
+    recorder = create_recorder(
+        metrics_path=args.metrics_file,
+        trace_path=args.trace_file,
+        labels={'sync_tag': args.sync_prefix or os.getenv('EPPO_SYNC_TAG')}
+    )
+
+    coordinator = create_coordinator(args.lock_dir)
+
+    if args.bundle:
+        with recorded_run(recorder, 'sync', bundle=args.bundle):
+            sync_bundle(args.bundle, args.allow_upgrades, recorder, coordinator)
+        return
+
+    if partitioned:
+        from eppo_metrics_sync.partitions import PartitionedSync
+
+        partitioned_sync = PartitionedSync(
+            directory=args.directory,
+            partition_map=args.partition_map,
+            schema_type=args.schema,
+            dbt_model_prefix=args.dbt_model_prefix,
+            sync_prefix=args.sync_prefix,
+            allow_upgrades=args.allow_upgrades,
+            include=args.include,
+            exclude=args.exclude,
+            state_path=args.partition_state,
+            workers=args.partition_workers,
+            recorder=recorder,
+            coordinator=coordinator,
+            parse_workers=args.parse_workers,
+            yaml_limits=create_yaml_limits(args)
+        )
+        with recorded_run(recorder, 'dryrun' if args.dryrun else 'sync', directory=args.directory):
+            partitioned_sync.run(dryrun=args.dryrun)
+        return
+
+    from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+    from eppo_metrics_sync.results import NULL_RESULTS, open_results
+
+    results = open_results(args.results) if args.results else NULL_RESULTS
+    eppo_metrics_sync = EppoMetricsSync(
+        directory=args.directory,
+        schema_type=args.schema,
+        dbt_model_prefix=args.dbt_model_prefix,
+        sync_prefix=args.sync_prefix,
+        allow_upgrades=args.allow_upgrades,
+        include=args.include,
+        exclude=args.exclude,
+        changed_since=args.changed_since,
+        # unchanged files are only parsed again if the index misses them
+        index_path=args.index or (DEFAULT_INDEX_PATH if args.changed_since else None),
+        recorder=recorder,
+        coordinator=coordinator,
+        shard=shard,
+        results=results,
+        fail_fast=args.fail_fast,
+        parse_workers=args.parse_workers,
+        yaml_limits=create_yaml_limits(args)
+    )
+
+    # with results on stdout, everything else is printed to stderr
+    output = contextlib.redirect_stdout(sys.stderr) if args.results == '-' else contextlib.nullcontext()
+    passed = False
+    try:
+        with output, recorded_run(recorder, 'dryrun' if args.dryrun else 'sync', directory=args.directory):
+            if shard:
+                validate_shard(eppo_metrics_sync, args.shard_summary)
+            elif args.dryrun:
+                eppo_metrics_sync.read_yaml_files()
+                eppo_metrics_sync.validate()
+            else:
+                eppo_metrics_sync.sync()
+        passed = True
+    finally:
+        eppo_metrics_sync.emit_summary(passed)
+        results.close()
+
+
+def validate_shard(eppo_metrics_sync, summary_path):
+    from eppo_metrics_sync.sharding import write_summary
+
+    eppo_metrics_sync.read_yaml_files()
+    try:
+        eppo_metrics_sync.validate()
+    finally:
+        # written even when the shard has errors, so merge can report them all
+        write_summary(summary_path, eppo_metrics_sync.shard_summary())
+        print(f"Wrote shard summary to {summary_path}")
+
+
+def sync_bundle(path, allow_upgrades, recorder, coordinator=None):
+    # only the bundle reader and the HTTP client are needed here
+    from eppo_metrics_sync.api import sync_definitions
+    from eppo_metrics_sync.bundle import read_bundle
+
+    with recorder.span('parse', bundle=path):
+        header, payload = read_bundle(path)
+    if coordinator is not None:
+        from eppo_metrics_sync.coordination import coordinated_sync
+        return coordinated_sync(
+            coordinator,
+            payload['fact_sources'],
+            payload['metrics'],
+            sync_prefix=header['sync_prefix'],
+            allow_upgrades=allow_upgrades,
+            recorder=recorder
+        )
+    return sync_definitions(
+        payload['fact_sources'],
+        payload['metrics'],
+        sync_prefix=header['sync_prefix'],
+        allow_upgrades=allow_upgrades,
+        recorder=recorder
+    )
+
+
+def run_build(argv):
+    parser = argparse.ArgumentParser(
+        prog=f'{PROG} build',
+        description="Validate the definitions in a directory and write a compressed, "
+                    "checksummed payload bundle for a later 'sync --bundle'"
+    )
+    add_source_arguments(parser)
+    parser.add_argument("--output", "-o", required=True, help="Path of the bundle to write")
+    parser.add_argument("--sync-prefix", help="Prefix definition names and use the prefix as the sync tag", default=None)
+    parser.add_argument(
+        "--index",
+        help="Path of a SQLite index (see the index command) used to skip reparsing unchanged files",
+        default=None
+    )
+    args = parser.parse_args(argv)
+
+    from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+
+    eppo_metrics_sync = EppoMetricsSync(
+        directory=args.directory,
+        schema_type=args.schema,
+        dbt_model_prefix=args.dbt_model_prefix,
+        sync_prefix=args.sync_prefix,
+        include=args.include,
+        exclude=args.exclude,
+        index_path=args.index,
+        yaml_limits=create_yaml_limits(args)
+    )
+    header = eppo_metrics_sync.build_bundle(args.output)
+    print(
+        f"Wrote {header['fact_source_count']} fact source(s) and {header['metric_count']} "
+        f"metric(s) to {args.output} (sha256 {header['sha256']})"
+    )
+
+
+def run_index(argv):
+    parser = argparse.ArgumentParser(
+        prog=f'{PROG} index',
+        description="Write the parsed definitions in a directory into a SQLite index, "
+                    "updating it incrementally on later runs"
+    )
+    add_source_arguments(parser)
+    parser.add_argument("--db", help=f"Index path (default: {DEFAULT_INDEX_PATH})", default=DEFAULT_INDEX_PATH)
+    args = parser.parse_args(argv)
+
+    from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+    from eppo_metrics_sync.index import MetricsIndex
+
+    eppo_metrics_sync = EppoMetricsSync(
+        directory=args.directory,
+        schema_type=args.schema,
+        dbt_model_prefix=args.dbt_model_prefix,
+        include=args.include,
+        exclude=args.exclude,
+        index_path=args.db,
+        yaml_limits=create_yaml_limits(args)
+    )
+    try:
+        eppo_metrics_sync.read_yaml_files()
+        eppo_metrics_sync.validate()
+    except ValueError:
+        pass
+
+    with MetricsIndex(args.db) as index:
+        index.record_diagnostics(eppo_metrics_sync.validation_errors)
+
+    print(
+        f"Indexed {len(eppo_metrics_sync.fact_sources)} fact source(s) and "
+        f"{len(eppo_metrics_sync.metrics)} metric(s) with "
+        f"{len(eppo_metrics_sync.validation_errors)} validation error(s) into {args.db}"
+    )
+
+
+def run_query(argv):
+    parser = argparse.ArgumentParser(
+        prog=f'{PROG} query',
+        description="Look up definitions in a SQLite index written by the index command"
+    )
+    parser.add_argument("--db", help=f"Index path (default: {DEFAULT_INDEX_PATH})", default=DEFAULT_INDEX_PATH)
+    lookup = parser.add_mutually_exclusive_group(required=True)
+    lookup.add_argument("--references-fact", metavar="FACT", help="Metrics that reference a fact")
+    lookup.add_argument("--defined", metavar="NAME", help="Where a fact source, fact or metric is defined")
+    lookup.add_argument("--aggregation", metavar="OPERATION", help="Metrics using an aggregation operation (or percentile)")
+    lookup.add_argument("--diagnostics", action="store_true", help="Validation errors from the last index run")
+    args = parser.parse_args(argv)
+
+    from eppo_metrics_sync.index import MetricsIndex
+
+    with MetricsIndex(args.db) as index:
+        if args.references_fact:
+            rows = index.metrics_referencing_fact(args.references_fact)
+        elif args.defined:
+            rows = index.find_definition(args.defined)
+        elif args.aggregation:
+            rows = index.metrics_using_aggregation(args.aggregation)
+        else:
+            rows = [(message,) for message in index.diagnostics()]
+
+    for row in rows:
+        print('\t'.join(str(column) for column in row))
+
+
+def build_plan_parser(command, description):
+    parser = argparse.ArgumentParser(prog=f'{PROG} {command}', description=description)
+    add_source_arguments(parser)
+    parser.add_argument("--sync-prefix", help="Prefix definition names and use the prefix as the sync tag", default=None)
+    parser.add_argument(
+        "--remote-cache",
+        help=f"File caching the remote definitions between runs (default: {DEFAULT_REMOTE_CACHE_PATH})",
+        default=DEFAULT_REMOTE_CACHE_PATH
+    )
+    parser.add_argument("--no-remote-cache", action="store_true", help="Always download the remote definitions")
+    return parser
+
+
+def _plan_source(args):
+    from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+
+    return EppoMetricsSync(
+        directory=args.directory,
+        schema_type=args.schema,
+        dbt_model_prefix=args.dbt_model_prefix,
+        sync_prefix=args.sync_prefix,
+        allow_upgrades=getattr(args, 'allow_upgrades', False),
+        include=args.include,
+        exclude=args.exclude,
+        coordinator=create_coordinator(getattr(args, 'lock_dir', None)),
+        yaml_limits=create_yaml_limits(args)
+    )
+
+
+def run_plan(argv):
+    parser = build_plan_parser(
+        'plan',
+        "Show which fact sources and metrics a sync would create, update or delete"
+    )
+    parser.add_argument("--show-unchanged", action="store_true", help="Also list unchanged definitions")
+    args = parser.parse_args(argv)
+
+    plan = _plan_source(args).plan(cache_path=None if args.no_remote_cache else args.remote_cache)
+    print(plan.format(show_unchanged=args.show_unchanged))
+
+
+def run_apply(argv):
+    parser = build_plan_parser(
+        'apply',
+        "Sync the definitions in a directory, skipping the upload when nothing changed"
+    )
+    parser.add_argument("--allow-upgrades", action="store_true", help="Allow existing non-certified metrics/fact sources to become certified")
+    add_lock_dir_argument(parser)
+    args = parser.parse_args(argv)
+
+    _plan_source(args).apply(cache_path=None if args.no_remote_cache else args.remote_cache)
+
+
+def run_merge(argv):
+    parser = argparse.ArgumentParser(
+        prog=f'{PROG} merge',
+        description="Combine the summaries written by 'sync --dryrun --shard i/n' and run "
+                    "the cross-file checks over all shards"
+    )
+    parser.add_argument("summaries", nargs='+', help="The shard summary files, one per shard")
+    args = parser.parse_args(argv)
+
+    from eppo_metrics_sync.sharding import merge_summaries, read_summary
+
+    view = merge_summaries([read_summary(path) for path in args.summaries])
+    if view.validation_errors:
+        error_message = f"Validation failed with {len(view.validation_errors)} error(s): \n"
+        error_message += '\n'.join(view.validation_errors)
+        raise ValueError(error_message)
+    print(
+        f"Merged {len(args.summaries)} shard(s): {len(view.fact_sources)} fact source(s) and "
+        f"{len(view.metrics)} metric(s) passed the cross-file checks"
+    )
+
+
+def run_cache(argv):
+    parser = argparse.ArgumentParser(
+        prog=f'{PROG} cache',
+        description="Move a SQLite index between machines, e.g. to warm CI runs from a cache action"
+    )
+    actions = parser.add_subparsers(dest='action', required=True)
+    export_parser = actions.add_parser('export', help="Package an index into a compressed cache artifact")
+    export_parser.add_argument("output", help="The artifact to write")
+    import_parser = actions.add_parser(
+        'import', help="Replace the index with the one in a cache artifact, if this version and schema built it"
+    )
+    import_parser.add_argument("input", help="The artifact to read")
+    for action_parser in (export_parser, import_parser):
+        action_parser.add_argument(
+            "--db", help=f"Index path (default: {DEFAULT_INDEX_PATH})", default=DEFAULT_INDEX_PATH
+        )
+    actions.add_parser('key', help="Print the key artifacts of this version and schema are stored under")
+    args = parser.parse_args(argv)
+
+    from eppo_metrics_sync.cache import cache_key, export_cache, import_cache
+
+    if args.action == 'key':
+        print(cache_key())
+    elif args.action == 'export':
+        header = export_cache(args.db, args.output)
+        print(f"Exported {args.db} to {args.output} (key {header['key']})")
+    else:
+        header, problem = import_cache(args.input, args.db)
+        if problem:
+            # a stale cache is a cache miss, not a failure
+            print(f"Ignoring {args.input}: {problem}")
+        else:
+            print(f"Imported {args.input} into {args.db} (key {header['key']})")
+
+
+def run_diff(argv):
+    parser = argparse.ArgumentParser(
+        prog=f'{PROG} diff',
+        description="Show which fact sources and metrics changed between two git revisions, "
+                    "reading the definitions straight out of git"
+    )
+    parser.add_argument("revision_a", help="The revision to compare from, e.g. main")
+    parser.add_argument("revision_b", help="The revision to compare to, e.g. HEAD")
+    parser.add_argument("directory", nargs='?', default='.', help="The directory of definitions in the repository (default: .)")
+    parser.add_argument("--schema", help="One of: eppo[default], dbt-model, mixed", default='eppo')
+    parser.add_argument("--dbt-model-prefix", help="The warehouse and schema where the dbt models live", default=None)
+    parser.add_argument("--exit-code", action="store_true", help="Exit with status 1 if any definition changed")
+    args = parser.parse_args(argv)
+
+    from eppo_metrics_sync.revision_diff import diff_revisions
+
+    diff = diff_revisions(
+        args.directory,
+        args.revision_a,
+        args.revision_b,
+        schema_type=args.schema,
+        dbt_model_prefix=args.dbt_model_prefix
+    )
+    print(diff.format())
+    if args.exit_code and diff.has_changes:
+        sys.exit(1)
+
+
+def run_batch(argv):
+    parser = argparse.ArgumentParser(
+        prog=f'{PROG} batch',
+        description="Validate the repositories listed in a batch file in one process, like --dryrun, "
+                    "and write one report"
+    )
+    parser.add_argument("batch_file", help="A YAML file listing the repositories and their options")
+    parser.add_argument(
+        "--report",
+        metavar="PATH",
+        help="Write the JSON report to this file ('-' for stdout, moving other output to stderr)",
+        default=None
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes validating repositories at the same time (default: one per CPU)",
+        default=None
+    )
+    args = parser.parse_args(argv)
+
+    from eppo_metrics_sync.batch import read_batch_file, run_batch as validate_batch, write_report
+
+    report = validate_batch(read_batch_file(args.batch_file), workers=args.workers)
+    if args.report:
+        write_report(report, args.report)
+    output = sys.stderr if args.report == '-' else sys.stdout
+    for result in report['results']:
+        status = 'passed' if result['passed'] else f"failed with {len(result['errors'])} error(s)"
+        print(f"{result['name']}: {status} in {result['elapsed_seconds']:.2f}s", file=output)
+    if not report['passed']:
+        failed = [result for result in report['results'] if not result['passed']]
+        error_message = f"{report['failed']} of {report['repositories']} repositories failed validation: \n"
+        error_message += '\n'.join(f"{result['name']}: {error}" for result in failed for error in result['errors'])
+        raise ValueError(error_message)
+
+
+COMMANDS = {
+    'sync': run_sync,
+    'plan': run_plan,
+    'apply': run_apply,
+    'merge': run_merge,
+    'build': run_build,
+    'index': run_index,
+    'query': run_query,
+    'cache': run_cache,
+    'diff': run_diff,
+    'batch': run_batch,
+}
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        if os.path.isdir(argv[0]):
+            # before the commands, `eppo_metrics_sync build` synced the directory build
+            sys.exit(
+                f"eppo_metrics_sync: error: '{argv[0]}' is both a command and a directory here; "
+                f"write './{argv[0]}' to sync the directory, or run the command from another directory"
+            )
+        return COMMANDS[argv[0]](argv[1:])
+    return run_sync(argv)
@@ -0,0 +1,247 @@
+"""
+Coordination of concurrent syncs to the same sync tag on one host.
+
+Every sync enqueues its payload and then waits for the sync tag's lock.
+The lock holder sends only the newest queued payload and resolves every
+run queued before it, so a burst of syncs results in one upload per lock
+hand-over instead of one per run. Runs whose payload was superseded get a
+"coalesced into run X" result.
+
+Backends provide the lock and the queue. FileBackend uses flock and a
+spool directory and works across processes; MemoryBackend works across
+threads and stands in for it in tests.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+
+from eppo_metrics_sync.api import determine_sync_tag, reference_url_from_environment, sync_definitions
+from eppo_metrics_sync.instrumentation import NULL_RECORDER
+
+SYNCED = 'synced'
+COALESCED = 'coalesced'
+
+
+class SyncResult:
+    def __init__(self, run_id, status, sent_by, sent_run_id, response=None):
+        self.run_id = run_id
+        self.status = status
+        # the run that made the request and the run whose payload it sent
+        self.sent_by = sent_by
+        self.sent_run_id = sent_run_id
+        self.response = response
+
+    @property
+    def message(self):
+        if self.status == COALESCED:
+            return f'Run {self.run_id} coalesced into run {self.sent_run_id}'
+        if self.sent_by != self.run_id:
+            return f'Run {self.run_id} synced by run {self.sent_by}'
+        return f'Run {self.run_id} synced'
+
+
+class MemoryBackend:
+    def __init__(self):
+        self._guard = threading.Lock()
+        self._locks = {}
+        self._sequence = 0
+        self._pending = {}
+        self._results = {}
+
+    @contextmanager
+    def lock(self, key):
+        with self._guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            yield
+
+    def enqueue(self, key, run_id, payload):
+        with self._guard:
+            self._sequence += 1
+            self._pending.setdefault(key, []).append((self._sequence, run_id, payload))
+
+    def pending(self, key):
+        """
+        Return the queued (run id, payload) pairs, oldest first.
+        """
+        with self._guard:
+            return [(run_id, payload) for _, run_id, payload in self._pending.get(key, [])]
+
+    def resolve(self, key, run_ids, result):
+        with self._guard:
+            self._pending[key] = [p for p in self._pending.get(key, []) if p[1] not in run_ids]
+            for run_id in run_ids:
+                self._results[(key, run_id)] = result
+
+    def withdraw(self, key, run_id):
+        with self._guard:
+            self._pending[key] = [p for p in self._pending.get(key, []) if p[1] != run_id]
+
+    def take_result(self, key, run_id):
+        with self._guard:
+            return self._results.pop((key, run_id), None)
+
+
+class FileBackend:
+    """
+    Keeps a lock file, queued payloads and results per sync tag under
+    `directory`, which must be on a local filesystem shared by the syncs.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _path(self, key, *parts):
+        # sync tags are free text, so they are not used as file names directly
+        tag_directory = os.path.join(self.directory, hashlib.sha256(key.encode('utf-8')).hexdigest()[:16])
+        return os.path.join(tag_directory, *parts)
+
+    @contextmanager
+    def lock(self, key):
+        os.makedirs(self._path(key), exist_ok=True)
+        with open(self._path(key, 'lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write(self, path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = f'{path}.{os.getpid()}.tmp'
+        with open(temporary_path, 'w') as f:
+            json.dump(content, f)
+        os.replace(temporary_path, path)
+
+    def enqueue(self, key, run_id, payload):
+        # file names sort in submission order
+        self._write(self._path(key, 'pending', f'{time.time_ns():020d}-{run_id}.json'), payload)
+
+    def _pending_files(self, key):
+        try:
+            names = os.listdir(self._path(key, 'pending'))
+        except FileNotFoundError:
+            return []
+        return [(name[21:-len('.json')], name) for name in sorted(names) if name.endswith('.json')]
+
+    def pending(self, key):
+        pending = []
+        for run_id, name in self._pending_files(key):
+            with open(self._path(key, 'pending', name)) as f:
+                pending.append((run_id, json.load(f)))
+        return pending
+
+    def resolve(self, key, run_ids, result):
+        for run_id in run_ids:
+            self._write(self._path(key, 'results', f'{run_id}.json'), result)
+        self._remove_pending(key, run_ids)
+
+    def withdraw(self, key, run_id):
+        self._remove_pending(key, [run_id])
+
+    def _remove_pending(self, key, run_ids):
+        for run_id, name in self._pending_files(key):
+            if run_id in run_ids:
+                os.remove(self._path(key, 'pending', name))
+
+    def take_result(self, key, run_id):
+        path = self._path(key, 'results', f'{run_id}.json')
+        try:
+            with open(path) as f:
+                result = json.load(f)
+        except FileNotFoundError:
+            return None
+        os.remove(path)
+        return result
+
+
+def new_run_id():
+    return f'{os.getpid()}-{secrets.token_hex(4)}'
+
+
+class SyncCoordinator:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def submit(self, sync_tag, payload, send, run_id=None):
+        """
+        Queue `payload` for `sync_tag` and wait until it has been sent, by
+        this run or by another, or superseded by a newer payload.
+
+        `send(payload)` performs the upload and must accept any queued
+        payload, since the lock holder sends the newest one. Returns a
+        SyncResult.
+        """
+        run_id = run_id or new_run_id()
+        self.backend.enqueue(sync_tag, run_id, payload)
+        try:
+            with self.backend.lock(sync_tag):
+                result = self.backend.take_result(sync_tag, run_id)
+                if result is not None:
+                    return _result(run_id, result['sent_by'], result['sent_run_id'])
+
+                pending = self.backend.pending(sync_tag)
+                sent_run_id, newest_payload = pending[-1]
+                response = send(newest_payload)
+
+                resolved = [queued_run_id for queued_run_id, _ in pending]
+                self.backend.resolve(sync_tag, [r for r in resolved if r != run_id], {
+                    'sent_by': run_id,
+                    'sent_run_id': sent_run_id,
+                })
+        finally:
+            # a failed send leaves newer payloads queued for their own runs
+            self.backend.withdraw(sync_tag, run_id)
+
+        return _result(run_id, run_id, sent_run_id, response)
+
+
+def _result(run_id, sent_by, sent_run_id, response=None):
+    status = SYNCED if sent_run_id == run_id else COALESCED
+    return SyncResult(run_id, status, sent_by, sent_run_id, response)
+
+
+def coordinated_sync(
+        coordinator,
+        fact_sources,
+        metrics,
+        sync_prefix=None,
+        allow_upgrades=False,
+        recorder=NULL_RECORDER
+):
+    """
+    sync_definitions through a SyncCoordinator. Returns a SyncResult.
+    """
+    sync_tag = determine_sync_tag(sync_prefix)
+    if not sync_tag:
+        # let sync_definitions report the missing sync tag
+        return sync_definitions(fact_sources, metrics, sync_prefix, allow_upgrades, recorder)
+
+    def send(payload):
+        return sync_definitions(
+            payload['fact_sources'],
+            payload['metrics'],
+            sync_prefix=sync_tag,
+            allow_upgrades=payload['allow_upgrades'],
+            recorder=recorder,
+            # the URL of the run that queued the payload, not of the sender
+            reference_url=payload.get('reference_url')
+        )
+
+    payload = {
+        'fact_sources': fact_sources,
+        'metrics': metrics,
+        'allow_upgrades': allow_upgrades,
+        'reference_url': reference_url_from_environment(),
+    }
+    with recorder.span('coordinate', sync_tag=sync_tag):
+        result = coordinator.submit(sync_tag, payload, send)
+    recorder.set('coalesced', int(result.status == COALESCED))
+    if result.status == COALESCED or result.sent_by != result.run_id:
+        print(result.message)
+    return result
@@ -0,0 +1,262 @@
+import os
+import re
+
+YAML_EXTENSIONS = ('.yaml', '.yml')
+
+# pre-serialized definitions, e.g. generated ones; other JSON files such as
+# package.json or the shard summaries written by --shard are not definitions
+JSON_EXTENSIONS = ('.eppo.json', '.eppo.jsonl')
+
+DEFINITION_EXTENSIONS = YAML_EXTENSIONS + JSON_EXTENSIONS
+
+# directories that can never hold metric definitions; pruned before descending
+PRUNED_DIRECTORIES = frozenset([
+    '.git',
+    '.hg',
+    '.svn',
+    'node_modules',
+    'target',
+    'dbt_packages',
+    '.venv',
+    'venv',
+    '__pycache__',
+    '.tox',
+    '.nox',
+    '.mypy_cache',
+    '.pytest_cache',
+])
+
+IGNORE_FILE_NAMES = ('.gitignore', '.eppoignore')
+
+# dbt's own configuration files, found next to property files in a dbt
+# project; never definitions, although dbt_project.yml has a `models` key
+DBT_CONFIG_FILE_NAMES = frozenset([
+    'dbt_project.yml',
+    'packages.yml',
+    'dependencies.yml',
+    'profiles.yml',
+    'selectors.yml',
+])
+
+
+def glob_to_regex(pattern):
+    """
+    Translate a gitignore-style glob into a compiled regular expression
+    matched against '/'-separated relative paths.
+
+    `*` and `?` never match '/', `**` matches across directories.
+    """
+    i, n = 0, len(pattern)
+    regex = ''
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern[i:i + 3] == '**/':
+                regex += '(?:.*/)?'
+                i += 3
+                continue
+            if pattern[i:i + 2] == '**':
+                regex += '.*'
+                i += 2
+                continue
+            regex += '[^/]*'
+        elif c == '?':
+            regex += '[^/]'
+        elif c == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                regex += re.escape(c)
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                regex += '[' + body.replace('\\', '\\\\') + ']'
+                i = end
+        else:
+            regex += re.escape(c)
+        i += 1
+    return re.compile(regex + r'\Z')
+
+
+def compile_path_glob(pattern):
+    # like .gitignore, a pattern with a leading or inner slash is anchored
+    # to the directory and any other pattern matches at any depth
+    anchored = '/' in pattern.rstrip('/')
+    pattern = pattern.strip('/')
+    if not anchored:
+        pattern = '**/' + pattern
+    return glob_to_regex(pattern)
+
+
+class IgnoreRules:
+    """
+    The rules of a single .gitignore/.eppoignore file, relative to the
+    directory containing it.
+    """
+
+    def __init__(self, base, lines):
+        self.base = base
+        self.rules = []
+        for line in lines:
+            line = line.rstrip('\n').rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            directory_only = line.endswith('/')
+            line = line.rstrip('/')
+            # patterns with a leading or inner slash are anchored to the ignore file's directory
+            anchored = '/' in line
+            line = line.lstrip('/')
+            if not line:
+                continue
+            if not anchored:
+                line = '**/' + line
+            self.rules.append((glob_to_regex(line), negate, directory_only))
+
+    @classmethod
+    def from_file(cls, base, path):
+        try:
+            with open(path) as ignore_file:
+                return cls(base, ignore_file.readlines())
+        except OSError:
+            return None
+
+    def match(self, path, is_dir):
+        """
+        Return True/False if a rule decides the path, None if no rule applies.
+        """
+        relative = os.path.relpath(path, self.base).replace(os.sep, '/')
+        if relative.startswith('..'):
+            return None
+        decision = None
+        for regex, negate, directory_only in self.rules:
+            if directory_only and not is_dir:
+                continue
+            if regex.match(relative):
+                decision = not negate
+        return decision
+
+
+class DiscoveryResult:
+    def __init__(self):
+        self.files = []
+        self.considered = 0
+        self.skipped = 0
+        self.pruned_directories = 0
+
+    def summary(self):
+        return (
+            f"Discovered {len(self.files)} definition file(s): "
+            f"{self.considered} considered, {self.skipped} skipped, "
+            f"{self.pruned_directories} director(ies) pruned"
+        )
+
+
+def _ancestor_ignore_rules(directory, respect_gitignore):
+    """
+    Load .gitignore files from the parents of `directory` up to the
+    enclosing git work tree, so repository-wide rules still apply when
+    only a subdirectory is scanned.
+    """
+    rules = []
+    if not respect_gitignore:
+        return rules
+    current = os.path.abspath(directory)
+    while not os.path.exists(os.path.join(current, '.git')):
+        parent = os.path.dirname(current)
+        if parent == current:
+            # not inside a git work tree
+            return []
+        current = parent
+        loaded = IgnoreRules.from_file(current, os.path.join(current, '.gitignore'))
+        if loaded:
+            rules.insert(0, loaded)
+    return rules
+
+
+def _is_ignored(path, is_dir, rules):
+    ignored = False
+    for rule_set in rules:
+        decision = rule_set.match(path, is_dir)
+        if decision is not None:
+            ignored = decision
+    return ignored
+
+
+def discover_files(
+        directory,
+        include=None,
+        exclude=None,
+        extensions=DEFINITION_EXTENSIONS,
+        respect_gitignore=True
+):
+    """
+    Walk `directory` with os.scandir and return a DiscoveryResult listing
+    definition files in a deterministic order.
+
+    Directories in PRUNED_DIRECTORIES, matching an `exclude` glob or
+    ignored by a .gitignore/.eppoignore are pruned before descending, and
+    dbt configuration files (DBT_CONFIG_FILE_NAMES) are skipped. A
+    directory in PRUNED_DIRECTORIES is still walked if an `include` glob
+    names it, e.g. 'target/**'.
+    Files are kept if they have one of `extensions`, match at least one
+    `include` glob (when given) and are neither excluded nor ignored.
+    Globs are matched against paths relative to `directory`; a glob
+    without a slash matches file or directory names at any depth.
+    """
+    # the built-in pruned directories that an include glob names explicitly
+    included_pruned = PRUNED_DIRECTORIES.intersection(part for p in include or [] for part in p.split('/'))
+    include = [compile_path_glob(p) for p in include or []]
+    exclude = [compile_path_glob(p) for p in exclude or []]
+    ignore_file_names = IGNORE_FILE_NAMES if respect_gitignore else ('.eppoignore',)
+    root = os.path.abspath(directory)
+    result = DiscoveryResult()
+
+    def excluded(relative, is_dir):
+        candidates = (relative, relative + '/') if is_dir else (relative,)
+        return any(r.match(c) for r in exclude for c in candidates)
+
+    def walk(current, rules):
+        for name in ignore_file_names:
+            loaded = IgnoreRules.from_file(current, os.path.join(current, name))
+            if loaded:
+                rules = rules + [loaded]
+
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            return
+
+        subdirectories = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                relative = os.path.relpath(entry.path, root).replace(os.sep, '/')
+                if (
+                        (entry.name in PRUNED_DIRECTORIES and entry.name not in included_pruned)
+                        or excluded(relative, True)
+                        or _is_ignored(entry.path, True, rules)
+                ):
+                    result.pruned_directories += 1
+                else:
+                    subdirectories.append(entry.path)
+            elif entry.name.endswith(extensions) and entry.is_file():
+                result.considered += 1
+                relative = os.path.relpath(entry.path, root).replace(os.sep, '/')
+                if (
+                        entry.name in DBT_CONFIG_FILE_NAMES
+                        or (include and not any(r.match(relative) for r in include))
+                        or excluded(relative, False)
+                        or _is_ignored(entry.path, False, rules)
+                ):
+                    result.skipped += 1
+                else:
+                    result.files.append(os.path.join(directory, os.path.relpath(entry.path, root)))
+
+        for subdirectory in subdirectories:
+            walk(subdirectory, rules)
+
+    walk(root, _ancestor_ignore_rules(root, respect_gitignore))
+    return result
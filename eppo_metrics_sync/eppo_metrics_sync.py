@@ -1,21 +1,43 @@
-import json
-import jsonschema
 import os
-import requests
-
-from eppo_metrics_sync.validation import (
-    unique_names,
-    valid_fact_references,
-    metric_aggregation_is_valid,
-    valid_guardrail_cutoff_signs,
-    valid_experiment_computation
-)
 
+from eppo_metrics_sync.validation import RULES
+
+from eppo_metrics_sync.api import (
+    API_ENDPOINT,
+    attach_reference_url,
+    determine_sync_tag,
+    fetch_definitions,
+    sync_definitions
+)
+from eppo_metrics_sync.bundle import write_bundle
 from eppo_metrics_sync.dbt_model_parser import DbtModelParser
-from eppo_metrics_sync.helper import load_yaml
+from eppo_metrics_sync.discovery import DEFINITION_EXTENSIONS, YAML_EXTENSIONS, discover_files
+from eppo_metrics_sync.git import changed_files
+from eppo_metrics_sync.helper import load_documents, load_yaml
+from eppo_metrics_sync.includes import IncludeError, IncludeResolver
+from eppo_metrics_sync.index import MetricsIndex, object_hash, relative_key
+from eppo_metrics_sync.instrumentation import NULL_RECORDER
+from eppo_metrics_sync.limits import DEFAULT_LIMITS, ResourceLimitError
+from eppo_metrics_sync.parallel_yaml import ParallelYamlLoader
+from eppo_metrics_sync.plan import diff_definitions
+from eppo_metrics_sync.results import NULL_RESULTS
+from eppo_metrics_sync.schema_validation import ObjectErrorCache, bundled_schema_validator
+from eppo_metrics_sync.sharding import SUMMARY_FORMAT, SUMMARY_VERSION, files_fingerprint, shard_of
+from eppo_metrics_sync.snapshot import RepositorySnapshot
+from eppo_metrics_sync.summary import CrossFileView, summarize
+from eppo_metrics_sync.templates import MetricTemplate, TemplateError
+
+# 'mixed' reads eppo definitions and dbt property files side by side
+SCHEMA_TYPES = ('eppo', 'dbt-model', 'mixed')
+
+# the lists of an eppo document whose items are validated one by one, and
+# how their items are named in error messages
+DOCUMENT_OBJECTS = (
+    ('fact_sources', 'Fact source'),
+    ('metrics', 'Metric'),
+    ('metric_templates', 'Metric template'),
+)
 
-host = os.getenv('EPPO_API_HOST', 'https://eppo.cloud')
-API_ENDPOINT = f'{host}/api/v1/metrics/sync'
 
 class EppoMetricsSync:
     def __init__(
@@ -24,7 +46,18 @@ class EppoMetricsSync:
             schema_type='eppo',
             dbt_model_prefix=None,
             sync_prefix=None,
-            allow_upgrades=False
+            allow_upgrades=False,
+            include=None,
+            exclude=None,
+            changed_since=None,
+            index_path=None,
+            recorder=NULL_RECORDER,
+            coordinator=None,
+            shard=None,
+            results=NULL_RESULTS,
+            fail_fast=False,
+            parse_workers=None,
+            yaml_limits=DEFAULT_LIMITS
     ):
         self.directory = directory
         self.fact_sources = []
@@ -34,15 +67,38 @@ class EppoMetricsSync:
         self.dbt_model_prefix = dbt_model_prefix
         self.sync_prefix = sync_prefix
         self.allow_upgrades = allow_upgrades
+        self.include = include
+        self.exclude = exclude
+        self.changed_since = changed_since
+        self.index_path = index_path
+        self.recorder = recorder
+        self.coordinator = coordinator
+        # (i, n): only read and validate the i-th of n partitions of the files
+        self.shard = shard
+        # where results are streamed to as they are found (see results.py)
+        self.results = results
+        # stop reading and validating at the first error
+        self.fail_fast = fail_fast
+        self.stopped = False
+        self.files_fingerprint = None
+        self.discovery = None
+        # summaries of objects defined in files that were not fully loaded
+        self.reference_fact_sources = []
+        self.reference_metrics = []
+        # files crossing one of these are skipped (see limits.py)
+        self.yaml_limits = yaml_limits
+        # shared by every file read, so each included fragment is parsed once
+        self.includes = IncludeResolver(yaml_limits, root=directory)
+        # parses very large YAML files in chunks, with a worker per CPU by default
+        self.parallel_yaml = ParallelYamlLoader(workers=parse_workers, limits=yaml_limits)
 
         # temporary: ideally would pull this from Eppo API
-        package_root = os.path.dirname(os.path.abspath(__file__))
-        schema_path = os.path.join(package_root, 'schema', 'eppo_metric_schema.json')
-        with open(schema_path) as schema_file:
-            self.schema = json.load(schema_file)
+        self.schema_validator = bundled_schema_validator()
+        self.schema = self.schema_validator.schema
+        self.object_errors = ObjectErrorCache()
 
     def load_eppo_yaml(self, path):
-        yaml_data = load_yaml(path)
+        yaml_data = load_yaml(path, self.yaml_limits)
         if 'fact_sources' in yaml_data:
             self.fact_sources.extend(yaml_data['fact_sources'])
         if 'metrics' in yaml_data:
@@ -51,7 +107,7 @@ class EppoMetricsSync:
     def load_dbt_yaml(self, path):
         if not self.dbt_model_prefix:
             raise ValueError('Must specify dbt_model_prefix when schema_type=dbt-model')
-        yaml_data = load_yaml(path)
+        yaml_data = load_yaml(path, self.yaml_limits)
         models = yaml_data.get('models')
         if models:
             for model in models:
@@ -59,46 +115,380 @@ class EppoMetricsSync:
                 if dbt_model_parser:
                     self.fact_sources.append(dbt_model_parser)
 
+    def load_reference_yaml(self, path):
+        """
+        Add name/reference summaries of the objects defined in a file
+        without schema validating it, for use by the cross-file rules.
+        """
+        self._add_reference_result(self._read_reference(path))
+
+    def _read_reference(self, path, documents=None):
+        """
+        Read the objects a file defines without schema validating them,
+        along with the files it includes from. `documents` are the parsed
+        documents of the file, if they were not read from `path`.
+        """
+        result = {'fact_sources': [], 'metrics': [], 'dependencies': []}
+        dependencies = set()
+        try:
+            if documents is None:
+                documents = load_documents(path, self.parallel_yaml, self.yaml_limits)
+            for yaml_data in documents:
+                try:
+                    yaml_data = self.includes.resolve(yaml_data, path, dependencies)
+                except IncludeError:
+                    continue
+                if isinstance(yaml_data, dict):
+                    self._read_reference_document(yaml_data, result)
+        except ValueError:
+            pass
+        result['dependencies'] = sorted(dependencies - {os.path.realpath(path)})
+        return result
+
+    def _document_schema_type(self, yaml_data):
+        """
+        The schema a document is read with. With schema_type='mixed',
+        documents with a list of dbt `models` are dbt property files and all
+        others eppo definitions; `models` of dbt_project.yml is a mapping.
+        """
+        if self.schema_type != 'mixed':
+            return self.schema_type
+        models = yaml_data.get('models') if isinstance(yaml_data, dict) else None
+        return 'dbt-model' if isinstance(models, list) else 'eppo'
+
+    def _read_reference_document(self, yaml_data, result):
+        if self._document_schema_type(yaml_data) == 'dbt-model':
+            for model in yaml_data.get('models') or []:
+                try:
+                    fact_source = DbtModelParser(model, self.dbt_model_prefix).build()
+                except (AssertionError, ValueError):
+                    continue
+                if fact_source:
+                    result['fact_sources'].append(fact_source)
+        else:
+            result['fact_sources'].extend(yaml_data.get('fact_sources') or [])
+            result['metrics'].extend(yaml_data.get('metrics') or [])
+            for template in yaml_data.get('metric_templates') or []:
+                try:
+                    result['metrics'].extend(MetricTemplate(template['template'], template['parameters']))
+                except (KeyError, TypeError, AttributeError, TemplateError):
+                    continue
+
+    def _schema_error(self, data):
+        return self.schema_validator.error(data)
+
     def yaml_is_valid(self, yaml_path):
         """
         Validate a single YAML file against the schema
 
         """
-        data = load_yaml(yaml_path)
-        try:
-            jsonschema.validate(data, self.schema)
+        error = self._schema_error(load_yaml(yaml_path, self.yaml_limits))
+        if error is None:
             return {"passed": True}
-        except jsonschema.exceptions.ValidationError as e:
-            return {"passed": False, "error_message": e}
+        return {"passed": False, "error_message": error}
+
+    def read_file(self, path):
+        """
+        Parse and validate a single file without modifying this instance.
+
+        The documents of a `---` separated file (or the lines of a `.jsonl`
+        file) are validated and merged one at a time as they are parsed.
+        Returns a dict with the fact sources and metrics the file defines
+        and a list of (document number, schema error message) pairs; the
+        document number is None when the file holds a single document.
+        `$include`s are resolved first (see includes.py) and the real paths
+        of the included files are returned as 'dependencies'. With
+        schema_type='mixed', a document is read as a dbt property file if it
+        has `models` and as eppo definitions otherwise. A file crossing one
+        of the YAML limits defines nothing and has the reason as 'skipped'.
+        """
+        if self.schema_type not in SCHEMA_TYPES:
+            raise ValueError(f'Unexpected schema_type: {self.schema_type}')
+        if self.schema_type != 'eppo' and not self.dbt_model_prefix:
+            raise ValueError(f'Must specify dbt_model_prefix when schema_type={self.schema_type}')
+
+        result = {'fact_sources': [], 'metrics': [], 'errors': []}
+        dependencies = set()
+        document_count = 0
+        non_empty_count = 0
+        try:
+            documents = load_documents(path, self.parallel_yaml, self.yaml_limits)
+            for document_number, yaml_data in enumerate(documents, 1):
+                document_count = document_number
+                # empty documents, e.g. after a trailing `---`, define nothing
+                if yaml_data is None:
+                    continue
+                non_empty_count += 1
+                try:
+                    yaml_data = self.includes.resolve(yaml_data, path, dependencies)
+                except IncludeError as e:
+                    result['errors'].append((document_number, str(e)))
+                    continue
+                self._read_document(yaml_data, document_number, result)
+        except ResourceLimitError as e:
+            # the documents read before the limit was crossed are dropped too
+            return {'fact_sources': [], 'metrics': [], 'errors': [], 'dependencies': [], 'skipped': str(e)}
+
+        if non_empty_count == 0:
+            # an empty file is treated like a single empty document
+            self._read_document(None, None, result)
+        if document_count <= 1:
+            result['errors'] = [(None, message) for _, message in result['errors']]
+        result['dependencies'] = sorted(dependencies - {os.path.realpath(path)})
+
+        return result
+
+    def _read_document(self, yaml_data, document_number, result):
+        if self._document_schema_type(yaml_data) == 'eppo':
+            valid = self._valid_objects(yaml_data, document_number, result)
+            if valid is None:
+                return
+            result['fact_sources'].extend(obj for _, obj in valid['fact_sources'])
+            result['metrics'].extend(obj for _, obj in valid['metrics'])
+            for position, template in valid['metric_templates']:
+                self._expand_template(position, template, document_number, result)
+        else:
+            for model in yaml_data.get('models') or []:
+                fact_source = DbtModelParser(model, self.dbt_model_prefix).build()
+                if fact_source:
+                    result['fact_sources'].append(fact_source)
+
+    def _valid_objects(self, yaml_data, document_number, result):
+        """
+        Schema validate an eppo document one object at a time, so an invalid
+        metric does not discard its valid siblings. Returns
+        {list key: [(position, object)]} of the valid objects, or None if
+        the document itself, outside of its objects, is invalid.
+        """
+        keys = [key for key, _ in DOCUMENT_OBJECTS]
+        if self.schema_validator.compiled and self.schema_validator.is_valid(yaml_data):
+            # the generated code accepts a whole document faster than its
+            # objects can be hashed for the cache
+            return {key: list(enumerate(yaml_data.get(key, []), start=1)) for key in keys}
+        if not isinstance(yaml_data, dict) or not all(isinstance(yaml_data.get(key, []), list) for key in keys):
+            error = self._schema_error(yaml_data)
+            if error is not None:
+                result['errors'].append((document_number, str(error)))
+                return None
+        shell = {key: [] if key in keys else value for key, value in yaml_data.items()}
+        error = self._schema_error(shell)
+        if error is not None:
+            result['errors'].append((document_number, str(error)))
+            return None
+
+        valid = {}
+        for key, label in DOCUMENT_OBJECTS:
+            valid[key] = []
+            for position, obj in enumerate(yaml_data.get(key, []), start=1):
+                message = self._object_error(key, obj)
+                if message is None:
+                    valid[key].append((position, obj))
+                    continue
+                name = obj.get('name') if isinstance(obj, dict) else None
+                label_name = f' ({name})' if isinstance(name, str) else ''
+                result['errors'].append((document_number, f'{label} {position}{label_name}{message}'))
+        return valid
+
+    def _object_error(self, key, obj):
+        """
+        The schema error of one object of a document's `key` list, as
+        ' at <path>: <message>', or None if it is valid. Cached by content.
+        """
+        def compute():
+            error = self._schema_error({key: [obj]})
+            if error is None:
+                return None
+            location = '.'.join(str(p) for p in list(error.absolute_path)[2:])
+            return f"{f' at {location}' if location else ''}: {error.message}"
+
+        try:
+            content_key = (key, object_hash(obj))
+        except (TypeError, ValueError):
+            # e.g. dates or mixed key types, which JSON cannot encode
+            return compute()
+        return self.object_errors.get(content_key, compute)
+
+    def _expand_template(self, position, template, document_number, result):
+        """
+        Add the metrics generated by a metric template, unless the template
+        or one of its metrics is invalid.
+        """
+        try:
+            metric_template = MetricTemplate(template['template'], template['parameters'])
+        except TemplateError as e:
+            result['errors'].append((document_number, f'Metric template {position}: {e}'))
+            return
+
+        # sub-structures (e.g. aggregations) shared between variants are only
+        # validated with the first variant using them; the metric schema
+        # constrains each property on its own, so the optional ones that were
+        # already validated can be left out of later checks
+        required = set(self.schema['properties']['metrics']['items'].get('required', []))
+        validated = {}
+
+        metrics = []
+        for values, metric in metric_template.variants():
+            unvalidated = {
+                key: value for key, value in metric.items()
+                if key in required or id(value) not in validated
+            }
+            # validated as a one-metric document, so templates produce the
+            # same schema errors as metrics written out by hand
+            error = self._schema_error({'metrics': [unvalidated]})
+            if error is not None:
+                location = '.'.join(str(p) for p in list(error.absolute_path)[2:])
+                parameters = ', '.join(f'{name}={value}' for name, value in values.items())
+                result['errors'].append((
+                    document_number,
+                    f"Metric template {position} with {parameters}"
+                    f"{f' at {location}' if location else ''}: {error.message}"
+                ))
+                return
+            for value in metric.values():
+                if isinstance(value, (dict, list)):
+                    validated[id(value)] = value
+            metrics.append(metric)
+        result['metrics'].extend(metrics)
+
+    def _add_file_result(self, path, result):
+        errors = []
+        for document_number, message in result['errors']:
+            location = path if document_number is None else f"{path} (document {document_number})"
+            errors.append(f"Schema violation in {location}: \n{message}")
+        if result.get('skipped'):
+            errors.append(f"Skipped file: {result['skipped']}")
+        self.validation_errors.extend(errors)
+        self.fact_sources.extend(result['fact_sources'])
+        self.metrics.extend(result['metrics'])
+
+        if self.results.enabled:
+            relative_path = relative_key(self.directory, path)
+            self.results.emit(
+                'file',
+                path=relative_path,
+                fact_sources=len(result['fact_sources']),
+                metrics=len(result['metrics']),
+                errors=len(errors)
+            )
+        self._report_errors('schema', errors, path=path)
+
+    def _report_errors(self, stage, errors, path=None):
+        """
+        Stream newly found errors and, with fail_fast, stop the run at the
+        first one.
+        """
+        if self.results.enabled:
+            for message in errors:
+                fields = {'stage': stage}
+                if path is not None:
+                    fields['path'] = relative_key(self.directory, path)
+                self.results.emit('error', message=message, **fields)
+        if errors and self.fail_fast:
+            self.stopped = True
+            error_message = f"Stopped at the first failure with {len(self.validation_errors)} error(s): \n"
+            error_message += '\n'.join(self.validation_errors)
+            raise ValueError(error_message)
+
+    def emit_summary(self, passed):
+        """
+        Stream the final result of a run.
+        """
+        self.results.emit(
+            'summary',
+            passed=passed,
+            stopped=self.stopped,
+            files=len(self.discovery.files) if self.discovery is not None else 0,
+            fact_sources=len(self.fact_sources),
+            metrics=len(self.metrics),
+            errors=len(self.validation_errors)
+        )
+
+    def _add_reference_result(self, result):
+        summary = summarize(result['fact_sources'], result['metrics'])
+        self.reference_fact_sources.extend(summary['fact_sources'])
+        self.reference_metrics.extend(summary['metrics'])
 
     def read_yaml_files(self):
-        # Recursively scan the directory for YAML files and load valid ones
-        for root, _, files in os.walk(self.directory):
-            for file in files:
-                if file.endswith(".yaml") or file.endswith(".yml"):
+        # Recursively scan the directory for YAML and JSON files and load valid ones
+        with self.recorder.span('discovery'):
+            self.discovery = discover_files(
+                self.directory,
+                include=self.include,
+                exclude=self.exclude,
+                # dbt schema files are always YAML
+                extensions=YAML_EXTENSIONS if self.schema_type == 'dbt-model' else DEFINITION_EXTENSIONS
+            )
+        print(self.discovery.summary())
 
-                    yaml_path = os.path.join(root, file)
+        files = self.discovery.files
+        if self.shard is not None:
+            files = self._shard_files(files)
+        self.recorder.set('files', len(files))
 
-                    if self.schema_type == 'eppo':
-                        valid = self.yaml_is_valid(yaml_path)
-                        if valid['passed']:
-                            self.load_eppo_yaml(yaml_path)
-                        else:
-                            self.validation_errors.append(
-                                f"Schema violation in {yaml_path}: \n{valid['error_message']}"
-                            )
+        changed = None
+        if self.changed_since is not None:
+            changed = changed_files(self.directory, self.changed_since)
 
-                    elif self.schema_type == 'dbt-model':
-                        self.load_dbt_yaml(yaml_path)
+        index = None
+        read_file = self.read_file
+        if self.index_path is not None:
+            index = MetricsIndex(self.index_path)
+            index.prepare(self)
+            read_file = lambda path: index.read(self, path)
 
+        changed_count = 0
+        try:
+            with self.recorder.span('parse'):
+                for yaml_path in files:
+                    if changed is None or os.path.realpath(yaml_path) in changed:
+                        changed_count += 1
+                        self._add_file_result(yaml_path, read_file(yaml_path))
+                        continue
+
+                    result = read_file(yaml_path) if index is not None else self._read_reference(yaml_path)
+                    if changed.isdisjoint(result['dependencies']):
+                        self._add_reference_result(result)
                     else:
-                        raise ValueError(f'Unexpected schema_type: {self.schema_type}')
+                        # unchanged, but includes a changed fragment
+                        changed_count += 1
+                        self._add_file_result(
+                            yaml_path, result if index is not None else read_file(yaml_path)
+                        )
+
+            if index is not None:
+                removed = index.prune(self, files) if self.shard is None else 0
+                index.save_object_errors(self.object_errors, prune=self.shard is None)
+                print(
+                    f"Index {self.index_path}: {index.reparsed} file(s) parsed, "
+                    f"{index.reused} reused, {removed} removed"
+                )
+        finally:
+            if index is not None:
+                index.close()
+            self.parallel_yaml.close()
+
+        if changed is not None:
+            print(
+                f"{changed_count} file(s) changed since {self.changed_since}, "
+                f"{len(files) - changed_count} unchanged file(s) summarized"
+            )
+            if changed_count == 0:
+                return
 
-        if len(self.fact_sources) == 0 and len(self.metrics) == 0:
+        # a shard may legitimately hold no definitions
+        if len(self.fact_sources) == 0 and len(self.metrics) == 0 and self.shard is None:
             raise ValueError(
                 'No valid yaml files found. ' + ', '.join(self.validation_errors)
             )
 
+    def _shard_files(self, files):
+        index, count = self.shard
+        relative_paths = {path: relative_key(self.directory, path) for path in files}
+        self.files_fingerprint = files_fingerprint(relative_paths.values())
+        shard_files = [path for path in files if shard_of(relative_paths[path], count) == index]
+        print(f"Shard {index}/{count}: {len(shard_files)} of {len(files)} file(s)")
+        return shard_files
+
     def _add_sync_prefix(self):
         for source in self.fact_sources:
             source['name'] = f"[{self.sync_prefix}] {source['name']}"
@@ -106,17 +496,38 @@ class EppoMetricsSync:
         for metric in self.metrics:
             metric['name'] = f"[{self.sync_prefix}] {metric['name']}"
 
+    def _cross_file_view(self):
+        if not self.reference_fact_sources and not self.reference_metrics:
+            return self
+        return CrossFileView(
+            self.fact_sources + self.reference_fact_sources,
+            self.metrics + self.reference_metrics,
+            self.validation_errors
+        )
+
     def validate(self):
 
-        if len(self.fact_sources) == 0 and len(self.metrics) == 0:
+        # with changed_since, a change may only remove definitions, which the
+        # cross-file rules still need to check against the unchanged files
+        if len(self.fact_sources) == 0 and len(self.metrics) == 0 \
+                and self.changed_since is None and self.shard is None:
             raise ValueError('No fact sources or metrics found, did you call eppo_metrics.read_yaml_files()?')
 
-        unique_names(self)
-        valid_fact_references(self)
-        metric_aggregation_is_valid(self)
-        valid_guardrail_cutoff_signs(self)
-        valid_experiment_computation(self)
-
+        # rules that compare objects across files also see summaries of
+        # objects that were not loaded (e.g. unchanged files with changed_since);
+        # a shard leaves them to the merge of all shard summaries
+        with self.recorder.span('validate'):
+            cross_file = self._cross_file_view()
+            for rule, check, across_files in RULES:
+                if across_files and self.shard is not None:
+                    continue
+                error_count = len(self.validation_errors)
+                check(cross_file if across_files else self)
+                self._report_errors(rule, self.validation_errors[error_count:])
+
+        self.recorder.set('fact_sources', len(self.fact_sources))
+        self.recorder.set('metrics', len(self.metrics))
+        self.recorder.set('validation_errors', len(self.validation_errors))
         if self.validation_errors:
             error_count = len(self.validation_errors)
             error_message = f"Validation failed with {error_count} error(s): \n"
@@ -125,23 +536,52 @@ class EppoMetricsSync:
 
         return True
 
-    def _determine_sync_tag(self):
-        if self.sync_prefix is not None:
-            return self.sync_prefix
+    def snapshot(self):
+        """
+        An immutable RepositorySnapshot of the definitions read so far,
+        which can be validated and synced from several threads at once
+        (see snapshot.py).
+        """
+        return RepositorySnapshot(self.fact_sources, self.metrics, self.validation_errors)
 
-        return os.getenv('EPPO_SYNC_TAG')
+    def shard_summary(self):
+        """
+        The summary of a shard's definitions and validation errors that the
+        merge command combines.
+        """
+        index, count = self.shard
+        summary = summarize(self.fact_sources, self.metrics)
+        return {
+            'format': SUMMARY_FORMAT,
+            'version': SUMMARY_VERSION,
+            'shard': index,
+            'shard_count': count,
+            'files_fingerprint': self.files_fingerprint,
+            'schema_type': self.schema_type,
+            'fact_sources': summary['fact_sources'],
+            'metrics': summary['metrics'],
+            'validation_errors': list(self.validation_errors),
+        }
+
+    def _determine_sync_tag(self):
+        return determine_sync_tag(self.sync_prefix)
 
     def _attach_reference_url(self, payload):
         """
         Optionally attach reference url to the payload if one exists
         """
+        return attach_reference_url(payload)
 
-        reference_url = os.getenv('EPPO_REFERENCE_URL')
-        if not reference_url:
-            return payload
-        
-        payload["reference_url"] = reference_url
-        return payload
+    def build_bundle(self, path):
+        """
+        Read and validate the definitions and write them to a payload
+        bundle that can later be synced without the source tree.
+        """
+        self.read_yaml_files()
+        if self.sync_prefix is not None:
+            self._add_sync_prefix()
+        self.validate()
+        return write_bundle(path, self.fact_sources, self.metrics, self.sync_prefix)
 
     def sync(self):
         self.read_yaml_files()
@@ -149,27 +589,56 @@ class EppoMetricsSync:
             self._add_sync_prefix()
         self.validate()
 
-        api_key = os.getenv('EPPO_API_KEY')
-        if not api_key:
-            raise Exception('EPPO_API_KEY not set in environment variables. Please set and try again')
-
-        sync_tag = self._determine_sync_tag()
-        if not sync_tag:
-            raise Exception('EPPO_SYNC_TAG not set in environment variables. Please set and try again')
-
-        headers = {"X-Eppo-Token": api_key}
-        payload = {
-            "sync_tag": sync_tag,
-            "fact_sources": self.fact_sources,
-            "metrics": self.metrics
-        }
-        payload = self._attach_reference_url(payload)
-
-        response = requests.post(f'{API_ENDPOINT}{"?allow_upgrades=true" if self.allow_upgrades else ""}', json=payload, headers=headers)
+        return self._sync_definitions()
+
+    def _sync_definitions(self):
+        if self.coordinator is not None:
+            # imported here as only coordinated syncs need it
+            from eppo_metrics_sync.coordination import coordinated_sync
+            return coordinated_sync(
+                self.coordinator,
+                self.fact_sources,
+                self.metrics,
+                sync_prefix=self.sync_prefix,
+                allow_upgrades=self.allow_upgrades,
+                recorder=self.recorder
+            )
+        return sync_definitions(
+            self.fact_sources,
+            self.metrics,
+            sync_prefix=self.sync_prefix,
+            allow_upgrades=self.allow_upgrades,
+            recorder=self.recorder
+        )
+
+    def plan(self, cache_path=None):
+        """
+        Read and validate the definitions and diff them against what is
+        currently synced under the sync tag.
+        """
+        self.read_yaml_files()
+        if self.sync_prefix is not None:
+            self._add_sync_prefix()
+        self.validate()
 
-        if response.status_code < 400:
-            print('Metrics synced')
-        else:
-            raise Exception(f"Request failed {response.status_code}: {response.text}")
+        remote = fetch_definitions(self.sync_prefix, cache_path=cache_path, recorder=self.recorder)
+        with self.recorder.span('diff'):
+            return diff_definitions(
+                {'fact_sources': self.fact_sources, 'metrics': self.metrics},
+                remote
+            )
 
-        return response
+    def apply(self, cache_path=None):
+        """
+        Plan, then sync only if the plan has changes. Returns the plan.
+        """
+        plan = self.plan(cache_path=cache_path)
+        print(plan.format())
+        if not plan.has_changes:
+            print('No changes to sync')
+            return plan
+
+        # the sync endpoint replaces the whole sync tag, so unchanged objects
+        # are sent too; leaving them out would delete them
+        self._sync_definitions()
+        return plan
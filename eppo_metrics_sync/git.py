@@ -0,0 +1,139 @@
+import os
+import subprocess
+import threading
+
+
+def run_git(args, cwd):
+    result = subprocess.run(
+        ['git', *args],
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True
+    )
+    if result.returncode != 0:
+        raise ValueError(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+    return result.stdout
+
+
+def changed_files(directory, ref):
+    """
+    Return the set of real paths of files under `directory` that differ
+    between the merge base of `ref` and HEAD and the working tree,
+    including untracked files that are not ignored. Deleted files are
+    reported too; callers intersect the result with files that exist.
+    """
+    top_level = run_git(['rev-parse', '--show-toplevel'], directory).strip()
+    merge_base = run_git(['merge-base', ref, 'HEAD'], directory).strip()
+
+    diff = run_git(['diff', '--name-only', '--no-renames', '-z', merge_base, '--', '.'], directory)
+    untracked = run_git(
+        ['ls-files', '--others', '--exclude-standard', '--full-name', '-z', '--', '.'],
+        directory
+    )
+
+    return {
+        os.path.realpath(os.path.join(top_level, path))
+        for path in (diff + untracked).split('\0')
+        if path
+    }
+
+
+def tree_blobs(directory, revision, extensions):
+    """
+    Return {path: blob id} of the files under `directory` at `revision`
+    whose names end with one of `extensions`. Paths are relative to the
+    top level of the repository.
+    """
+    output = run_git(['ls-tree', '-r', '-z', '--full-name', revision, '--', '.'], directory)
+    blobs = {}
+    for record in output.split('\0'):
+        if not record:
+            continue
+        info, _, path = record.partition('\t')
+        _, object_type, object_id = info.split(' ')
+        if object_type == 'blob' and path.endswith(extensions):
+            blobs[path] = object_id
+    return blobs
+
+
+def files_containing(directory, revision, text):
+    """
+    Return the set of paths, relative to the top level of the repository,
+    of the files under `directory` at `revision` that contain `text`.
+    """
+    args = ['grep', '-l', '-z', '-F', '--full-name', text, revision, '--', '.']
+    result = subprocess.run(['git', *args], cwd=directory, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    # grep exits with 1 when nothing matches
+    if result.returncode not in (0, 1):
+        raise ValueError(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+    return {name.partition(':')[2] for name in result.stdout.split('\0') if name}
+
+
+class BlobReader:
+    """
+    Reads objects through a single `git cat-file --batch` process, so
+    reading many blobs costs one process rather than one per blob.
+    """
+
+    def __init__(self, directory):
+        self._process = subprocess.Popen(
+            ['git', 'cat-file', '--batch'],
+            cwd=directory,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def read(self, name):
+        """
+        The content of the blob `name` (an object id or `<revision>:<path>`)
+        as bytes, or None if there is no such blob.
+        """
+        return self.read_many([name])[name]
+
+    def read_many(self, names):
+        """
+        Return {name: content or None} for blobs requested in one batch.
+        """
+        names = list(names)
+        # written from another thread, so git never blocks on a full stdout
+        # while the names it has not read yet fill up its stdin
+        writer = threading.Thread(target=self._write, args=(names,))
+        writer.start()
+        try:
+            contents = [self._read_reply() for _ in names]
+        finally:
+            writer.join()
+        return dict(zip(names, contents))
+
+    def _write(self, names):
+        try:
+            self._process.stdin.write(''.join(f'{name}\n' for name in names).encode('utf-8'))
+            self._process.stdin.flush()
+        except BrokenPipeError:
+            pass
+
+    def _read_reply(self):
+        stdout = self._process.stdout
+        header = stdout.readline()
+        if not header:
+            raise ValueError('git cat-file --batch exited unexpectedly')
+        parts = header.split()
+        if len(parts) != 3:
+            # `<name> missing` or `<name> ambiguous`
+            return None
+        content = stdout.read(int(parts[2]))
+        stdout.read(1)
+        return content if parts[1] == b'blob' else None
+
+    def close(self):
+        self._process.stdin.close()
+        self._process.stdout.close()
+        self._process.wait()
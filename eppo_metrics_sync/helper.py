@@ -1,13 +1,125 @@
+import os
+
 import yaml
 
-def load_yaml(path):
+from eppo_metrics_sync.limits import DEFAULT_LIMITS, ResourceLimitError
+
+try:
+    # several times faster than the standard library on large files
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+JSON_EXTENSION = '.json'
+JSON_LINES_EXTENSION = '.jsonl'
+
+
+def load_yaml(path, limits=DEFAULT_LIMITS):
     try:
+        limits.check_file(path)
         with open(path, 'r') as file:
-            content = yaml.safe_load(file)
+            content = limits.load(file)
             return content
+    except ResourceLimitError:
+        raise
     except yaml.YAMLError as e:
         raise ValueError(f"Error loading YAML file '{path}': {e}")
     except Exception as e:
         raise ValueError(f"Unexpected error loading file '{path}': {e}")
 
 
+def load_yaml_documents(path, parallel=None, limits=DEFAULT_LIMITS):
+    """
+    Lazily yield the documents of a `---` separated YAML file with
+    safe_load_all semantics. Each document is parsed only when the
+    previous one has been consumed, so memory is bounded by the largest
+    document rather than the file. Files `parallel` (a ParallelYamlLoader)
+    accepts are parsed in chunks by its workers if they can be split.
+    Raises ResourceLimitError when the file crosses one of `limits`.
+    """
+    document_number = 0
+    try:
+        limits.check_file(path)
+        if parallel is not None and parallel.accepts(path):
+            parsed, document = parallel.load(path)
+            if parsed:
+                yield document
+                return
+        with open(path, 'r') as file:
+            for document in limits.load_all(file):
+                document_number += 1
+                yield document
+    except ResourceLimitError:
+        raise
+    except yaml.YAMLError as e:
+        raise ValueError(
+            f"Error loading YAML file '{path}' (document {document_number + 1}): {e}"
+        )
+    except Exception as e:
+        raise ValueError(f"Unexpected error loading file '{path}': {e}")
+
+
+def load_json_documents(path, limits=DEFAULT_LIMITS):
+    """
+    Yield the document of a `.json` file, or one document per line of a
+    newline-delimited `.jsonl` file (None for blank lines), so document
+    numbers are line numbers. The file size and nesting depth of `limits`
+    apply, the depth being checked before a document is decoded.
+    """
+    json_lines = path.endswith(JSON_LINES_EXTENSION)
+    line_number = 0
+    try:
+        limits.check_file(path)
+        with open(path, 'rb') as file:
+            if not json_lines:
+                content = file.read()
+                limits.check_json_depth(content, path)
+                yield json_loads(content) if content.strip() else None
+                return
+            for line_number, line in enumerate(file, 1):
+                limits.check_json_depth(line, path, line_number - 1)
+                yield json_loads(line) if line.strip() else None
+    except ResourceLimitError:
+        raise
+    except ValueError as e:
+        # the decode errors of both json and orjson are ValueErrors
+        location = f' (line {line_number})' if json_lines else ''
+        raise ValueError(f"Error loading JSON file '{path}'{location}: {e}")
+    except Exception as e:
+        raise ValueError(f"Unexpected error loading file '{path}': {e}")
+
+
+def load_documents(path, parallel=None, limits=DEFAULT_LIMITS):
+    """
+    Lazily yield the documents of a definition file, parsing JSON files
+    with the JSON parser and anything else as YAML.
+    """
+    extension = os.path.splitext(path)[1]
+    if extension in (JSON_EXTENSION, JSON_LINES_EXTENSION):
+        return load_json_documents(path, limits)
+    return load_yaml_documents(path, parallel, limits)
+
+
+def parse_documents(content, path, limits=DEFAULT_LIMITS):
+    """
+    Return the documents of a definition file's content, given as bytes,
+    as load_documents would yield them. `path` picks the parser and names
+    the file in errors.
+    """
+    limits.check_size(len(content), path)
+    extension = os.path.splitext(path)[1]
+    if extension in (JSON_EXTENSION, JSON_LINES_EXTENSION):
+        lines = content.splitlines() if extension == JSON_LINES_EXTENSION else [content]
+        documents = []
+        for line_number, line in enumerate(lines, 1):
+            limits.check_json_depth(line, path, line_number - 1 if extension == JSON_LINES_EXTENSION else 0)
+            try:
+                documents.append(json_loads(line) if line.strip() else None)
+            except ValueError as e:
+                location = f' (line {line_number})' if extension == JSON_LINES_EXTENSION else ''
+                raise ValueError(f"Error loading JSON file '{path}'{location}: {e}")
+        return documents
+    try:
+        return list(limits.load_all(content.decode('utf-8'), name=path))
+    except (yaml.YAMLError, UnicodeDecodeError) as e:
+        raise ValueError(f"Error loading YAML file '{path}': {e}")
@@ -0,0 +1,144 @@
+"""
+Includes of shared fragments from other files.
+
+A mapping with an `$include` key is replaced by the value it references:
+
+    entities:
+      $include: common/entities.yaml#user
+
+The path is relative to the including file. The optional fragment after
+`#` is a `/` separated path of keys (or list indexes) into the included
+file; without it the whole file is included. Any other keys of the
+including mapping are merged over an included mapping:
+
+    numerator:
+      $include: common/aggregations.yaml#winsorized_sum
+      fact_name: revenue
+
+Only files inside the resolver's root, the definitions directory, can be
+included, so a definition cannot pull other files of the host into the
+synced payload. Included files may include others. Every file is parsed once and every
+fragment resolved once per resolver; each inclusion gets its own copy, so
+definitions never share objects. The files a document depends on are
+reported, so caches can be invalidated when a fragment changes.
+"""
+import copy
+import os
+
+from eppo_metrics_sync.helper import load_yaml
+from eppo_metrics_sync.limits import DEFAULT_LIMITS
+
+INCLUDE_KEY = '$include'
+
+
+class IncludeError(ValueError):
+    pass
+
+
+class IncludeResolver:
+    def __init__(self, limits=DEFAULT_LIMITS, root=None):
+        # included files are loaded under the same limits as definition files
+        self.limits = limits
+        # files outside this directory cannot be included (None allows any)
+        self.root = None if root is None else os.path.realpath(root)
+        # realpath -> parsed content, or the ValueError raised parsing it
+        self._files = {}
+        # (realpath, fragment) -> (resolved value, dependencies)
+        self._fragments = {}
+
+    def resolve(self, data, path, dependencies):
+        """
+        Return `data`, read from `path`, with its includes replaced. The
+        real paths of the files it depends on are added to `dependencies`,
+        also when an IncludeError is raised.
+        """
+        if not _has_include(data):
+            return data
+        return self._resolve(data, os.path.dirname(os.path.realpath(path)), (), dependencies)
+
+    def _resolve(self, node, base, stack, dependencies):
+        if isinstance(node, dict):
+            if INCLUDE_KEY in node:
+                value = copy.deepcopy(self._fragment(base, node[INCLUDE_KEY], stack, dependencies))
+                overrides = {k: v for k, v in node.items() if k != INCLUDE_KEY}
+                if overrides:
+                    if not isinstance(value, dict):
+                        raise IncludeError(
+                            f"Cannot merge keys into '{node[INCLUDE_KEY]}', which is not a mapping"
+                        )
+                    value.update(self._resolve(overrides, base, stack, dependencies))
+                return value
+            return {k: self._resolve(v, base, stack, dependencies) for k, v in node.items()}
+        if isinstance(node, list):
+            return [self._resolve(v, base, stack, dependencies) for v in node]
+        return node
+
+    def _is_file(self, realpath):
+        return os.path.isfile(realpath)
+
+    def _read_file(self, realpath):
+        return load_yaml(realpath, self.limits)
+
+    def _load(self, realpath):
+        if realpath not in self._files:
+            try:
+                self._files[realpath] = self._read_file(realpath)
+            except ValueError as e:
+                self._files[realpath] = e
+        content = self._files[realpath]
+        if isinstance(content, ValueError):
+            raise IncludeError(str(content))
+        return content
+
+    def _fragment(self, base, reference, stack, dependencies):
+        if not isinstance(reference, str) or not reference.partition('#')[0]:
+            raise IncludeError(f'Invalid {INCLUDE_KEY} {reference!r}, expected a path with an optional #fragment')
+        file_part, _, fragment = reference.partition('#')
+        realpath = os.path.realpath(os.path.join(base, file_part))
+        if self.root is not None and os.path.commonpath([self.root, realpath]) != self.root:
+            raise IncludeError(f"Included file '{file_part}' is outside of '{self.root}'")
+        key = (realpath, fragment)
+
+        if key in stack:
+            cycle = [*stack[stack.index(key):], key]
+            raise IncludeError('Include cycle: ' + ' -> '.join(_describe(k) for k in cycle))
+        if key in self._fragments:
+            value, fragment_dependencies = self._fragments[key]
+            dependencies.update(fragment_dependencies)
+            return value
+
+        fragment_dependencies = {realpath}
+        try:
+            if not self._is_file(realpath):
+                raise IncludeError(f"Included file '{file_part}' not found")
+            value = self._load(realpath)
+            fragment_base = os.path.dirname(realpath)
+            for part in fragment.split('/') if fragment else []:
+                if isinstance(value, dict) and INCLUDE_KEY in value:
+                    value = self._resolve(value, fragment_base, stack + (key,), fragment_dependencies)
+                if isinstance(value, dict) and part in value:
+                    value = value[part]
+                elif isinstance(value, list) and part.isdigit() and int(part) < len(value):
+                    value = value[int(part)]
+                else:
+                    raise IncludeError(f"Fragment '{fragment}' not found in '{file_part}'")
+            value = self._resolve(value, fragment_base, stack + (key,), fragment_dependencies)
+        finally:
+            dependencies.update(fragment_dependencies)
+
+        self._fragments[key] = (value, frozenset(fragment_dependencies))
+        return value
+
+
+def _has_include(node):
+    if isinstance(node, dict):
+        return INCLUDE_KEY in node or any(_has_include(v) for v in node.values())
+    if isinstance(node, list):
+        return any(_has_include(v) for v in node)
+    return False
+
+
+def _describe(key):
+    realpath, fragment = key
+    path = os.path.relpath(realpath)
+    return f'{path}#{fragment}' if fragment else path
@@ -0,0 +1,360 @@
+"""
+A persistent SQLite index of a metrics repository.
+
+The index records, per definition file, its content hash, the fact
+sources and metrics it defines, the fact references of those metrics and
+its schema errors, if any, as well as the hashes of the files it includes
+from. Later runs only reparse files whose content or included files
+changed, and lookups are answered without parsing any YAML. The schema
+errors of single objects are kept by content hash, so only the edited
+objects of a changed file are validated again.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+
+INDEX_VERSION = 4
+
+TABLES = """
+create table if not exists meta (
+    key text primary key,
+    value text
+);
+create table if not exists files (
+    path text primary key,
+    sha256 text not null,
+    size integer not null,
+    mtime_ns integer not null,
+    errors text not null
+);
+create table if not exists objects (
+    kind text not null,
+    name text,
+    path text not null,
+    position integer not null,
+    sha256 text not null,
+    body text not null
+);
+create index if not exists objects_by_path on objects (path);
+create index if not exists objects_by_name on objects (name);
+create table if not exists facts (
+    name text,
+    fact_source text,
+    path text not null
+);
+create index if not exists facts_by_path on facts (path);
+create index if not exists facts_by_name on facts (name);
+create table if not exists fact_references (
+    metric text,
+    fact text,
+    role text not null,
+    aggregation text,
+    path text not null
+);
+create index if not exists fact_references_by_path on fact_references (path);
+create index if not exists fact_references_by_fact on fact_references (fact);
+create table if not exists dependencies (
+    path text not null,
+    dependency text not null,
+    sha256 text,
+    size integer,
+    mtime_ns integer
+);
+create index if not exists dependencies_by_path on dependencies (path);
+create table if not exists object_errors (
+    kind text not null,
+    sha256 text not null,
+    message text,
+    primary key (kind, sha256)
+);
+create table if not exists diagnostics (
+    message text not null
+);
+"""
+
+TABLE_NAMES = (
+    'meta', 'files', 'objects', 'facts', 'fact_references', 'dependencies', 'object_errors', 'diagnostics'
+)
+
+
+def content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def object_hash(obj):
+    return content_hash(json.dumps(obj, sort_keys=True).encode('utf-8'))
+
+
+def tool_version():
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:
+        # python 3.7
+        return 'unknown'
+    try:
+        return version('eppo_metrics_sync')
+    except PackageNotFoundError:
+        return 'unknown'
+
+
+def index_fingerprint(eppo_metrics_sync):
+    """
+    Everything besides file content that changes how a file is parsed;
+    an index built with a different fingerprint is discarded.
+    """
+    return object_hash({
+        'tool_version': tool_version(),
+        'schema': eppo_metrics_sync.schema,
+        'schema_type': eppo_metrics_sync.schema_type,
+        'dbt_model_prefix': eppo_metrics_sync.dbt_model_prefix,
+        'yaml_limits': eppo_metrics_sync.yaml_limits.as_dict(),
+    })
+
+
+def file_state(path):
+    """
+    Return (sha256, size, mtime_ns) of a file, or Nones if it does not exist.
+    """
+    try:
+        stat = os.stat(path)
+        with open(path, 'rb') as f:
+            return content_hash(f.read()), stat.st_size, stat.st_mtime_ns
+    except OSError:
+        return None, None, None
+
+
+def _metric_fact_references(metric):
+    for role in ('numerator', 'denominator'):
+        if isinstance(metric.get(role), dict):
+            yield role, metric[role].get('fact_name'), metric[role].get('operation')
+    if isinstance(metric.get('percentile'), dict):
+        yield 'percentile', metric['percentile'].get('fact_name'), 'percentile'
+
+
+class MetricsIndex:
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        version = self.connection.execute('pragma user_version').fetchone()[0]
+        if version != INDEX_VERSION:
+            # the table layout changed, start over
+            for table in TABLE_NAMES:
+                self.connection.execute(f'drop table if exists {table}')
+            self.connection.execute(f'pragma user_version = {INDEX_VERSION}')
+        self.connection.executescript(TABLES)
+        self.reparsed = 0
+        self.reused = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    def _get_meta(self, key):
+        row = self.connection.execute('select value from meta where key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.connection.execute('insert or replace into meta (key, value) values (?, ?)', (key, value))
+
+    def clear(self):
+        for table in TABLE_NAMES:
+            self.connection.execute(f'delete from {table}')
+
+    def prepare(self, eppo_metrics_sync):
+        """
+        Discard the index if it was built for a different schema or
+        schema_type than `eppo_metrics_sync` uses.
+        """
+        fingerprint = index_fingerprint(eppo_metrics_sync)
+        if self._get_meta('fingerprint') != fingerprint:
+            self.clear()
+            self._set_meta('fingerprint', fingerprint)
+        eppo_metrics_sync.object_errors.results.update(
+            ((kind, sha256), message)
+            for kind, sha256, message in self.connection.execute('select kind, sha256, message from object_errors')
+        )
+
+    def read(self, eppo_metrics_sync, path):
+        """
+        Return the result of eppo_metrics_sync.read_file(path), from the
+        index when the file content is unchanged.
+        """
+        key = relative_key(eppo_metrics_sync.directory, path)
+        stat = os.stat(path)
+        row = self.connection.execute(
+            'select sha256, size, mtime_ns, errors from files where path = ?', (key,)
+        ).fetchone()
+        if row and not self._dependencies_unchanged(eppo_metrics_sync.directory, key):
+            row = None
+
+        if row and row[1] == stat.st_size and row[2] == stat.st_mtime_ns:
+            self.reused += 1
+            return self._stored_result(eppo_metrics_sync.directory, key, row[3])
+
+        if stat.st_size > eppo_metrics_sync.yaml_limits.max_file_bytes:
+            # skipped by read_file without reading it, so it is not read to be hashed either
+            sha256 = None
+        else:
+            with open(path, 'rb') as f:
+                sha256 = content_hash(f.read())
+
+        if row and row[0] == sha256:
+            self.connection.execute(
+                'update files set size = ?, mtime_ns = ? where path = ?',
+                (stat.st_size, stat.st_mtime_ns, key)
+            )
+            self.reused += 1
+            return self._stored_result(eppo_metrics_sync.directory, key, row[3])
+
+        result = eppo_metrics_sync.read_file(path)
+        if result.get('skipped'):
+            # not stored, so the file is reported again on every run
+            self._forget(key)
+        else:
+            self._store(eppo_metrics_sync.directory, key, sha256, stat, result)
+        self.reparsed += 1
+        return result
+
+    def _dependencies_unchanged(self, directory, key):
+        for dependency, sha256, size, mtime_ns in self.connection.execute(
+                'select dependency, sha256, size, mtime_ns from dependencies where path = ?', (key,)
+        ).fetchall():
+            dependency = _absolute_path(directory, dependency)
+            try:
+                stat = os.stat(dependency)
+            except OSError:
+                # a missing include is only unchanged if it was missing before
+                if sha256 is not None:
+                    return False
+                continue
+            if stat.st_size == size and stat.st_mtime_ns == mtime_ns:
+                continue
+            if file_state(dependency)[0] != sha256:
+                return False
+        return True
+
+    def _stored_result(self, directory, key, errors):
+        result = {'fact_sources': [], 'metrics': [], 'errors': json.loads(errors)}
+        result['dependencies'] = sorted(_absolute_path(directory, d) for (d,) in self.connection.execute(
+            'select dependency from dependencies where path = ?', (key,)
+        ))
+        for kind, body in self.connection.execute(
+                'select kind, body from objects where path = ? order by position', (key,)
+        ):
+            result['fact_sources' if kind == 'fact_source' else 'metrics'].append(json.loads(body))
+        return result
+
+    def _store(self, directory, key, sha256, stat, result):
+        self._forget(key)
+        self.connection.execute(
+            'insert into files (path, sha256, size, mtime_ns, errors) values (?, ?, ?, ?, ?)',
+            (key, sha256, stat.st_size, stat.st_mtime_ns, json.dumps(result['errors']))
+        )
+        for dependency in result.get('dependencies', []):
+            # relative like every other path, so the index can move between checkouts
+            self.connection.execute(
+                'insert into dependencies (path, dependency, sha256, size, mtime_ns) values (?, ?, ?, ?, ?)',
+                (key, relative_key(directory, dependency)) + file_state(dependency)
+            )
+        objects = [('fact_source', f) for f in result['fact_sources']]
+        objects += [('metric', m) for m in result['metrics']]
+        for position, (kind, obj) in enumerate(objects):
+            body = json.dumps(obj, sort_keys=True)
+            self.connection.execute(
+                'insert into objects (kind, name, path, position, sha256, body) values (?, ?, ?, ?, ?, ?)',
+                (kind, obj.get('name'), key, position, content_hash(body.encode('utf-8')), body)
+            )
+        for fact_source in result['fact_sources']:
+            for fact in fact_source.get('facts', []):
+                self.connection.execute(
+                    'insert into facts (name, fact_source, path) values (?, ?, ?)',
+                    (fact.get('name'), fact_source.get('name'), key)
+                )
+        for metric in result['metrics']:
+            for role, fact, aggregation in _metric_fact_references(metric):
+                self.connection.execute(
+                    'insert into fact_references (metric, fact, role, aggregation, path) values (?, ?, ?, ?, ?)',
+                    (metric.get('name'), fact, role, aggregation, key)
+                )
+
+    def _forget(self, key):
+        for table in ('files', 'objects', 'facts', 'fact_references', 'dependencies'):
+            self.connection.execute(f'delete from {table} where path = ?', (key,))
+
+    def prune(self, eppo_metrics_sync, paths):
+        """
+        Remove files that are no longer part of the repository.
+        """
+        keep = {relative_key(eppo_metrics_sync.directory, p) for p in paths}
+        removed = [k for (k,) in self.connection.execute('select path from files') if k not in keep]
+        for key in removed:
+            self._forget(key)
+        return len(removed)
+
+    def save_object_errors(self, cache, prune=True):
+        """
+        Store the object validation results of this run. With `prune`, the
+        results of objects neither used in this run nor stored in the index
+        are dropped.
+        """
+        self.connection.executemany(
+            'insert or replace into object_errors (kind, sha256, message) values (?, ?, ?)',
+            [(kind, sha256, cache.results[(kind, sha256)]) for kind, sha256 in cache.used]
+        )
+        if not prune:
+            return
+        stale = [
+            (kind, sha256) for kind, sha256 in self.connection.execute(
+                'select kind, sha256 from object_errors where sha256 not in (select sha256 from objects)'
+            )
+            if (kind, sha256) not in cache.used
+        ]
+        self.connection.executemany('delete from object_errors where kind = ? and sha256 = ?', stale)
+
+    def record_diagnostics(self, messages):
+        self.connection.execute('delete from diagnostics')
+        self.connection.executemany(
+            'insert into diagnostics (message) values (?)', [(m,) for m in messages]
+        )
+
+    def diagnostics(self):
+        return [m for (m,) in self.connection.execute('select message from diagnostics order by rowid')]
+
+    def metrics_referencing_fact(self, fact_name):
+        return self.connection.execute(
+            'select metric, role, path from fact_references where fact = ? order by path, metric',
+            (fact_name,)
+        ).fetchall()
+
+    def find_definition(self, name):
+        """
+        Fact sources, facts and metrics named `name`, with the file they are defined in.
+        """
+        return self.connection.execute(
+            "select kind, name, path from objects where name = ? "
+            "union all "
+            "select 'fact', name, path from facts where name = ? "
+            "order by path",
+            (name, name)
+        ).fetchall()
+
+    def metrics_using_aggregation(self, aggregation):
+        return self.connection.execute(
+            'select distinct metric, path from fact_references where aggregation = ? order by path, metric',
+            (aggregation,)
+        ).fetchall()
+
+
+def relative_key(directory, path):
+    return os.path.relpath(os.path.abspath(path), os.path.abspath(directory)).replace(os.sep, '/')
+
+
+def _absolute_path(directory, key):
+    return os.path.realpath(os.path.join(directory, key))
@@ -0,0 +1,226 @@
+"""
+Optional instrumentation of sync runs.
+
+Code paths are instrumented against a recorder. The default NULL_RECORDER
+does nothing, so runs without an exporter configured pay only for a few
+no-op calls. A Recorder collects stage spans and run values and exports
+them as an OpenMetrics/Prometheus textfile (for node-exporter's textfile
+collector) and as OpenTelemetry-style spans, one JSON object per line.
+"""
+import json
+import os
+import secrets
+import time
+from contextlib import contextmanager
+
+METRIC_PREFIX = 'eppo_metrics_sync'
+
+# value name -> help text; every value is exported as a gauge describing
+# the last run, which is how textfile collector metrics are meant to be used
+RUN_VALUES = {
+    'success': 'Whether the last run succeeded (1) or failed (0)',
+    'payload_bytes': 'Size of the encoded sync payload in bytes',
+    'fact_sources': 'Number of fact sources in the last run',
+    'metrics': 'Number of metrics in the last run',
+    'files': 'Number of definition files read in the last run',
+    'validation_errors': 'Number of validation errors in the last run',
+    'coalesced': 'Whether the last run was coalesced into a newer queued sync (1) or not (0)',
+}
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullRecorder:
+    enabled = False
+
+    def span(self, name, **attributes):
+        return _NULL_SPAN
+
+    def set(self, name, value):
+        pass
+
+    def add(self, name, value=1):
+        pass
+
+    def export(self):
+        pass
+
+
+NULL_RECORDER = NullRecorder()
+
+
+class Span:
+    def __init__(self, recorder, name, attributes):
+        self.recorder = recorder
+        self.name = name
+        self.attributes = dict(attributes)
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = None
+        self.start_time_ns = None
+        self.end_time_ns = None
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        stack = self.recorder.span_stack
+        self.parent_span_id = stack[-1].span_id if stack else None
+        stack.append(self)
+        self.start_time_ns = time.time_ns()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration = time.perf_counter() - self._start
+        self.end_time_ns = self.start_time_ns + int(self.duration * 1e9)
+        if exc_value is not None:
+            self.error = f'{exc_type.__name__}: {exc_value}'
+        self.recorder.span_stack.pop()
+        self.recorder.spans.append(self)
+        return False
+
+    def to_dict(self, trace_id):
+        return {
+            'traceId': trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_span_id,
+            'name': self.name,
+            'startTimeUnixNano': self.start_time_ns,
+            'endTimeUnixNano': self.end_time_ns,
+            'attributes': self.attributes,
+            'status': {'code': 'ERROR', 'message': self.error} if self.error else {'code': 'OK'},
+        }
+
+
+def _escape_label_value(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(
+        f'{key}="{_escape_label_value(value)}"' for key, value in sorted(labels.items())
+    ) + '}'
+
+
+class Recorder:
+    enabled = True
+
+    def __init__(self, metrics_path=None, trace_path=None, labels=None):
+        self.metrics_path = metrics_path
+        self.trace_path = trace_path
+        self.labels = {k: v for k, v in (labels or {}).items() if v is not None}
+        self.trace_id = secrets.token_hex(16)
+        self.span_stack = []
+        self.spans = []
+        self.values = {}
+
+    def span(self, name, **attributes):
+        return Span(self, name, attributes)
+
+    def set(self, name, value):
+        self.values[name] = value
+
+    def add(self, name, value=1):
+        self.values[name] = self.values.get(name, 0) + value
+
+    def openmetrics(self):
+        """
+        Render the run as OpenMetrics text, which node-exporter's textfile
+        collector also accepts.
+        """
+        lines = []
+
+        def gauge(name, help_text, samples):
+            metric = f'{METRIC_PREFIX}_{name}'
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} gauge')
+            for sample_labels, value in samples:
+                lines.append(f'{metric}{_format_labels(sample_labels)} {value}')
+
+        for name, help_text in RUN_VALUES.items():
+            if name in self.values:
+                gauge(name, help_text, [(self.labels, self.values[name])])
+
+        root_spans = [s for s in self.spans if s.parent_span_id is None]
+        if root_spans:
+            gauge(
+                'duration_seconds',
+                'Wall clock duration of the last run',
+                [(self.labels, round(sum(s.duration for s in root_spans), 6))]
+            )
+            gauge(
+                'last_run_timestamp_seconds',
+                'Unix time the last run finished',
+                [(self.labels, round(max(s.end_time_ns for s in root_spans) / 1e9, 3))]
+            )
+
+        stage_durations = {}
+        for s in self.spans:
+            if s.parent_span_id is not None:
+                stage_durations[s.name] = stage_durations.get(s.name, 0) + s.duration
+        if stage_durations:
+            gauge(
+                'stage_duration_seconds',
+                'Wall clock duration of each stage of the last run',
+                [(dict(self.labels, stage=stage), round(duration, 6)) for stage, duration in stage_durations.items()]
+            )
+
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def export(self):
+        if self.metrics_path:
+            _write_atomically(self.metrics_path, self.openmetrics())
+        if self.trace_path:
+            with open(self.trace_path, 'a') as trace_file:
+                for s in self.spans:
+                    trace_file.write(json.dumps(s.to_dict(self.trace_id)) + '\n')
+
+
+def _write_atomically(path, content):
+    # the textfile collector may read at any time, so never expose a partial file
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'w') as f:
+        f.write(content)
+    os.replace(temporary_path, path)
+
+
+def create_recorder(metrics_path=None, trace_path=None, labels=None):
+    """
+    Return a Recorder exporting to the given paths, or NULL_RECORDER when
+    no exporter is configured.
+    """
+    if not metrics_path and not trace_path:
+        return NULL_RECORDER
+    return Recorder(metrics_path=metrics_path, trace_path=trace_path, labels=labels)
+
+
+@contextmanager
+def recorded_run(recorder, name, **attributes):
+    """
+    Record the enclosed block as the root span of a run, then export,
+    whether or not the run succeeded.
+    """
+    success = 0
+    try:
+        with recorder.span(name, **attributes):
+            yield
+        success = 1
+    finally:
+        recorder.set('success', success)
+        recorder.export()
@@ -0,0 +1,192 @@
+"""
+Resource limits for loading definition files.
+
+`yaml.safe_load` will parse anything it is given: a multi-gigabyte file,
+a "billion laughs" document whose aliases expand into billions of nodes,
+or nesting deep enough to exhaust the stack. Definition files are loaded
+under limits instead:
+
+    max_file_bytes  the size of a file, checked before it is opened
+    max_aliases     the number of aliases in a file
+    max_nodes       the number of nodes in a file, counting every node an
+                    alias refers to each time it is used
+    max_depth       how deeply collections are nested
+
+The YAML limits are enforced while the file is composed, so parsing stops
+at the event that crosses a limit rather than after the file was loaded.
+JSON has no aliases, but its parsers recurse once per level of nesting
+and a deep enough document overflows the stack (orjson crashes the
+process), so JSON files are held to max_depth by a scan of their brackets
+before they are decoded, as well as to max_file_bytes.
+A file that crosses a limit raises ResourceLimitError; EppoMetricsSync
+skips it and reports it as an error of that file.
+"""
+import os
+import re
+
+import yaml
+
+DEFAULT_MAX_FILE_BYTES = 128 * 1024 * 1024
+DEFAULT_MAX_ALIASES = 10000
+DEFAULT_MAX_NODES = 5000000
+DEFAULT_MAX_DEPTH = 64
+
+# a JSON string, skipped whole so the brackets in it are not counted, or a bracket
+_JSON_TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}]', re.DOTALL)
+
+
+class ResourceLimitError(ValueError):
+    pass
+
+
+class BoundedSafeLoader(yaml.SafeLoader):
+    """
+    A SafeLoader counting aliases, nodes and depth as it composes. Use
+    YamlLimits.loader() for a subclass bound to a set of limits.
+    """
+    limits = None
+    # lines before the text being parsed, when it is a chunk of a file
+    line_offset = 0
+
+    def __init__(self, stream):
+        super().__init__(stream)
+        self._aliases = 0
+        self._nodes = 0
+        self._depth = 0
+        # anchor -> the number of nodes an alias to it stands for
+        self._sizes = {}
+
+    def _exceeded(self, limit, what, event):
+        line = event.start_mark.line + 1 + self.line_offset
+        raise ResourceLimitError(f"'{self.name}' exceeds the limit of {limit} {what} at line {line}")
+
+    def _add_nodes(self, count, event):
+        self._nodes += count
+        if self._nodes > self.limits.max_nodes:
+            self._exceeded(self.limits.max_nodes, 'nodes', event)
+
+    def compose_node(self, parent, index):
+        event = self.peek_event()
+        if isinstance(event, yaml.AliasEvent):
+            if event.anchor in self.anchors:
+                self._aliases += 1
+                if self._aliases > self.limits.max_aliases:
+                    self._exceeded(self.limits.max_aliases, 'aliases', event)
+                self._add_nodes(self._sizes.get(event.anchor, 1), event)
+            return super().compose_node(parent, index)
+
+        collection = isinstance(event, (yaml.SequenceStartEvent, yaml.MappingStartEvent))
+        if collection:
+            self._depth += 1
+            if self._depth > self.limits.max_depth:
+                self._exceeded(self.limits.max_depth, 'levels of nesting', event)
+        start = self._nodes
+        self._add_nodes(1, event)
+        try:
+            node = super().compose_node(parent, index)
+        finally:
+            if collection:
+                self._depth -= 1
+        if event.anchor is not None:
+            self._sizes[event.anchor] = self._nodes - start
+        return node
+
+
+class YamlLimits:
+    def __init__(
+            self,
+            max_file_bytes=DEFAULT_MAX_FILE_BYTES,
+            max_aliases=DEFAULT_MAX_ALIASES,
+            max_nodes=DEFAULT_MAX_NODES,
+            max_depth=DEFAULT_MAX_DEPTH
+    ):
+        self.max_file_bytes = max_file_bytes
+        self.max_aliases = max_aliases
+        self.max_nodes = max_nodes
+        self.max_depth = max_depth
+        self._loader = None
+
+    def __getstate__(self):
+        # the loader class is rebuilt where the limits are unpickled
+        return {**self.__dict__, '_loader': None}
+
+    def as_dict(self):
+        return {
+            'max_file_bytes': self.max_file_bytes,
+            'max_aliases': self.max_aliases,
+            'max_nodes': self.max_nodes,
+            'max_depth': self.max_depth,
+        }
+
+    def loader(self):
+        """
+        A BoundedSafeLoader subclass enforcing these limits.
+        """
+        if self._loader is None:
+            self._loader = type('BoundedSafeLoader', (BoundedSafeLoader,), {'limits': self})
+        return self._loader
+
+    def check_size(self, size, name):
+        if size > self.max_file_bytes:
+            raise ResourceLimitError(
+                f"'{name}' exceeds the limit of {self.max_file_bytes} bytes with {size} bytes"
+            )
+
+    def check_file(self, path):
+        self.check_size(os.path.getsize(path), path)
+
+    def check_json_depth(self, content, name, line_offset=0):
+        """
+        Raise ResourceLimitError if the JSON `content` (bytes) nests
+        collections more than max_depth deep, without decoding it.
+        """
+        depth = 0
+        for match in _JSON_TOKEN.finditer(content):
+            token = match.group()
+            if token in (b'[', b'{'):
+                depth += 1
+                if depth > self.max_depth:
+                    line = content.count(b'\n', 0, match.start()) + 1 + line_offset
+                    raise ResourceLimitError(
+                        f"'{name}' exceeds the limit of {self.max_depth} levels of nesting at line {line}"
+                    )
+            elif token in (b']', b'}'):
+                depth -= 1
+
+    def load(self, stream, name=None, line_offset=0):
+        """
+        yaml.safe_load under these limits. `name` names a string stream in
+        errors, which are positioned `line_offset` lines further down.
+        """
+        return self.load_counted(stream, name, line_offset)[0]
+
+    def load_counted(self, stream, name=None, line_offset=0):
+        """
+        Return (data, node count) for `load`, so the parts of a file parsed
+        separately can be held to the node limit together.
+        """
+        loader = self.loader()(stream)
+        if name is not None:
+            loader.name = name
+        loader.line_offset = line_offset
+        try:
+            return loader.get_single_data(), loader._nodes
+        finally:
+            loader.dispose()
+
+    def load_all(self, stream, name=None):
+        """
+        yaml.safe_load_all under these limits, which apply to the whole
+        stream rather than to each document.
+        """
+        loader = self.loader()(stream)
+        if name is not None:
+            loader.name = name
+        try:
+            while loader.check_data():
+                yield loader.get_data()
+        finally:
+            loader.dispose()
+
+
+DEFAULT_LIMITS = YamlLimits()
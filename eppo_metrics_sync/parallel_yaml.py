@@ -0,0 +1,257 @@
+"""
+Parallel parsing of very large YAML files.
+
+Generated files can hold tens of thousands of entries under a single
+top-level list, which a serial parse reads on one core. Files of at least
+`threshold` bytes are split at the item boundaries of their top-level
+block sequences by scanning lines, without parsing them, and the chunks
+are parsed in worker processes:
+
+    metrics:          <- the skeleton, parsed here with the items blanked out
+      - name: A       <- chunk 1
+        ...
+      - name: B       <- chunk 2
+
+The items are put back together in order, so the document is the one
+`yaml.safe_load` returns, and parse errors are reported with the line and
+column they have in the file. Files the line scan cannot split safely
+(several documents, directives, aliases, quoted or flow top-level keys,
+duplicate keys, ...) are left to the serial parser.
+"""
+import math
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml
+
+from eppo_metrics_sync.limits import DEFAULT_LIMITS, ResourceLimitError
+
+DEFAULT_THRESHOLD = 1024 * 1024
+
+# chunks per worker, so that a slow chunk does not leave the others idle
+CHUNKS_PER_WORKER = 4
+
+_TOP_LEVEL_KEY = re.compile(r'([A-Za-z_][\w-]*):(?:[ \t]|\r?$)')
+_SEQUENCE_KEY = re.compile(r'[A-Za-z_][\w-]*:[ \t]*(?:#.*)?\r?$')
+_ITEM = re.compile(r'( *)-(?:[ \t]|\r?$)')
+# an alias may refer to an anchor in another chunk
+_ALIAS = re.compile(r'(?:^|[\s\[{,])\*[^\s,\[\]{}]')
+# line breaks other than \n and \r\n, which the line scan does not count
+_OTHER_LINE_BREAK = re.compile('\r(?!\n)|[\x85\u2028\u2029]')
+
+
+class ChunkedParseError(yaml.YAMLError):
+    """
+    A parse error in a chunk, with the position it has in the whole file.
+    """
+
+
+def _is_blank_or_comment(line):
+    stripped = line.strip()
+    return not stripped or stripped.startswith('#')
+
+
+def _sequence_items(lines, start):
+    """
+    Return (end, item starts) of the block sequence whose first item is
+    lines[start], or None if its extent is unclear.
+    """
+    indent = len(_ITEM.match(lines[start]).group(1))
+    items = [start]
+    end = start + 1
+    while end < len(lines):
+        line = lines[end]
+        if _is_blank_or_comment(line):
+            end += 1
+            continue
+        line_indent = len(line) - len(line.lstrip(' '))
+        if line_indent == indent and _ITEM.match(line):
+            items.append(end)
+        elif line_indent < indent or (indent == 0 and line_indent == 0):
+            if line_indent > 0:
+                return None
+            break
+        end += 1
+    return end, items
+
+
+def split_document(text, chunk_count):
+    """
+    Split a single-document YAML file into a skeleton and chunks.
+
+    Returns (skeleton, chunks), or None if the text cannot be split safely.
+    The skeleton is `text` with the items of its top-level block sequences
+    replaced by empty lines, so it has the same line numbers. Chunks are
+    (key, first line index, text, starts) tuples, each text holding the key
+    line followed by a run of the key's items. starts maps the (line,
+    column) in the chunk of the collections that start before it to their
+    line in the file.
+    """
+    if text.startswith('\ufeff') or _OTHER_LINE_BREAK.search(text) or _ALIAS.search(text):
+        return None
+    lines = text.split('\n')
+    skeleton = []
+    sequences = []
+    keys = set()
+    root_line = None
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        if _is_blank_or_comment(line) or line.startswith(' '):
+            skeleton.append(line)
+            index += 1
+            continue
+        match = _TOP_LEVEL_KEY.match(line)
+        if match is None or match.group(1) in keys:
+            return None
+        key = match.group(1)
+        keys.add(key)
+        if root_line is None:
+            root_line = index
+        skeleton.append(line)
+        index += 1
+        if not _SEQUENCE_KEY.match(line):
+            continue
+
+        first = index
+        while first < len(lines) and _is_blank_or_comment(lines[first]):
+            first += 1
+        if first == len(lines) or not _ITEM.match(lines[first]):
+            continue
+        extent = _sequence_items(lines, first)
+        if extent is None:
+            return None
+        end, items = extent
+        skeleton.extend(lines[index:first])
+        skeleton.extend('' for _ in range(first, end))
+        sequences.append((key, line, items, end))
+        index = end
+
+    if not sequences:
+        return None
+    item_count = sum(len(items) for _, _, items, _ in sequences)
+    chunk_size = max(1, math.ceil(item_count / chunk_count))
+    chunks = []
+    for key, key_line, items, end in sequences:
+        # the document's mapping and the sequence start with the first chunk
+        indent = len(_ITEM.match(lines[items[0]]).group(1))
+        starts = {(0, 0): root_line, (1, indent): items[0]}
+        for position in range(0, len(items), chunk_size):
+            start = items[position]
+            stop = items[position + chunk_size] if position + chunk_size < len(items) else end
+            chunk_text = '\n'.join([key_line, *lines[start:stop]])
+            # with the line break that ends the range, as block scalars
+            # ending the chunk keep or drop it by their chomping
+            if stop < len(lines):
+                chunk_text += '\n'
+            chunks.append((key, start, chunk_text, starts))
+    return '\n'.join(skeleton), chunks
+
+
+def _parse(text, line_offset, name, starts=None, limits=DEFAULT_LIMITS):
+    """
+    Parse `text` under `limits`, returning (document, node count, None),
+    or (None, 0, (line, message)) with the error positioned `line_offset`
+    lines further into `name`, as a serial parse of the file would report
+    it.
+    """
+    try:
+        document, nodes = limits.load_counted(text, name=name, line_offset=line_offset)
+        return document, nodes, None
+    except yaml.MarkedYAMLError as e:
+        for mark in (e.context_mark, e.problem_mark):
+            if mark is None:
+                continue
+            if mark is e.context_mark and (mark.line, mark.column) in (starts or {}):
+                mark.line = starts[mark.line, mark.column]
+            else:
+                mark.line += line_offset
+            mark.name = name
+            # marks of files read from a stream have no snippet
+            mark.buffer = None
+        return None, 0, (e.problem_mark.line if e.problem_mark is not None else line_offset, str(e))
+    except yaml.YAMLError as e:
+        return None, 0, (line_offset, str(e))
+
+
+def _parse_chunk(key, first_line, text, starts, name, limits):
+    # the key line in front of the items is one line before the first item
+    document, nodes, error = _parse(text, first_line - 1, name, starts, limits)
+    if error is not None:
+        return None, 0, error
+    if not isinstance(document, dict) or list(document) != [key] or not isinstance(document[key], list):
+        return None, 0, None
+    return document[key], nodes, None
+
+
+class ParallelYamlLoader:
+    def __init__(self, workers=None, threshold=DEFAULT_THRESHOLD, limits=DEFAULT_LIMITS):
+        # 1 or less parses every file serially
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.threshold = threshold
+        # the node counts of the chunks are added up, so the node limit
+        # holds for the whole file
+        self.limits = limits
+        self._executor = None
+
+    def accepts(self, path):
+        return self.workers > 1 and os.path.getsize(path) >= self.threshold
+
+    def load(self, path):
+        """
+        Return (True, document) for a file parsed in chunks, or (False,
+        None) if it has to be parsed serially. Raises ChunkedParseError
+        with the first error in the file, or ResourceLimitError as soon as
+        a chunk, or the chunks so far together, cross a limit.
+        """
+        with open(path, 'r') as file:
+            text = file.read()
+        split = split_document(text, self.workers * CHUNKS_PER_WORKER)
+        if split is None:
+            return False, None
+        skeleton, chunks = split
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        futures = [
+            self._executor.submit(_parse_chunk, key, first_line, chunk, starts, path, self.limits)
+            for key, first_line, chunk, starts in chunks
+        ]
+        try:
+            document, nodes, error = _parse(skeleton, 0, path, limits=self.limits)
+            values = {}
+            for (key, first_line, _, _), future in zip(chunks, futures):
+                items, chunk_nodes, chunk_error = future.result()
+                if chunk_error is not None:
+                    # the chunks after it can only hold later errors
+                    if error is None or chunk_error[0] < error[0]:
+                        error = chunk_error
+                    break
+                if items is None:
+                    return False, None
+                # the document mapping, the key and the sequence of a chunk
+                # are already counted by the skeleton, where the sequence is
+                # an empty value
+                nodes += chunk_nodes - 3
+                if nodes > self.limits.max_nodes:
+                    raise ResourceLimitError(
+                        f"'{path}' exceeds the limit of {self.limits.max_nodes} nodes "
+                        f"in the items from line {first_line + 1}"
+                    )
+                values.setdefault(key, []).extend(items)
+        finally:
+            for future in futures:
+                future.cancel()
+
+        if error is not None:
+            raise ChunkedParseError(error[1])
+        if not isinstance(document, dict) or any(document.get(key, False) is not None for key in values):
+            return False, None
+        document.update(values)
+        return True, document
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,428 @@
+"""
+Syncing a repository as independent partitions, each under its own sync tag.
+
+A partition is a set of definition files synced to one sync tag. With
+directory partitioning, every top-level subdirectory of the definitions
+directory is a partition synced to `<sync tag>/<subdirectory>`, and files
+directly in the directory are synced to the sync tag itself. A partition
+map assigns files explicitly; a file belongs to the first partition with
+a matching glob, and files matching none are an error:
+
+    partitions:
+      - name: growth
+        paths: [growth/, shared/growth_*.yaml]
+      - name: search
+        paths: [search/]
+        sync_tag: search-metrics    # default: <sync tag>/search
+
+Each partition is schema validated and checked by the rules on its own,
+so one team's broken file only holds back its own partition. Fact
+references and guardrail cutoffs are checked against the fact sources of
+all partitions, and names must be unique across partitions, which is
+checked through a name index over all of them. Valid partitions are
+synced concurrently, and only if their payload differs from the one last
+synced to the same sync tag, as recorded in a state file.
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+
+from eppo_metrics_sync.api import api_endpoint, determine_sync_tag, sync_definitions
+from eppo_metrics_sync.discovery import compile_path_glob
+from eppo_metrics_sync.instrumentation import NULL_RECORDER
+from eppo_metrics_sync.limits import DEFAULT_LIMITS
+from eppo_metrics_sync.summary import CrossFileView, summarize
+from eppo_metrics_sync.validation import RULES
+
+DEFAULT_STATE_PATH = '.eppo-partition-state.json'
+
+STATE_FORMAT = 'eppo-metrics-sync-partition-state'
+
+# the partition of the files directly in the definitions directory
+ROOT_PARTITION = '.'
+
+INVALID = 'invalid'
+UNCHANGED = 'unchanged'
+SYNCED = 'synced'
+FAILED = 'failed'
+# validated in a dry run, or changed but not synced
+CHANGED = 'changed'
+
+# the names the partitions of a repository share, and how they are named
+# in error messages
+NAME_KINDS = ('Fact source', 'Fact', 'Metric')
+
+
+class Partition:
+    def __init__(self, name, sync_tag, patterns=()):
+        self.name = name
+        self.sync_tag = sync_tag
+        self.patterns = [compile_path_glob(p) for p in patterns]
+        self.files = []
+        self.fact_sources = []
+        self.metrics = []
+        self.validation_errors = []
+        self.status = None
+        self.error = None
+
+    def matches(self, relative_path):
+        return any(pattern.match(relative_path) for pattern in self.patterns)
+
+    def payload_fingerprint(self, allow_upgrades):
+        # without the reference URL, which is usually different on every CI
+        # run; it is still sent with the payload when the partition syncs
+        payload = {
+            'sync_tag': self.sync_tag,
+            'fact_sources': self.fact_sources,
+            'metrics': self.metrics,
+            'allow_upgrades': allow_upgrades,
+        }
+        encoded = json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    def describe(self):
+        line = (
+            f'{self.name} ({self.sync_tag}): {self.status}, {len(self.files)} file(s), '
+            f'{len(self.fact_sources)} fact source(s), {len(self.metrics)} metric(s)'
+        )
+        if self.validation_errors:
+            line += f', {len(self.validation_errors)} error(s)'
+        if self.error:
+            line += f': {self.error}'
+        return line
+
+
+def _relative(directory, path):
+    return os.path.relpath(path, directory).replace(os.sep, '/')
+
+
+def _partition_tag(base_tag, name):
+    return base_tag if name == ROOT_PARTITION else f'{base_tag}/{name}'
+
+
+def directory_partitions(directory, files, base_tag):
+    """
+    One partition per top-level subdirectory holding definition files, in
+    name order, plus one for the files directly in `directory`.
+    """
+    partitions = {}
+    for path in files:
+        relative = _relative(directory, path)
+        name = relative.split('/')[0] if '/' in relative else ROOT_PARTITION
+        if name not in partitions:
+            partitions[name] = Partition(name, _partition_tag(base_tag, name))
+        partitions[name].files.append(path)
+    return [partitions[name] for name in sorted(partitions)]
+
+
+def load_partition_map(path, base_tag):
+    """
+    Read the partitions of a partition map file. Raises ValueError if it is
+    malformed.
+    """
+    try:
+        with open(path) as f:
+            content = yaml.safe_load(f)
+    except (OSError, yaml.YAMLError) as e:
+        raise ValueError(f"Error loading partition map '{path}': {e}")
+
+    entries = content.get('partitions') if isinstance(content, dict) else None
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"Partition map '{path}' must have a non-empty 'partitions' list")
+    partitions = []
+    for position, entry in enumerate(entries, 1):
+        if not isinstance(entry, dict) or not isinstance(entry.get('name'), str) \
+                or not isinstance(entry.get('paths'), list) or not entry['paths']:
+            raise ValueError(f"Partition {position} in '{path}' must have a name and a list of paths")
+        if any(p.name == entry['name'] for p in partitions):
+            raise ValueError(f"Partition name '{entry['name']}' appears more than once in '{path}'")
+        sync_tag = entry.get('sync_tag') or _partition_tag(base_tag, entry['name'])
+        partitions.append(Partition(entry['name'], sync_tag, [str(p) for p in entry['paths']]))
+    return partitions
+
+
+def assign_files(directory, files, partitions):
+    """
+    Add each file to the first partition matching it. Raises ValueError
+    listing the files no partition matches.
+    """
+    unassigned = []
+    for path in files:
+        relative = _relative(directory, path)
+        # a directory pattern like `growth/` matches the files below it
+        candidates = [relative] + _parents(relative)
+        partition = next((p for p in partitions if any(p.matches(c) for c in candidates)), None)
+        if partition is None:
+            unassigned.append(relative)
+        else:
+            partition.files.append(path)
+    if unassigned:
+        raise ValueError('File(s) not in any partition: ' + ', '.join(unassigned))
+
+
+def _parents(relative):
+    parts = relative.split('/')[:-1]
+    return ['/'.join(parts[:i]) for i in range(1, len(parts) + 1)]
+
+
+class NameIndex:
+    """
+    The fact source, fact and metric names of every partition, to find
+    names defined in more than one partition.
+    """
+
+    def __init__(self, partitions):
+        self.partitions = {kind: {} for kind in NAME_KINDS}
+        for partition in partitions:
+            for fact_source in partition.fact_sources:
+                self._add('Fact source', fact_source['name'], partition.name)
+                for fact in fact_source['facts']:
+                    self._add('Fact', fact['name'], partition.name)
+            for metric in partition.metrics:
+                self._add('Metric', metric['name'], partition.name)
+
+    def _add(self, kind, name, partition_name):
+        owners = self.partitions[kind].setdefault(name, [])
+        if partition_name not in owners:
+            owners.append(partition_name)
+
+    def conflicts(self, partition_name):
+        """
+        Error messages for the names of a partition that other partitions
+        define too.
+        """
+        errors = []
+        for kind in NAME_KINDS:
+            shared = [
+                f"{name} ({', '.join(owners)})"
+                for name, owners in self.partitions[kind].items()
+                if len(owners) > 1 and partition_name in owners
+            ]
+            if shared:
+                errors.append(f"{kind} names are not unique across partitions: {', '.join(shared)}")
+        return errors
+
+
+def validate_partition(partition, other_fact_sources, name_index):
+    """
+    Run the rules over a partition and add their errors to its
+    validation_errors. Rules comparing objects across files see the
+    summaries of the other partitions' fact sources; names are checked
+    within the partition by the rules and across partitions by the index.
+    """
+    if not partition.fact_sources and not partition.metrics and not partition.validation_errors:
+        partition.validation_errors.append('No fact sources or metrics found')
+    for rule, check, across_files in RULES:
+        if across_files and rule != 'unique_names':
+            check(CrossFileView(
+                partition.fact_sources + other_fact_sources, partition.metrics, partition.validation_errors
+            ))
+        else:
+            check(partition)
+    partition.validation_errors.extend(name_index.conflicts(partition.name))
+
+
+def _state_key(sync_tag):
+    # the same sync tag on another host is another partition
+    return f'{api_endpoint()} {sync_tag}'
+
+
+def _load_state(path):
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(state, dict) or state.get('format') != STATE_FORMAT:
+        return {}
+    return state.get('partitions') or {}
+
+
+def _save_state(path, partitions):
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'w') as f:
+        json.dump({'format': STATE_FORMAT, 'partitions': partitions}, f, indent=2, sort_keys=True)
+    os.replace(temporary_path, path)
+
+
+class PartitionedSync:
+    def __init__(
+            self,
+            directory,
+            partition_map=None,
+            schema_type='eppo',
+            dbt_model_prefix=None,
+            sync_prefix=None,
+            allow_upgrades=False,
+            include=None,
+            exclude=None,
+            state_path=DEFAULT_STATE_PATH,
+            workers=4,
+            recorder=NULL_RECORDER,
+            coordinator=None,
+            parse_workers=None,
+            yaml_limits=DEFAULT_LIMITS
+    ):
+        self.directory = directory
+        self.partition_map = partition_map
+        self.schema_type = schema_type
+        self.dbt_model_prefix = dbt_model_prefix
+        # prefixes names like a normal sync; the base of the sync tags
+        self.sync_prefix = sync_prefix
+        self.allow_upgrades = allow_upgrades
+        self.include = include
+        self.exclude = exclude
+        self.state_path = state_path
+        self.workers = workers
+        self.recorder = recorder
+        self.coordinator = coordinator
+        self.parse_workers = parse_workers
+        self.yaml_limits = yaml_limits
+        self.partitions = []
+
+    def read(self):
+        """
+        Discover the files, assign them to partitions and read each
+        partition, keeping the schema errors of its files.
+        """
+        # imported here so that the HTTP side can be used without the schema
+        from eppo_metrics_sync.discovery import DEFINITION_EXTENSIONS, YAML_EXTENSIONS, discover_files
+        from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+
+        base_tag = determine_sync_tag(self.sync_prefix)
+        if not base_tag:
+            raise Exception('EPPO_SYNC_TAG not set in environment variables. Please set and try again')
+
+        with self.recorder.span('discovery'):
+            discovery = discover_files(
+                self.directory,
+                include=self.include,
+                exclude=self.exclude,
+                extensions=YAML_EXTENSIONS if self.schema_type == 'dbt-model' else DEFINITION_EXTENSIONS
+            )
+        print(discovery.summary())
+        if self.partition_map is None:
+            self.partitions = directory_partitions(self.directory, discovery.files, base_tag)
+        else:
+            partitions = load_partition_map(self.partition_map, base_tag)
+            assign_files(self.directory, discovery.files, partitions)
+            self.partitions = [p for p in partitions if p.files]
+
+        with self.recorder.span('parse'):
+            for partition in self.partitions:
+                source = EppoMetricsSync(
+                    directory=self.directory,
+                    schema_type=self.schema_type,
+                    dbt_model_prefix=self.dbt_model_prefix,
+                    parse_workers=self.parse_workers,
+                    yaml_limits=self.yaml_limits
+                )
+                try:
+                    for path in partition.files:
+                        source._add_file_result(path, source.read_file(path))
+                finally:
+                    source.parallel_yaml.close()
+                partition.fact_sources = source.fact_sources
+                partition.metrics = source.metrics
+                partition.validation_errors = source.validation_errors
+        return self.partitions
+
+    def validate(self):
+        """
+        Validate every partition. Returns the valid partitions; the others
+        get the INVALID status.
+        """
+        name_index = NameIndex(self.partitions)
+        summaries = {p.name: summarize(p.fact_sources, [])['fact_sources'] for p in self.partitions}
+        valid = []
+        with self.recorder.span('validate'):
+            for partition in self.partitions:
+                other_fact_sources = [
+                    summary for name, fact_sources in summaries.items() if name != partition.name
+                    for summary in fact_sources
+                ]
+                validate_partition(partition, other_fact_sources, name_index)
+                if partition.validation_errors:
+                    partition.status = INVALID
+                else:
+                    valid.append(partition)
+        return valid
+
+    def _add_sync_prefix(self, partition):
+        for obj in partition.fact_sources + partition.metrics:
+            obj['name'] = f"[{self.sync_prefix}] {obj['name']}"
+
+    def _sync_partition(self, partition):
+        # the recorder's spans are not thread safe, so uploads running side
+        # by side are recorded as the one 'sync' span around them
+        if self.coordinator is not None:
+            from eppo_metrics_sync.coordination import coordinated_sync
+            return coordinated_sync(
+                self.coordinator,
+                partition.fact_sources,
+                partition.metrics,
+                sync_prefix=partition.sync_tag,
+                allow_upgrades=self.allow_upgrades
+            )
+        return sync_definitions(
+            partition.fact_sources,
+            partition.metrics,
+            sync_prefix=partition.sync_tag,
+            allow_upgrades=self.allow_upgrades
+        )
+
+    def run(self, dryrun=False):
+        """
+        Read and validate the partitions and sync the valid ones whose
+        payload changed since their last sync, concurrently. Prints a line
+        per partition and raises ValueError, after the others were synced,
+        if a partition is invalid or failed to sync.
+        """
+        self.read()
+        valid = self.validate()
+
+        state = _load_state(self.state_path) if self.state_path else {}
+        changed = []
+        for partition in valid:
+            if self.sync_prefix is not None:
+                self._add_sync_prefix(partition)
+            fingerprint = partition.payload_fingerprint(self.allow_upgrades)
+            if state.get(_state_key(partition.sync_tag)) == fingerprint:
+                partition.status = UNCHANGED
+            else:
+                partition.status = CHANGED
+                changed.append((partition, fingerprint))
+
+        if not dryrun and changed:
+            def sync(item):
+                partition, fingerprint = item
+                try:
+                    self._sync_partition(partition)
+                except Exception as e:
+                    partition.status, partition.error = FAILED, str(e)
+                    return None
+                partition.status = SYNCED
+                return fingerprint
+
+            with self.recorder.span('sync', partitions=len(changed)):
+                with ThreadPoolExecutor(max_workers=max(1, self.workers)) as executor:
+                    fingerprints = list(executor.map(sync, changed))
+            for (partition, _), fingerprint in zip(changed, fingerprints):
+                if fingerprint is not None:
+                    state[_state_key(partition.sync_tag)] = fingerprint
+            if self.state_path:
+                _save_state(self.state_path, state)
+
+        for partition in self.partitions:
+            print(partition.describe())
+        failed = [p for p in self.partitions if p.status in (INVALID, FAILED)]
+        if failed:
+            error_message = f"{len(failed)} of {len(self.partitions)} partition(s) failed: \n"
+            error_message += '\n'.join(
+                f"{p.name}: {error}" for p in failed for error in (p.validation_errors or [p.error])
+            )
+            raise ValueError(error_message)
+        return self.partitions
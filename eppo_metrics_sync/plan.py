@@ -0,0 +1,144 @@
+"""
+Structural diffs between local definitions and the definitions synced to
+a sync tag.
+
+Objects are matched by kind and name. Within an object, keys that are
+missing on one side and null on the other are treated as equal, and lists
+of named objects (facts, properties) are matched by name rather than by
+position.
+"""
+
+KINDS = (
+    ('fact_source', 'fact_sources'),
+    ('metric', 'metrics'),
+)
+
+CREATE = 'create'
+UPDATE = 'update'
+DELETE = 'delete'
+UNCHANGED = 'unchanged'
+
+SYMBOLS = {CREATE: '+', UPDATE: '~', DELETE: '-', UNCHANGED: ' '}
+
+
+class Change:
+    def __init__(self, action, kind, name, fields=()):
+        self.action = action
+        self.kind = kind
+        self.name = name
+        # dotted paths of the fields that differ, for updates
+        self.fields = list(fields)
+
+    def __repr__(self):
+        return f'Change({self.action!r}, {self.kind!r}, {self.name!r}, {self.fields!r})'
+
+    def describe(self):
+        line = f'{SYMBOLS[self.action]} {self.action} {self.kind} "{self.name}"'
+        if self.fields:
+            line += f" ({', '.join(self.fields)})"
+        return line
+
+
+class Plan:
+    def __init__(self, changes):
+        self.changes = changes
+
+    def _with_action(self, action):
+        return [c for c in self.changes if c.action == action]
+
+    @property
+    def creates(self):
+        return self._with_action(CREATE)
+
+    @property
+    def updates(self):
+        return self._with_action(UPDATE)
+
+    @property
+    def deletes(self):
+        return self._with_action(DELETE)
+
+    @property
+    def unchanged(self):
+        return self._with_action(UNCHANGED)
+
+    @property
+    def has_changes(self):
+        return any(c.action != UNCHANGED for c in self.changes)
+
+    def summary(self):
+        return (
+            f'Plan: {len(self.creates)} to create, {len(self.updates)} to update, '
+            f'{len(self.deletes)} to delete, {len(self.unchanged)} unchanged'
+        )
+
+    def format(self, show_unchanged=False):
+        lines = [
+            c.describe() for c in self.changes
+            if show_unchanged or c.action != UNCHANGED
+        ]
+        lines.append(self.summary())
+        return '\n'.join(lines)
+
+
+def _by_name(objects):
+    return {o['name']: o for o in objects if isinstance(o, dict) and 'name' in o}
+
+
+def _is_named_list(value):
+    return bool(value) and all(isinstance(v, dict) and 'name' in v for v in value)
+
+
+def changed_fields(local, remote, path=''):
+    """
+    Return the dotted paths at which two definitions differ.
+    """
+    if isinstance(local, dict) and isinstance(remote, dict):
+        fields = []
+        for key in list(local) + [k for k in remote if k not in local]:
+            local_value, remote_value = local.get(key), remote.get(key)
+            fields.extend(changed_fields(local_value, remote_value, f'{path}.{key}' if path else str(key)))
+        return fields
+
+    if isinstance(local, list) and isinstance(remote, list):
+        if _is_named_list(local) and _is_named_list(remote):
+            local_named, remote_named = _by_name(local), _by_name(remote)
+            fields = []
+            for name in list(local_named) + [n for n in remote_named if n not in local_named]:
+                fields.extend(changed_fields(local_named.get(name), remote_named.get(name), f'{path}[{name}]'))
+            return fields
+        if len(local) == len(remote):
+            fields = []
+            for i, (local_item, remote_item) in enumerate(zip(local, remote)):
+                fields.extend(changed_fields(local_item, remote_item, f'{path}[{i}]'))
+            return fields
+        return [path]
+
+    if local == remote and type(local) is type(remote):
+        return []
+    # 1 and 1.0 are the same number in JSON
+    if isinstance(local, (int, float)) and isinstance(remote, (int, float)) \
+            and not isinstance(local, bool) and not isinstance(remote, bool) and local == remote:
+        return []
+    return [path]
+
+
+def diff_definitions(local, remote):
+    """
+    Compare local definitions with remote ones, both given as dicts with
+    'fact_sources' and 'metrics' lists, and return a Plan.
+    """
+    changes = []
+    for kind, key in KINDS:
+        local_objects = _by_name(local.get(key, []))
+        remote_objects = _by_name(remote.get(key, []))
+        for name, definition in local_objects.items():
+            if name not in remote_objects:
+                changes.append(Change(CREATE, kind, name))
+                continue
+            fields = changed_fields(definition, remote_objects[name])
+            changes.append(Change(UPDATE if fields else UNCHANGED, kind, name, fields))
+        for name in remote_objects:
+            if name not in local_objects:
+                changes.append(Change(DELETE, kind, name))
+    return Plan(changes)
@@ -0,0 +1,60 @@
+"""
+Streaming of run results as newline-delimited JSON.
+
+Results are written as soon as they are known rather than after the run,
+one JSON object per line:
+
+    {"event": "file", "path": "metrics/revenue.yaml", "fact_sources": 0, "metrics": 3, "errors": 1}
+    {"event": "error", "stage": "schema", "path": "metrics/revenue.yaml", "message": "..."}
+    {"event": "error", "stage": "fact_references", "message": "Invalid fact reference(s): ..."}
+    {"event": "summary", "passed": false, "stopped": false, "files": 120, "fact_sources": 14, ...}
+
+Paths are relative to the definitions directory. The stage of an error is
+'schema' for errors found while reading files and the name of the rule
+otherwise. The summary is the last line of every run.
+"""
+import json
+import sys
+import threading
+
+
+class NullResults:
+    enabled = False
+
+    def emit(self, event, **fields):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_RESULTS = NullResults()
+
+
+class ResultStream:
+    enabled = True
+
+    def __init__(self, stream, close_stream=False):
+        self.stream = stream
+        self.close_stream = close_stream
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        line = json.dumps({'event': event, **fields}) + '\n'
+        with self._lock:
+            self.stream.write(line)
+            # flushed per line, so readers see errors as they are found
+            self.stream.flush()
+
+    def close(self):
+        if self.close_stream:
+            self.stream.close()
+
+
+def open_results(path):
+    """
+    A ResultStream writing to `path`, or to stdout for '-'.
+    """
+    if path == '-':
+        return ResultStream(sys.stdout)
+    return ResultStream(open(path, 'w'), close_stream=True)
@@ -0,0 +1,183 @@
+"""
+Semantic diffs of the definitions in a directory between two revisions.
+
+Definitions are read straight out of git rather than from a checkout:
+
+    diff = diff_revisions('metrics/', 'main', 'HEAD')
+    print(diff.format())
+
+The files of both revisions are listed with `git ls-tree`, and a file
+whose blob id is the same in both is not parsed. The blobs of the
+remaining files are read through one `git cat-file --batch` process and
+the objects they define are compared by content fingerprint, so only
+objects whose fingerprints differ are compared field by field. Objects
+are matched by kind and name, so an object moved between files is
+unchanged.
+
+Files using `$include` are the exception: a fragment they include may
+have changed while they did not, so they are always parsed, with includes
+resolved against the same revision. Finding them takes a `git grep` over
+every file of both revisions, so that step grows with the size of the
+directory rather than of the change. It is skipped when no file changed.
+
+Definitions are not schema validated; the diff is of what the files say.
+"""
+import os
+
+from eppo_metrics_sync.discovery import DEFINITION_EXTENSIONS, YAML_EXTENSIONS
+from eppo_metrics_sync.git import BlobReader, files_containing, run_git, tree_blobs
+from eppo_metrics_sync.helper import parse_documents
+from eppo_metrics_sync.includes import INCLUDE_KEY, IncludeResolver
+from eppo_metrics_sync.index import object_hash
+from eppo_metrics_sync.plan import KINDS, UNCHANGED, Change, Plan, diff_definitions
+
+
+class RevisionIncludeResolver(IncludeResolver):
+    """
+    Resolves includes against the files of a revision rather than the
+    working tree.
+    """
+
+    def __init__(self, reader, top_level, revision, root=None):
+        super().__init__(root=top_level if root is None else root)
+        self.reader = reader
+        self.top_level = top_level
+        self.revision = revision
+        self._contents = {}
+
+    def _name(self, realpath):
+        path = os.path.relpath(realpath, self.top_level)
+        return None if path.startswith(os.pardir) else f'{self.revision}:{path}'
+
+    def _content(self, realpath):
+        name = self._name(realpath)
+        if name is None:
+            return None
+        if name not in self._contents:
+            self._contents[name] = self.reader.read(name)
+        return self._contents[name]
+
+    def _is_file(self, realpath):
+        return self._content(realpath) is not None
+
+    def _read_file(self, realpath):
+        documents = parse_documents(self._content(realpath), self._name(realpath))
+        return documents[0] if documents else None
+
+
+class RevisionDiff:
+    def __init__(self, revision_a, revision_b, plan, changed_files, file_count):
+        self.revision_a = revision_a
+        self.revision_b = revision_b
+        self.plan = plan
+        # paths, relative to the top level, of the files whose blobs differ
+        self.changed_files = changed_files
+        self.file_count = file_count
+
+    @property
+    def changes(self):
+        return [c for c in self.plan.changes if c.action != UNCHANGED]
+
+    @property
+    def has_changes(self):
+        return self.plan.has_changes
+
+    def summary(self):
+        plan = self.plan
+        return (
+            f'{self.revision_a}..{self.revision_b}: {len(self.changed_files)} of {self.file_count} '
+            f'definition file(s) changed; {len(plan.creates)} created, {len(plan.updates)} updated, '
+            f'{len(plan.deletes)} deleted, {len(plan.unchanged)} unchanged in the changed files'
+        )
+
+    def format(self):
+        return '\n'.join([c.describe() for c in self.changes] + [self.summary()])
+
+
+def _fingerprint(obj):
+    try:
+        return object_hash(obj)
+    except (TypeError, ValueError):
+        # e.g. dates, which JSON cannot encode; compared field by field
+        return None
+
+
+def diff_objects(old, new):
+    """
+    Return the Plan turning `old` into `new`, both dicts with
+    'fact_sources' and 'metrics' lists. Objects with equal fingerprints
+    are unchanged without being compared field by field.
+    """
+    unchanged = []
+    remaining_old = {}
+    remaining_new = {}
+    for kind, key in KINDS:
+        old_objects = {obj.get('name'): obj for obj in old.get(key, []) if isinstance(obj, dict)}
+        new_objects = {obj.get('name'): obj for obj in new.get(key, []) if isinstance(obj, dict)}
+        same = set()
+        for name, obj in new_objects.items():
+            if name in old_objects:
+                fingerprint = _fingerprint(obj)
+                if fingerprint is not None and fingerprint == _fingerprint(old_objects[name]):
+                    same.add(name)
+        unchanged.extend(Change(UNCHANGED, kind, name) for name in new_objects if name in same)
+        remaining_old[key] = [obj for name, obj in old_objects.items() if name not in same]
+        remaining_new[key] = [obj for name, obj in new_objects.items() if name not in same]
+    plan = diff_definitions(remaining_new, remaining_old)
+    return Plan(plan.changes + unchanged)
+
+
+def _read_revision(eppo_metrics_sync, reader, top_level, revision, blobs, paths):
+    """
+    Return the fact sources and metrics defined by `paths` at `revision`.
+    """
+    eppo_metrics_sync.includes = RevisionIncludeResolver(
+        reader, top_level, revision, root=eppo_metrics_sync.directory
+    )
+    contents = reader.read_many(blobs[path] for path in paths)
+    objects = {'fact_sources': [], 'metrics': []}
+    for path in paths:
+        documents = parse_documents(contents[blobs[path]], f'{revision}:{path}')
+        result = eppo_metrics_sync._read_reference(os.path.join(top_level, path), documents=documents)
+        objects['fact_sources'].extend(result['fact_sources'])
+        objects['metrics'].extend(result['metrics'])
+    return objects
+
+
+def diff_revisions(directory, revision_a, revision_b, schema_type='eppo', dbt_model_prefix=None):
+    """
+    Return the RevisionDiff of the definitions under `directory` from
+    `revision_a` to `revision_b`. Raises ValueError if a revision does not
+    exist or a changed file cannot be parsed.
+    """
+    # imported here so that importing this module does not load the schema
+    from eppo_metrics_sync.eppo_metrics_sync import SCHEMA_TYPES, EppoMetricsSync
+
+    if schema_type not in SCHEMA_TYPES:
+        raise ValueError(f'Unexpected schema_type: {schema_type}')
+    if schema_type != 'eppo' and not dbt_model_prefix:
+        raise ValueError(f'Must specify dbt_model_prefix when schema_type={schema_type}')
+
+    top_level = os.path.realpath(run_git(['rev-parse', '--show-toplevel'], directory).strip())
+    extensions = YAML_EXTENSIONS if schema_type == 'dbt-model' else DEFINITION_EXTENSIONS
+    blobs_a = tree_blobs(directory, revision_a, extensions)
+    blobs_b = tree_blobs(directory, revision_b, extensions)
+    all_files = set(blobs_a) | set(blobs_b)
+    changed = sorted(path for path in all_files if blobs_a.get(path) != blobs_b.get(path))
+
+    # what a file includes may have changed even if the file did not; if
+    # nothing changed, neither did any fragment
+    including = set()
+    if changed:
+        including = files_containing(directory, revision_a, INCLUDE_KEY) | files_containing(directory, revision_b, INCLUDE_KEY)
+    read = sorted(set(changed) | (including & all_files))
+
+    eppo_metrics_sync = EppoMetricsSync(directory=directory, schema_type=schema_type, dbt_model_prefix=dbt_model_prefix)
+    with BlobReader(directory) as reader:
+        old = _read_revision(
+            eppo_metrics_sync, reader, top_level, revision_a, blobs_a, [p for p in read if p in blobs_a]
+        )
+        new = _read_revision(
+            eppo_metrics_sync, reader, top_level, revision_b, blobs_b, [p for p in read if p in blobs_b]
+        )
+    return RevisionDiff(revision_a, revision_b, diff_objects(old, new), changed, len(all_files))
@@ -0,0 +1,216 @@
+"""
+Compile schema/eppo_metric_schema.json into specialized Python validation
+code, written to _schema_validator.py.
+
+The generated `is_valid(data)` function only accepts or rejects; error
+messages still come from jsonschema, which is only consulted for data the
+generated code rejects. Regenerate after changing the schema with
+
+    python -m eppo_metrics_sync.schema_codegen
+
+The generated module records the SHA-256 of the schema it was compiled
+from and is ignored at runtime if the schema no longer matches.
+"""
+import hashlib
+import json
+import os
+
+PACKAGE_ROOT = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_PATH = os.path.join(PACKAGE_ROOT, 'schema', 'eppo_metric_schema.json')
+GENERATED_PATH = os.path.join(PACKAGE_ROOT, '_schema_validator.py')
+
+# keywords that only annotate and never affect validation
+ANNOTATION_KEYWORDS = frozenset(['$schema', '$id', 'title', 'description', 'value'])
+
+SUPPORTED_KEYWORDS = frozenset([
+    'type', 'enum', 'minimum', 'maximum', 'minItems', 'properties', 'required',
+    'additionalProperties', 'items',
+]) | ANNOTATION_KEYWORDS
+
+# mirrors the draft 2020-12 type checker used by jsonschema
+TYPE_CHECKS = {
+    'object': 'isinstance(data, dict)',
+    'array': 'isinstance(data, list)',
+    'string': 'isinstance(data, str)',
+    'boolean': 'isinstance(data, bool)',
+    'null': 'data is None',
+    'number': '_is_number(data)',
+    'integer': '_is_integer(data)',
+}
+
+HEADER = '''"""
+Generated by eppo_metrics_sync.schema_codegen from
+schema/eppo_metric_schema.json. Do not edit by hand; run
+
+    python -m eppo_metrics_sync.schema_codegen
+
+after changing the schema.
+"""
+from numbers import Number
+
+SCHEMA_SHA256 = {sha256!r}
+
+
+def _is_number(data):
+    if type(data) is int or type(data) is float:
+        return True
+    return isinstance(data, Number) and not isinstance(data, bool)
+
+
+def _is_integer(data):
+    if isinstance(data, bool):
+        return False
+    if isinstance(data, int):
+        return True
+    return isinstance(data, float) and data.is_integer()
+
+
+def _accept(data):
+    return True
+'''
+
+
+class _Compiler:
+    """
+    Emits one function per distinct sub-schema. Sub-schemas compiling to
+    the same code (e.g. every plain string property) share a function.
+    """
+
+    def __init__(self):
+        self.functions = {}
+        self.constants = {}
+
+    def _function(self, body):
+        if body not in self.functions:
+            self.functions[body] = f'_validate_{len(self.functions)}'
+        return self.functions[body]
+
+    def _constant(self, value):
+        if value not in self.constants:
+            self.constants[value] = f'_PROPERTIES_{len(self.constants)}'
+        return self.constants[value]
+
+    def compile(self, schema, path):
+        """
+        Return the name of a function validating `schema`, or None if the
+        schema accepts everything.
+        """
+        unsupported = set(schema) - SUPPORTED_KEYWORDS
+        if unsupported:
+            raise NotImplementedError(
+                f"Unsupported schema keyword(s) at {path}: {', '.join(sorted(unsupported))}"
+            )
+        if not set(schema) - ANNOTATION_KEYWORDS:
+            return None
+
+        body = []
+        known_type = None
+
+        if 'type' in schema:
+            types = schema['type'] if isinstance(schema['type'], list) else [schema['type']]
+            if len(types) == 1:
+                known_type = types[0]
+            check = ' or '.join(TYPE_CHECKS[t] for t in types)
+            body.append(f'    if not ({check}):')
+            body.append('        return False')
+
+        if 'enum' in schema:
+            values = schema['enum']
+            if not all(isinstance(v, str) for v in values):
+                raise NotImplementedError(f'Only string enums are supported, at {path}')
+            # a str instance can only equal a str enum value; checking the type
+            # first also keeps unhashable instances away from the lookup
+            body.append(f'    if not (isinstance(data, str) and data in {tuple(values)!r}):')
+            body.append('        return False')
+
+        if 'minimum' in schema or 'maximum' in schema:
+            body.append('    if _is_number(data):')
+            if 'minimum' in schema:
+                body.append(f"        if data < {schema['minimum']!r}:")
+                body.append('            return False')
+            if 'maximum' in schema:
+                body.append(f"        if data > {schema['maximum']!r}:")
+                body.append('            return False')
+
+        if 'minItems' in schema:
+            body.append(f"    if isinstance(data, list) and len(data) < {schema['minItems']!r}:")
+            body.append('        return False')
+
+        properties = schema.get('properties', {})
+        required = schema.get('required', [])
+        additional = schema.get('additionalProperties', True)
+        if isinstance(additional, dict):
+            additional = self.compile(additional, f'{path}/additionalProperties') or True
+
+        if properties or required or additional is not True:
+            indent = '    '
+            if known_type != 'object':
+                body.append('    if isinstance(data, dict):')
+                indent = '        '
+            for key in required:
+                body.append(f'{indent}if {key!r} not in data:')
+                body.append(f'{indent}    return False')
+            entries = ', '.join(
+                f'{key!r}: {self.compile(sub_schema, f"{path}/properties/{key}") or "_accept"}'
+                for key, sub_schema in properties.items()
+            )
+            constant = self._constant(f'{{{entries}}}')
+            body.append(f'{indent}for key, value in data.items():')
+            if additional is False:
+                body.append(f'{indent}    validator = {constant}.get(key)')
+                body.append(f'{indent}    if validator is None or not validator(value):')
+            elif additional is True:
+                body.append(f'{indent}    validator = {constant}.get(key)')
+                body.append(f'{indent}    if validator is not None and not validator(value):')
+            else:
+                body.append(f'{indent}    if not {constant}.get(key, {additional})(value):')
+            body.append(f'{indent}        return False')
+
+        if 'items' in schema:
+            item_validator = self.compile(schema['items'], f'{path}/items')
+            if item_validator:
+                indent = '    '
+                if known_type != 'array':
+                    body.append('    if isinstance(data, list):')
+                    indent = '        '
+                body.append(f'{indent}for item in data:')
+                body.append(f'{indent}    if not {item_validator}(item):')
+                body.append(f'{indent}        return False')
+
+        body.append('    return True')
+        return self._function('\n'.join(body))
+
+
+def generate_validator_source(schema, sha256):
+    compiler = _Compiler()
+    root = compiler.compile(schema, '#')
+    parts = [HEADER.format(sha256=sha256)]
+    parts.extend(f'def {name}(data):\n{body}' for body, name in compiler.functions.items())
+    # constants reference the functions, so they come after them
+    parts.append('\n'.join(f'{name} = {value}' for value, name in compiler.constants.items()))
+    if root:
+        parts.append(f'def is_valid(data):\n    return {root}(data)')
+    else:
+        parts.append('def is_valid(data):\n    return True')
+    return '\n\n\n'.join(parts) + '\n'
+
+
+def schema_sha256(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def generate():
+    with open(SCHEMA_PATH, 'rb') as schema_file:
+        content = schema_file.read()
+    return generate_validator_source(json.loads(content), schema_sha256(content))
+
+
+def main():
+    source = generate()
+    with open(GENERATED_PATH, 'w') as generated_file:
+        generated_file.write(source)
+    print(f'Wrote {GENERATED_PATH}')
+
+
+if __name__ == '__main__':
+    main()
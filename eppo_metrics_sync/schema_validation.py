@@ -0,0 +1,74 @@
+"""
+Schema validation of eppo definition files.
+
+`jsonschema.validate` checks the schema and builds a validator on every
+call. SchemaValidator does both once, and accepts data through the code
+generated by schema_codegen when it was compiled from the same schema.
+jsonschema only runs for data the generated code rejects, so error
+messages are unchanged.
+
+ObjectErrorCache remembers the schema errors of single fact sources,
+metrics and metric templates by content hash, so an unchanged object is
+validated once however many files or (with an index) runs it appears in.
+"""
+import json
+
+import jsonschema
+
+from eppo_metrics_sync import _schema_validator
+from eppo_metrics_sync.schema_codegen import SCHEMA_PATH, schema_sha256
+
+
+class SchemaValidator:
+    def __init__(self, schema, sha256=None):
+        validator_class = jsonschema.validators.validator_for(schema)
+        validator_class.check_schema(schema)
+        self.schema = schema
+        self.validator = validator_class(schema)
+        self.compiled = sha256 is not None and sha256 == _schema_validator.SCHEMA_SHA256
+        self.is_valid = _schema_validator.is_valid if self.compiled else self.validator.is_valid
+
+    def error(self, data):
+        """
+        Return the ValidationError jsonschema.validate would raise for
+        `data`, or None if it is valid.
+        """
+        if self.is_valid(data):
+            return None
+        return jsonschema.exceptions.best_match(self.validator.iter_errors(data))
+
+
+_validators = {}
+
+
+def schema_validator_for(content):
+    """
+    Return a SchemaValidator for the given schema file content, shared by
+    everything validating against the same schema.
+    """
+    sha256 = schema_sha256(content)
+    if sha256 not in _validators:
+        _validators[sha256] = SchemaValidator(json.loads(content), sha256)
+    return _validators[sha256]
+
+
+def bundled_schema_validator():
+    with open(SCHEMA_PATH, 'rb') as schema_file:
+        return schema_validator_for(schema_file.read())
+
+
+class ObjectErrorCache:
+    def __init__(self):
+        # (document key, content hash) -> error message, or None if valid
+        self.results = {}
+        # the keys looked up or added in this run
+        self.used = set()
+
+    def get(self, key, compute):
+        """
+        Return the cached result for `key`, calling compute() on a miss.
+        """
+        self.used.add(key)
+        if key not in self.results:
+            self.results[key] = compute()
+        return self.results[key]
@@ -0,0 +1,115 @@
+"""
+Validation split across CI nodes.
+
+Each shard fully validates a deterministic subset of the files and writes
+a summary of what it found: name/reference summaries of its objects (see
+summary.py) and its validation errors. Merging the summaries of all
+shards runs the cross-file rules over the whole repository without
+reparsing anything.
+"""
+import hashlib
+import json
+
+from eppo_metrics_sync.summary import CrossFileView
+from eppo_metrics_sync.validation import (
+    unique_names,
+    valid_fact_references,
+    valid_guardrail_cutoff_signs
+)
+
+SUMMARY_FORMAT = 'eppo-metrics-sync-shard-summary'
+SUMMARY_VERSION = 1
+
+
+def parse_shard(value):
+    """
+    Parse 'i/n' (1 <= i <= n) into an (i, n) tuple.
+    """
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{value}', expected i/n, e.g. 1/4")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{value}', expected 1 <= i <= n")
+    return index, count
+
+
+def shard_of(relative_path, count):
+    """
+    Return the 1-based shard a file belongs to. Based on a hash of its
+    path relative to the scanned directory, so every node agrees.
+    """
+    digest = hashlib.sha256(relative_path.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+
+def files_fingerprint(relative_paths):
+    """
+    A hash of the complete file list, recorded by every shard so merge can
+    check that all shards partitioned the same files.
+    """
+    return hashlib.sha256('\n'.join(sorted(relative_paths)).encode('utf-8')).hexdigest()
+
+
+def write_summary(path, summary):
+    with open(path, 'w') as summary_file:
+        json.dump(summary, summary_file, separators=(',', ':'))
+
+
+def read_summary(path):
+    try:
+        with open(path) as summary_file:
+            summary = json.load(summary_file)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Unable to read shard summary '{path}': {e}")
+    if not isinstance(summary, dict) or summary.get('format') != SUMMARY_FORMAT:
+        raise ValueError(f"'{path}' is not a shard summary")
+    if summary.get('version') != SUMMARY_VERSION:
+        raise ValueError(
+            f"Unsupported shard summary version {summary.get('version')} in '{path}', expected {SUMMARY_VERSION}"
+        )
+    return summary
+
+
+def check_complete(summaries):
+    """
+    Raise a ValueError unless the summaries are exactly shards 1..n of the
+    same file list and settings.
+    """
+    if not summaries:
+        raise ValueError('No shard summaries given')
+    first = summaries[0]
+    for summary in summaries[1:]:
+        for key in ('shard_count', 'files_fingerprint', 'schema_type'):
+            if summary[key] != first[key]:
+                raise ValueError(
+                    f"Shard summaries disagree on {key}: {first[key]!r} != {summary[key]!r}"
+                )
+    indexes = sorted(summary['shard'] for summary in summaries)
+    expected = list(range(1, first['shard_count'] + 1))
+    if indexes != expected:
+        missing = sorted(set(expected) - set(indexes))
+        duplicated = sorted({i for i in indexes if indexes.count(i) > 1})
+        raise ValueError(
+            f"Expected shards 1 to {first['shard_count']} once each; "
+            f"missing: {missing or 'none'}, duplicated: {duplicated or 'none'}"
+        )
+
+
+def merge_summaries(summaries):
+    """
+    Run the cross-file rules over the combined shard summaries. Returns a
+    CrossFileView whose validation_errors hold the errors found by the
+    shards followed by those of the cross-file rules.
+    """
+    check_complete(summaries)
+    summaries = sorted(summaries, key=lambda s: s['shard'])
+    view = CrossFileView(
+        [f for s in summaries for f in s['fact_sources']],
+        [m for s in summaries for m in s['metrics']],
+        [e for s in summaries for e in s['validation_errors']]
+    )
+    unique_names(view)
+    valid_fact_references(view)
+    valid_guardrail_cutoff_signs(view)
+    return view
@@ -0,0 +1,188 @@
+"""
+Immutable snapshots of a parsed repository, for long-running services.
+
+EppoMetricsSync accumulates state on the instance and rewrites names in
+place when a sync prefix is used, so it is good for one run. A
+RepositorySnapshot is read once and can then be validated, derived and
+synced from any number of threads at the same time:
+
+    snapshot = read_snapshot('metrics/')
+    report = snapshot.validate()
+    if report.passed:
+        snapshot.sync(sync_prefix='staging')
+
+Definitions are frozen into read-only mappings and tuples. Deriving a
+snapshot (e.g. with_prefix) copies only the objects that change and
+shares everything below them with the original. Plain dicts and lists
+are only built by to_payload, at the point they are serialized.
+"""
+from collections import namedtuple
+from types import MappingProxyType
+
+from eppo_metrics_sync.api import sync_definitions
+from eppo_metrics_sync.instrumentation import NULL_RECORDER
+from eppo_metrics_sync.summary import CrossFileView
+from eppo_metrics_sync.validation import RULES
+
+
+def freeze(value):
+    """
+    Return a read-only copy of parsed YAML/JSON data.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """
+    Return a plain dict/list copy of frozen data.
+    """
+    if isinstance(value, MappingProxyType):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+class ValidationIssue(namedtuple('ValidationIssue', ['rule', 'message'])):
+    """
+    One validation error; rule is 'schema' for errors found while reading,
+    'empty', or one of the RULES.
+    """
+
+
+class ValidationReport:
+    def __init__(self, issues):
+        self.issues = tuple(issues)
+
+    @property
+    def passed(self):
+        return not self.issues
+
+    @property
+    def errors(self):
+        return tuple(issue.message for issue in self.issues)
+
+    def raise_for_errors(self):
+        """
+        Raise the ValueError EppoMetricsSync.validate raises for the same
+        errors, if there are any.
+        """
+        if self.issues:
+            error_message = f"Validation failed with {len(self.issues)} error(s): \n"
+            error_message += '\n'.join(self.errors)
+            raise ValueError(error_message)
+
+
+class RepositorySnapshot:
+    def __init__(self, fact_sources, metrics, read_errors=()):
+        self._fact_sources = freeze(list(fact_sources))
+        self._metrics = freeze(list(metrics))
+        self._read_errors = tuple(read_errors)
+
+    @classmethod
+    def _derived(cls, fact_sources, metrics, read_errors):
+        # the parts are frozen already, so they are shared rather than copied
+        snapshot = cls.__new__(cls)
+        snapshot._fact_sources = fact_sources
+        snapshot._metrics = metrics
+        snapshot._read_errors = read_errors
+        return snapshot
+
+    @property
+    def fact_sources(self):
+        return self._fact_sources
+
+    @property
+    def metrics(self):
+        return self._metrics
+
+    @property
+    def read_errors(self):
+        """
+        Schema and parse errors of the files the snapshot was read from.
+        """
+        return self._read_errors
+
+    def with_prefix(self, sync_prefix):
+        """
+        The snapshot with `[sync_prefix] ` prepended to every fact source
+        and metric name, as synced with a sync prefix.
+        """
+        def prefixed(objects):
+            return tuple(
+                MappingProxyType({**obj, 'name': f"[{sync_prefix}] {obj['name']}"}) for obj in objects
+            )
+
+        return self._derived(prefixed(self._fact_sources), prefixed(self._metrics), self._read_errors)
+
+    def validate(self):
+        """
+        Run the cross-file and aggregation rules and return a
+        ValidationReport that also holds the errors found while reading.
+        Nothing is modified, so any number of threads can validate at once.
+        """
+        issues = [ValidationIssue('schema', message) for message in self._read_errors]
+        if not self._fact_sources and not self._metrics:
+            issues.append(ValidationIssue('empty', 'No fact sources or metrics found'))
+        for rule, check, _ in RULES:
+            view = CrossFileView(self._fact_sources, self._metrics, [])
+            check(view)
+            issues.extend(ValidationIssue(rule, message) for message in view.validation_errors)
+        return ValidationReport(issues)
+
+    def to_payload(self):
+        """
+        A fresh, JSON serializable {'fact_sources': [...], 'metrics': [...]}
+        that the caller is free to modify.
+        """
+        return {'fact_sources': thaw(self._fact_sources), 'metrics': thaw(self._metrics)}
+
+    def sync(self, sync_prefix=None, allow_upgrades=False, recorder=NULL_RECORDER, coordinator=None):
+        """
+        Validate and sync the snapshot, with names prefixed if a
+        sync_prefix is given. Raises ValueError if validation fails.
+        """
+        snapshot = self.with_prefix(sync_prefix) if sync_prefix is not None else self
+        snapshot.validate().raise_for_errors()
+        payload = snapshot.to_payload()
+        if coordinator is not None:
+            from eppo_metrics_sync.coordination import coordinated_sync
+            return coordinated_sync(
+                coordinator,
+                payload['fact_sources'],
+                payload['metrics'],
+                sync_prefix=sync_prefix,
+                allow_upgrades=allow_upgrades,
+                recorder=recorder
+            )
+        return sync_definitions(
+            payload['fact_sources'],
+            payload['metrics'],
+            sync_prefix=sync_prefix,
+            allow_upgrades=allow_upgrades,
+            recorder=recorder
+        )
+
+
+def read_snapshot(directory, **options):
+    """
+    Read a directory into a RepositorySnapshot. `options` are passed to
+    EppoMetricsSync (schema_type, dbt_model_prefix, include, exclude,
+    index_path, ...). Files that fail to parse or validate are left out
+    and reported in read_errors.
+    """
+    # imported here so that snapshots can be used without yaml and jsonschema
+    from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+
+    eppo_metrics_sync = EppoMetricsSync(directory=directory, **options)
+    try:
+        eppo_metrics_sync.read_yaml_files()
+    except ValueError as e:
+        # no definitions is reported by validate(), anything else is an error
+        if not str(e).startswith('No valid yaml files found'):
+            raise
+    return eppo_metrics_sync.snapshot()
@@ -0,0 +1,61 @@
+"""
+Lightweight name/reference summaries of fact sources and metrics.
+
+A summary keeps only what the cross-file rules in validation.py look at
+(declared names, fact references and guardrail/desired_change data), in
+the same shape as the full definitions, so the rules can run over a mix
+of fully loaded objects and summaries.
+"""
+
+AGGREGATION_KEYS = ('numerator', 'denominator', 'percentile')
+
+METRIC_SUMMARY_KEYS = ('type', 'is_guardrail', 'guardrail_cutoff', 'desired_change')
+
+
+def summarize_fact_source(fact_source):
+    summary = {
+        'name': fact_source.get('name'),
+        'facts': [],
+    }
+    for fact in fact_source.get('facts') or []:
+        fact_summary = {'name': fact.get('name')}
+        if 'desired_change' in fact:
+            fact_summary['desired_change'] = fact['desired_change']
+        summary['facts'].append(fact_summary)
+    if 'properties' in fact_source:
+        summary['properties'] = [
+            {'name': p.get('name')} for p in fact_source['properties'] or []
+        ]
+    return summary
+
+
+def summarize_metric(metric):
+    summary = {'name': metric.get('name')}
+    for key in METRIC_SUMMARY_KEYS:
+        if key in metric:
+            summary[key] = metric[key]
+    for key in AGGREGATION_KEYS:
+        if isinstance(metric.get(key), dict) and 'fact_name' in metric[key]:
+            summary[key] = {'fact_name': metric[key]['fact_name']}
+    return summary
+
+
+def summarize(fact_sources, metrics):
+    return {
+        'fact_sources': [summarize_fact_source(f) for f in fact_sources if isinstance(f, dict)],
+        'metrics': [summarize_metric(m) for m in metrics if isinstance(m, dict)],
+    }
+
+
+class CrossFileView:
+    """
+    Exposes the attributes the cross-file rules in validation.py read
+    (fact_sources, metrics, validation_errors) over fully loaded objects
+    plus summaries of objects that were not loaded. Errors are appended to
+    the list that was passed in.
+    """
+
+    def __init__(self, fact_sources, metrics, validation_errors):
+        self.fact_sources = fact_sources
+        self.metrics = metrics
+        self.validation_errors = validation_errors
@@ -0,0 +1,124 @@
+"""
+Expansion of metric templates.
+
+A metric template is a metric definition whose strings may contain
+`{parameter}` placeholders, plus a matrix of parameter values:
+
+    metric_templates:
+      - parameters:
+          region: [us, eu]
+          platform: [ios, android]
+        template:
+          name: Purchases ({region}, {platform})
+          entity: User
+          numerator:
+            fact_name: purchases_{platform}
+            operation: sum
+
+A metric is generated for every combination of parameter values. A string
+that is exactly one placeholder takes the parameter value as is, so
+numbers and booleans keep their type; elsewhere values are formatted into
+the string. Braces that do not name a parameter are an error.
+
+Templates are compiled once. Each sub-structure is built once per
+combination of the parameters it actually uses and then shared between
+variants, e.g. an aggregation that only depends on {platform} is the
+same object in every region's metrics.
+"""
+import itertools
+import re
+
+PLACEHOLDER = re.compile(r'\{(\w+)\}')
+
+
+class TemplateError(ValueError):
+    pass
+
+
+def _compile(node, parameter_names, path, memoize=True):
+    """
+    Return (parameters used, build) where build(values, positions) returns
+    `node` with the placeholders replaced, or (empty set, node) if it has
+    none. positions maps each parameter to the index of its current value.
+    """
+    if isinstance(node, str):
+        used = PLACEHOLDER.findall(node)
+        if not used:
+            return frozenset(), node
+        unknown = sorted(set(used) - parameter_names)
+        if unknown:
+            raise TemplateError(f"Unknown template parameter(s) {', '.join(unknown)} in {path}")
+        whole = PLACEHOLDER.fullmatch(node)
+        if whole:
+            name = whole.group(1)
+            return frozenset([name]), lambda values, positions: values[name]
+        return frozenset(used), lambda values, positions: PLACEHOLDER.sub(lambda m: str(values[m.group(1)]), node)
+
+    if isinstance(node, dict):
+        children = {key: _compile(value, parameter_names, f'{path}.{key}') for key, value in node.items()}
+
+        def assemble(values, positions):
+            return {
+                key: build(values, positions) if used else build
+                for key, (used, build) in children.items()
+            }
+    elif isinstance(node, list):
+        children = {i: _compile(value, parameter_names, f'{path}[{i}]') for i, value in enumerate(node)}
+
+        def assemble(values, positions):
+            return [build(values, positions) if used else build for used, build in children.values()]
+    else:
+        return frozenset(), node
+
+    used = frozenset().union(*(child_used for child_used, _ in children.values()))
+    if not used:
+        return used, node
+
+    if not memoize:
+        return used, assemble
+
+    # keyed by value positions rather than values, which are cheaper to
+    # hash and keep True and 1 apart
+    names = sorted(used)
+    cache = {}
+
+    def build(values, positions):
+        key = tuple([positions[name] for name in names])
+        built = cache.get(key)
+        if built is None:
+            built = cache[key] = assemble(values, positions)
+        return built
+
+    return used, build
+
+
+class MetricTemplate:
+    def __init__(self, template, parameters):
+        if not isinstance(template, dict):
+            raise TemplateError('A metric template must be a mapping')
+        self.parameters = parameters
+        self.names = list(parameters)
+        # every variant gets its own top-level dict, as metrics are modified
+        # in place (e.g. to add a sync prefix); only sub-structures are shared
+        used, build = _compile(template, frozenset(self.names), 'template', memoize=False)
+        self._build = build if used else lambda values, positions: dict(template)
+
+    def __len__(self):
+        count = 1
+        for values in self.parameters.values():
+            count *= len(values)
+        return count
+
+    def variants(self):
+        """
+        Lazily yield (parameter values, metric) for every combination.
+        """
+        choices = [self.parameters[name] for name in self.names]
+        for combination in itertools.product(*(range(len(c)) for c in choices)):
+            positions = dict(zip(self.names, combination))
+            values = {name: c[i] for name, c, i in zip(self.names, choices, combination)}
+            yield values, self._build(values, positions)
+
+    def __iter__(self):
+        for _, metric in self.variants():
+            yield metric
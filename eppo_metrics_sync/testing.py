@@ -0,0 +1,323 @@
+"""
+A local fake of the Eppo sync API, for tests and benchmarks of the client.
+
+    with FakeEppoServer(latency=0.05, error_rate=0.1) as server:
+        os.environ['EPPO_API_HOST'] = server.host
+        ...
+    print(server.stats.summary())
+
+The fake keeps the definitions synced under each sync tag: POST replaces
+them and GET returns them with an ETag, empty for a tag nothing was
+synced to, as `plan` and `apply` expect. Whether the real API serves that
+GET is not documented.
+Responses can be slowed down (`latency`, plus up to `jitter`), fail at
+random (`error_rate`, answered with `error_status`), be rejected for size
+(`max_payload_bytes`, answered with 413) or throttled (`rate_limit`
+requests per second with a burst of `burst`, answered with 429 and a
+Retry-After header). Every request is counted in `stats`, and kept in
+`requests` with its parsed body unless `record_requests` is False, as it
+should be for load tests.
+
+It can also be run on its own, e.g. to point a real sync at it:
+
+    python -m eppo_metrics_sync.testing --port 8080 --latency 0.2
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from eppo_metrics_sync.api import SYNC_PATH
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class ServerStats:
+    """
+    Counts of the requests a FakeEppoServer handled. Timings are measured
+    on the server, from the request being read to the response being
+    written, and include the configured latency.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.statuses = Counter()
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.durations = []
+
+    def record(self, status, bytes_received, bytes_sent, duration):
+        with self._lock:
+            self.requests += 1
+            self.statuses[status] += 1
+            self.bytes_received += bytes_received
+            self.bytes_sent += bytes_sent
+            self.durations.append(duration)
+
+    def summary(self):
+        with self._lock:
+            durations = list(self.durations)
+            return {
+                'requests': self.requests,
+                'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+                'bytes_received': self.bytes_received,
+                'bytes_sent': self.bytes_sent,
+                'duration_p50': _percentile(durations, 0.5),
+                'duration_p95': _percentile(durations, 0.95),
+                'duration_max': max(durations) if durations else None,
+            }
+
+
+class _TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self):
+        """
+        Take a token and return 0, or return the seconds until one is free.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+
+class FakeEppoServer:
+    def __init__(
+            self,
+            latency=0.0,
+            jitter=0.0,
+            error_rate=0.0,
+            error_status=500,
+            max_payload_bytes=None,
+            rate_limit=None,
+            burst=1,
+            seed=None,
+            address='127.0.0.1',
+            port=0,
+            record_requests=True
+    ):
+        if not 0 <= error_rate <= 1:
+            raise ValueError(f'error_rate must be between 0 and 1, got {error_rate}')
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.max_payload_bytes = max_payload_bytes
+        self._bucket = _TokenBucket(rate_limit, burst) if rate_limit else None
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        # sync tag -> {'fact_sources': [...], 'metrics': [...]}
+        self.definitions = {}
+        # method, path, headers and parsed body of every request, if recorded
+        self.record_requests = record_requests
+        self.requests = []
+        self.stats = ServerStats()
+        self._server = ThreadingHTTPServer((address, port), _handler_for(self))
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def host(self):
+        """
+        The value for EPPO_API_HOST.
+        """
+        address, port = self._server.server_address[:2]
+        return f'http://{address}:{port}'
+
+    @property
+    def endpoint(self):
+        return f'{self.host}{SYNC_PATH}'
+
+    def start(self):
+        # a short poll interval keeps stop() quick
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _delay(self):
+        with self._random_lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _fails(self):
+        if not self.error_rate:
+            return False
+        with self._random_lock:
+            return self._random.random() < self.error_rate
+
+    def _record(self, method, path, headers, body):
+        recorded_body = None
+        if method == 'POST' and body:
+            try:
+                recorded_body = json.loads(body)
+            except ValueError:
+                # a malformed body is answered with 400 by _respond
+                recorded_body = body
+        with self._state_lock:
+            self.requests.append({
+                'method': method,
+                'path': path,
+                'headers': dict(headers),
+                'body': recorded_body,
+            })
+
+    def _respond(self, method, query, headers, body):
+        """
+        Return (status, response headers, response body) for a request.
+        """
+        if not headers.get('X-Eppo-Token'):
+            return 401, {}, {'error': 'Missing X-Eppo-Token'}
+        if self._bucket is not None:
+            wait = self._bucket.take()
+            if wait:
+                return 429, {'Retry-After': str(max(1, round(wait)))}, {'error': 'Too many requests'}
+        if self.max_payload_bytes is not None and len(body) > self.max_payload_bytes:
+            return 413, {}, {'error': f'Payload of {len(body)} bytes exceeds {self.max_payload_bytes}'}
+        self._delay()
+        if self._fails():
+            return self.error_status, {}, {'error': 'Injected failure'}
+
+        if method == 'GET':
+            sync_tag = (query.get('sync_tag') or [None])[0]
+            if not sync_tag:
+                return 400, {}, {'error': 'Missing sync_tag'}
+            with self._state_lock:
+                definitions = self.definitions.get(sync_tag, {'fact_sources': [], 'metrics': []})
+            content = json.dumps(definitions).encode('utf-8')
+            etag = '"' + hashlib.sha256(content).hexdigest() + '"'
+            if headers.get('If-None-Match') == etag:
+                return 304, {'ETag': etag}, None
+            return 200, {'ETag': etag}, content
+
+        try:
+            payload = json.loads(body)
+            sync_tag = payload['sync_tag']
+            definitions = {'fact_sources': payload['fact_sources'], 'metrics': payload['metrics']}
+        except (ValueError, TypeError, KeyError) as e:
+            return 400, {}, {'error': f'Invalid payload: {e}'}
+        with self._state_lock:
+            self.definitions[sync_tag] = definitions
+        return 200, {}, {}
+
+
+def _handler_for(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _handle(self, method):
+            start = time.perf_counter()
+            url = urlparse(self.path)
+            body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            if server.record_requests:
+                server._record(method, self.path, self.headers, body)
+
+            if url.path != SYNC_PATH:
+                status, headers, content = 404, {}, {'error': f'No such path {url.path}'}
+            else:
+                status, headers, content = server._respond(method, parse_qs(url.query), self.headers, body)
+            if isinstance(content, dict):
+                content = json.dumps(content).encode('utf-8')
+            content = content or b''
+
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            if status != 304:
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            if status != 304:
+                self.wfile.write(content)
+            server.stats.record(status, len(body), len(content), time.perf_counter() - start)
+
+        def do_GET(self):
+            self._handle('GET')
+
+        def do_POST(self):
+            self._handle('POST')
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m eppo_metrics_sync.testing',
+        description="Serve a local fake of the Eppo sync API until interrupted, then print request statistics"
+    )
+    parser.add_argument("--address", default='127.0.0.1')
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many more seconds, at random")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail")
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--max-payload-bytes", type=int, default=None)
+    parser.add_argument("--rate-limit", type=float, default=None, help="Requests per second before throttling")
+    parser.add_argument("--burst", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    server = FakeEppoServer(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        max_payload_bytes=args.max_payload_bytes,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+        seed=args.seed,
+        address=args.address,
+        port=args.port,
+        # only the statistics are reported, and a long run would hold every payload
+        record_requests=False
+    )
+    print(f"Serving a fake Eppo API, set EPPO_API_HOST={server.host}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+    print(json.dumps(server.stats.summary(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 from collections import Counter
+from functools import lru_cache
 
 advanced_aggregation_parameters = [
     'retention_threshold_days',
@@ -17,6 +18,26 @@ timeframe_parameters = [
     'aggregation_timeframe_unit'
 ]
 
+valid_operations = frozenset([
+    'sum', 'count', 'count_distinct', 'distinct_entity', 'threshold', 'retention',
+    'conversion', 'last_value', 'first_value'
+])
+
+# can only winsorize these operations
+winsorizable_operations = frozenset(['sum', 'count', 'count_distinct', 'last_value', 'first_value'])
+
+advanced_operations = frozenset(['threshold', 'retention', 'conversion'])
+
+# aggregation_is_valid only looks at the operation and at which of these
+# parameters are present, so (operation, presence bitmask) identifies the result
+signature_parameters = tuple(
+    advanced_aggregation_parameters
+    + winsorization_parameters
+    + timeframe_parameters
+    + ['aggregation_timeframe_value']
+)
+signature_bits = {name: 1 << bit for bit, name in enumerate(signature_parameters)}
+
 
 def check_for_duplicated_names(payload, names, object_name):
     element_counts = Counter(names)
@@ -177,17 +198,45 @@ def distinct_advanced_aggregation_parameter_set(
             )
 
 
+def aggregation_signature(aggregation):
+    mask = 0
+    # aggregations have a handful of keys, fewer than signature_parameters
+    for key in aggregation:
+        mask |= signature_bits.get(key, 0)
+    return aggregation['operation'], mask
+
+
+@lru_cache(maxsize=None)
+def _aggregation_errors_for_signature(operation, mask):
+    canonical = {'operation': operation}
+    for bit, name in enumerate(signature_parameters):
+        if mask & (1 << bit):
+            canonical[name] = None
+    return _aggregation_errors(canonical)
+
+
 def aggregation_is_valid(aggregation):
+    """
+    Identical aggregation configurations are common (the same operation
+    and parameters across many metrics), so results are memoized by
+    aggregation_signature and each distinct configuration is checked once.
+    """
+    try:
+        return _aggregation_errors_for_signature(*aggregation_signature(aggregation))
+    except TypeError:
+        # unhashable operation value, check it directly
+        return _aggregation_errors(aggregation)
+
+
+def _aggregation_errors(aggregation):
     error_message = []
 
-    if aggregation['operation'] not in ['sum', 'count', 'count_distinct', 'distinct_entity', 'threshold', 'retention',
-                                        'conversion', 'last_value', 'first_value']:
+    if aggregation['operation'] not in valid_operations:
         error_message.append(
             'Invalid aggregation operation: ' + aggregation['operation']
         )
 
-    # can only winsorize operations in the list immediately following this line
-    if aggregation['operation'] not in ['sum', 'count', 'count_distinct', 'last_value', 'first_value']:
+    if aggregation['operation'] not in winsorizable_operations:
         if [name for name in winsorization_parameters if name in aggregation]:
             error_message.append(
                 'Cannot winsorize a metric with operation ' + aggregation['operation']
@@ -208,7 +257,7 @@ def aggregation_is_valid(aggregation):
         )
 
     # only set timeframe_parameters on some operation types
-    if aggregation['operation'] in ['conversion']:
+    if aggregation['operation'] == 'conversion':
         matched = [p for p in timeframe_parameters if p in aggregation]
         if matched:
             error_message.append(
@@ -216,7 +265,7 @@ def aggregation_is_valid(aggregation):
             )
 
     # can't specify advanced aggregation parameters for simple aggregation types
-    if aggregation['operation'] not in ['threshold', 'retention', 'conversion']:
+    if aggregation['operation'] not in advanced_operations:
         matched = [p for p in advanced_aggregation_parameters if p in aggregation]
         if matched:
             error_message.append(
@@ -281,3 +330,15 @@ def percentile_metric_is_valid(metric):
         return '\n'.join(error_message)
     else:
         return None
+
+
+# (name, check, whether it compares objects across files) of the rules run
+# over a complete set of definitions, in order; every check appends its
+# errors to the validation_errors of its argument
+RULES = (
+    ('unique_names', unique_names, True),
+    ('fact_references', valid_fact_references, True),
+    ('aggregations', metric_aggregation_is_valid, False),
+    ('guardrail_cutoff_signs', valid_guardrail_cutoff_signs, True),
+    ('experiment_computation', valid_experiment_computation, False),
+)
@@ -0,0 +1,94 @@
+import os
+import subprocess
+
+import pytest
+
+from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+from eppo_metrics_sync.testing import FakeEppoServer
+
+
+def fact_source(name='purchases', fact='revenue'):
+    return (
+        f"fact_sources:\n"
+        f"  - name: {name}\n"
+        f"    sql: SELECT * FROM {name}\n"
+        f"    timestamp_column: ts\n"
+        f"    entities:\n"
+        f"      - entity_name: User\n"
+        f"        column: user_id\n"
+        f"    facts:\n"
+        f"      - name: {fact}\n"
+        f"        column: amount\n"
+    )
+
+
+FACT_SOURCE = fact_source()
+
+
+def metric_item(name, operation='sum', fact='revenue'):
+    """
+    A metric as an item of a `metrics` list, to put several in one file.
+    """
+    return (
+        f"  - name: {name}\n"
+        f"    entity: User\n"
+        f"    numerator:\n"
+        f"      fact_name: {fact}\n"
+        f"      operation: {operation}\n"
+    )
+
+
+def metric(name, operation='sum', fact='revenue'):
+    return 'metrics:\n' + metric_item(name, operation, fact)
+
+
+def write_file(directory, path, content):
+    path = os.path.join(directory, path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+def write_files(directory, files):
+    """
+    Write {relative path: content} under `directory`; a None content
+    removes the file.
+    """
+    for path, content in files.items():
+        if content is None:
+            os.remove(os.path.join(directory, path))
+        else:
+            write_file(directory, path, content)
+
+
+def read_definitions(directory, **kwargs):
+    eppo_metrics_sync = EppoMetricsSync(directory=directory, **kwargs)
+    eppo_metrics_sync.read_yaml_files()
+    return eppo_metrics_sync
+
+
+def git(repo, *args):
+    return subprocess.run(
+        ['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args],
+        cwd=repo, check=True, stdout=subprocess.PIPE, text=True
+    ).stdout.strip()
+
+
+@pytest.fixture
+def api_server():
+    with FakeEppoServer() as server:
+        yield server.host, server.requests
+
+
+@pytest.fixture
+def remote_api(monkeypatch):
+    """
+    A stateful stand-in for the sync endpoint: POST replaces the contents
+    of a sync tag and GET returns them, honouring If-None-Match.
+    """
+    with FakeEppoServer() as server:
+        monkeypatch.setenv('EPPO_API_HOST', server.host)
+        monkeypatch.setenv('EPPO_API_KEY', 'key')
+        monkeypatch.setenv('EPPO_SYNC_TAG', 'deploy')
+        monkeypatch.delenv('EPPO_REFERENCE_URL', raising=False)
+        yield {'definitions': server.definitions, 'requests': server.requests}
@@ -0,0 +1,61 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from eppo_metrics_sync.batch import read_batch_file, run_batch
+from eppo_metrics_sync.cli import main
+
+
+@pytest.fixture
+def batch_file(tmp_path):
+    shutil.copytree('tests/yaml/valid', str(tmp_path / 'growth'))
+    shutil.copytree('tests/yaml/dbt/valid', str(tmp_path / 'warehouse'))
+    os.makedirs(str(tmp_path / 'empty'))
+    path = tmp_path / 'batch.yaml'
+    path.write_text(
+        "repositories:\n"
+        "  - directory: growth\n"
+        "    sync_prefix: growth\n"
+        "  - directory: warehouse\n"
+        "    name: warehouse\n"
+        "    schema: dbt-model\n"
+        "    dbt_model_prefix: warehouse.schema\n"
+        "  - directory: empty\n"
+    )
+    return str(path)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_report(batch_file, workers):
+    report = run_batch(read_batch_file(batch_file), workers=workers)
+
+    assert report['format'] == 'eppo-metrics-sync-batch-report'
+    assert (report['repositories'], report['failed'], report['passed']) == (3, 1, False)
+    growth, warehouse, empty = report['results']
+    assert growth['name'] == 'growth' and growth['passed'] and growth['metrics'] > 0
+    assert warehouse['schema_type'] == 'dbt-model' and warehouse['passed'] and warehouse['fact_sources'] > 0
+    assert not empty['passed']
+    assert empty['errors'][0].startswith('No valid yaml files found')
+    assert all(result['elapsed_seconds'] >= 0 for result in report['results'])
+
+
+def test_malformed_batch_file(tmp_path):
+    path = tmp_path / 'batch.yaml'
+    path.write_text("repositories:\n  - directory: growth\n    schema_type: eppo\n")
+
+    with pytest.raises(ValueError, match='unknown key\\(s\\): schema_type'):
+        read_batch_file(str(path))
+
+
+def test_cli(batch_file, tmp_path, capsys):
+    report_path = str(tmp_path / 'report.json')
+
+    with pytest.raises(ValueError, match='1 of 3 repositories failed validation'):
+        main(['batch', batch_file, '--report', report_path, '--workers', '1'])
+
+    with open(report_path) as f:
+        report = json.load(f)
+    assert [result['passed'] for result in report['results']] == [True, True, False]
+    assert 'warehouse: passed in' in capsys.readouterr().out
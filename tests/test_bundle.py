@@ -0,0 +1,87 @@
+import gzip
+import os
+import subprocess
+import sys
+
+import pytest
+
+from eppo_metrics_sync.bundle import read_bundle, write_bundle
+from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+
+
+def test_bundle_round_trip(tmp_path):
+    bundle_path = os.path.join(str(tmp_path), 'metrics.bundle')
+    eppo_metrics_sync = EppoMetricsSync(directory='tests/yaml/valid', sync_prefix='qa')
+    header = eppo_metrics_sync.build_bundle(bundle_path)
+
+    read_header, payload = read_bundle(bundle_path)
+
+    assert read_header == header
+    assert header['sync_prefix'] == 'qa'
+    assert payload['fact_sources'] == eppo_metrics_sync.fact_sources
+    assert payload['metrics'] == eppo_metrics_sync.metrics
+    assert all(m['name'].startswith('[qa] ') for m in payload['metrics'])
+
+
+def test_bundles_are_reproducible(tmp_path):
+    first = os.path.join(str(tmp_path), 'first.bundle')
+    second = os.path.join(str(tmp_path), 'second.bundle')
+    EppoMetricsSync(directory='tests/yaml/valid').build_bundle(first)
+    EppoMetricsSync(directory='tests/yaml/valid').build_bundle(second)
+
+    with open(first, 'rb') as f, open(second, 'rb') as g:
+        assert f.read() == g.read()
+
+
+def test_invalid_definitions_are_not_bundled(tmp_path):
+    bundle_path = os.path.join(str(tmp_path), 'metrics.bundle')
+    with pytest.raises(ValueError):
+        EppoMetricsSync(directory='tests/yaml/invalid').build_bundle(bundle_path)
+    assert not os.path.exists(bundle_path)
+
+
+def test_corrupted_bundle_is_rejected(tmp_path):
+    bundle_path = os.path.join(str(tmp_path), 'metrics.bundle')
+    write_bundle(bundle_path, [], [{'name': 'metric'}])
+
+    with gzip.open(bundle_path, 'rb') as f:
+        content = f.read()
+    with gzip.open(bundle_path, 'wb') as f:
+        f.write(content.replace(b'"name":"metric"', b'"name":"metrix"'))
+
+    with pytest.raises(ValueError, match='Checksum mismatch'):
+        read_bundle(bundle_path)
+
+
+def test_sync_bundle_without_yaml_or_jsonschema(tmp_path, api_server):
+    host, requests_received = api_server
+    bundle_path = os.path.join(str(tmp_path), 'metrics.bundle')
+    build = subprocess.run(
+        [sys.executable, '-m', 'eppo_metrics_sync', 'build', 'tests/yaml/valid', '--output', bundle_path],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    assert build.returncode == 0, build.stderr
+
+    script = (
+        "import sys\n"
+        "from eppo_metrics_sync.cli import main\n"
+        f"main(['sync', '--bundle', {bundle_path!r}])\n"
+        "assert 'yaml' not in sys.modules, 'yaml was imported'\n"
+        "assert 'jsonschema' not in sys.modules, 'jsonschema was imported'\n"
+    )
+    env = dict(os.environ, EPPO_API_HOST=host, EPPO_API_KEY='key', EPPO_SYNC_TAG='deploy')
+    result = subprocess.run(
+        [sys.executable, '-c', script],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env
+    )
+    assert result.returncode == 0, result.stderr
+    assert 'Metrics synced' in result.stdout
+
+    _, payload = read_bundle(bundle_path)
+    assert len(requests_received) == 1
+    assert requests_received[0]['path'] == '/api/v1/metrics/sync'
+    assert requests_received[0]['body'] == {
+        'sync_tag': 'deploy',
+        'fact_sources': payload['fact_sources'],
+        'metrics': payload['metrics'],
+    }
@@ -0,0 +1,89 @@
+import gzip
+import json
+import os
+import shutil
+
+import pytest
+
+from eppo_metrics_sync import cache
+from eppo_metrics_sync.cli import main
+from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+
+
+@pytest.fixture
+def checkouts(tmp_path):
+    """
+    The same definitions in two places, as on two CI machines.
+    """
+    first = str(tmp_path / 'first' / 'metrics')
+    second = str(tmp_path / 'second' / 'metrics')
+    shutil.copytree('tests/yaml/valid', first)
+    shutil.copytree('tests/yaml/valid', second)
+    return first, second
+
+
+def test_imported_cache_skips_parsing(checkouts, tmp_path, capsys):
+    first, second = checkouts
+    artifact = str(tmp_path / 'cache.gz')
+    main(['index', first, '--db', str(tmp_path / 'first.sqlite')])
+    main(['cache', 'export', artifact, '--db', str(tmp_path / 'first.sqlite')])
+
+    second_db = str(tmp_path / 'second.sqlite')
+    main(['cache', 'import', artifact, '--db', second_db])
+    capsys.readouterr()
+    eppo_metrics_sync = EppoMetricsSync(directory=second, index_path=second_db)
+    eppo_metrics_sync.read_yaml_files()
+
+    assert ': 0 file(s) parsed, ' in capsys.readouterr().out
+    expected = EppoMetricsSync(directory=second)
+    expected.read_yaml_files()
+    assert eppo_metrics_sync.fact_sources == expected.fact_sources
+    assert eppo_metrics_sync.metrics == expected.metrics
+
+
+def test_export_is_reproducible(checkouts, tmp_path):
+    db = str(tmp_path / 'index.sqlite')
+    main(['index', checkouts[0], '--db', db])
+
+    cache.export_cache(db, str(tmp_path / 'a.gz'))
+    cache.export_cache(db, str(tmp_path / 'b.gz'))
+
+    assert (tmp_path / 'a.gz').read_bytes() == (tmp_path / 'b.gz').read_bytes()
+
+
+def test_incompatible_cache_is_ignored(checkouts, tmp_path, monkeypatch, capsys):
+    db = str(tmp_path / 'index.sqlite')
+    artifact = str(tmp_path / 'cache.gz')
+    main(['index', checkouts[0], '--db', db])
+    main(['cache', 'export', artifact, '--db', db])
+
+    monkeypatch.setattr(cache, 'tool_version', lambda: '99.0.0')
+    target = str(tmp_path / 'target.sqlite')
+    main(['cache', 'import', artifact, '--db', target])
+
+    assert 'Ignoring' in capsys.readouterr().out
+    assert not os.path.exists(target)
+
+
+def test_corrupted_cache_is_rejected(checkouts, tmp_path):
+    db = str(tmp_path / 'index.sqlite')
+    artifact = str(tmp_path / 'cache.gz')
+    main(['index', checkouts[0], '--db', db])
+    header = cache.export_cache(db, artifact)
+
+    with gzip.open(artifact, 'rb') as f:
+        f.readline()
+        content = bytearray(f.read())
+    content[len(content) // 2] ^= 0xff
+    with gzip.open(artifact, 'wb') as f:
+        f.write(json.dumps(header).encode('utf-8') + b'\n' + bytes(content))
+
+    with pytest.raises(ValueError, match='Checksum mismatch'):
+        cache.import_cache(artifact, str(tmp_path / 'target.sqlite'))
+
+
+def test_not_a_cache(tmp_path):
+    (tmp_path / 'index.sqlite').write_text('not gzip')
+
+    with pytest.raises(ValueError, match='Unable to read cache artifact'):
+        cache.import_cache(str(tmp_path / 'index.sqlite'), str(tmp_path / 'target.sqlite'))
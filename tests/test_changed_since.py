@@ -0,0 +1,107 @@
+import os
+import re
+import shutil
+
+import pytest
+
+from eppo_metrics_sync.cli import DEFAULT_INDEX_PATH, main
+from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+from tests.conftest import git
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = str(tmp_path)
+    shutil.copytree('tests/yaml/valid', os.path.join(repo, 'metrics'))
+    git(repo, 'init', '-q', '-b', 'main')
+    git(repo, 'add', '.')
+    git(repo, 'commit', '-q', '-m', 'baseline')
+    return repo
+
+
+def test_only_changed_files_are_loaded(repo):
+    with open(os.path.join(repo, 'metrics', 'new_metric.yaml'), 'w') as f:
+        f.write("""metrics:
+  - name: Revenue per Upgrade
+    entity: User
+    numerator:
+      fact_name: Revenue
+      operation: sum
+    denominator:
+      fact_name: Upgrades
+      operation: count
+""")
+
+    eppo_metrics_sync = EppoMetricsSync(
+        directory=os.path.join(repo, 'metrics'),
+        changed_since='main'
+    )
+    eppo_metrics_sync.read_yaml_files()
+    eppo_metrics_sync.validate()
+
+    assert [m['name'] for m in eppo_metrics_sync.metrics] == ['Revenue per Upgrade']
+    assert eppo_metrics_sync.fact_sources == []
+    assert 'Revenue' in [f['name'] for f in eppo_metrics_sync.reference_fact_sources]
+
+
+def test_cross_file_errors_against_unchanged_files(repo):
+    with open(os.path.join(repo, 'metrics', 'new_metric.yaml'), 'w') as f:
+        f.write("""metrics:
+  - name: Total Revenue
+    entity: User
+    numerator:
+      fact_name: Missing Fact
+      operation: sum
+""")
+
+    eppo_metrics_sync = EppoMetricsSync(
+        directory=os.path.join(repo, 'metrics'),
+        changed_since='main'
+    )
+    eppo_metrics_sync.read_yaml_files()
+
+    with pytest.raises(ValueError) as excinfo:
+        eppo_metrics_sync.validate()
+
+    assert 'Metric names are not unique: Total Revenue' in str(excinfo.value)
+    assert re.search(r'Invalid fact reference\(s\): Missing Fact', str(excinfo.value))
+
+
+def test_deleted_fact_source_breaks_unchanged_metrics(repo):
+    git(repo, 'rm', '-q', 'metrics/global_kpis/net_subscriptions_fact_source.yaml')
+
+    eppo_metrics_sync = EppoMetricsSync(
+        directory=os.path.join(repo, 'metrics'),
+        changed_since='main'
+    )
+    eppo_metrics_sync.read_yaml_files()
+
+    with pytest.raises(ValueError, match=re.escape('Invalid fact reference(s): Net Subscriptions')):
+        eppo_metrics_sync.validate()
+
+
+def test_no_changes(repo):
+    eppo_metrics_sync = EppoMetricsSync(
+        directory=os.path.join(repo, 'metrics'),
+        changed_since='main'
+    )
+    eppo_metrics_sync.read_yaml_files()
+
+    assert eppo_metrics_sync.metrics == []
+    assert eppo_metrics_sync.validate()
+
+
+def test_cli_summarizes_unchanged_files_from_the_index(repo, monkeypatch, capsys):
+    monkeypatch.chdir(repo)
+    monkeypatch.setenv('EPPO_SYNC_TAG', 'test')
+    with open(os.path.join(repo, 'metrics', 'new_metric.yaml'), 'w') as f:
+        f.write('metrics:\n  - name: Upgrade Revenue\n    entity: User\n'
+                '    numerator:\n      fact_name: Revenue\n      operation: sum\n')
+
+    main(['metrics', '--dryrun', '--changed-since', 'main'])
+    main(['metrics', '--dryrun', '--changed-since', 'main'])
+
+    assert os.path.exists(os.path.join(repo, DEFAULT_INDEX_PATH))
+    cold, warm = [line for line in capsys.readouterr().out.splitlines() if line.startswith('Index ')]
+    assert ', 0 reused' in cold
+    assert ' 0 file(s) parsed' in warm
@@ -1,3 +1,4 @@
+import shutil
 import subprocess
 import pytest
 
@@ -20,3 +21,14 @@ def test_cli_dryrun_option(run_cli):
 def test_cli_invalid_directory(run_cli):
     result = run_cli(['tests/yaml/invalid'])
     assert result.returncode != 0
+
+def test_cli_directory_named_like_a_command(tmp_path, monkeypatch, capsys):
+    from eppo_metrics_sync.cli import main
+    shutil.copytree('tests/yaml/valid', str(tmp_path / 'build'))
+    monkeypatch.chdir(tmp_path)
+
+    with pytest.raises(SystemExit, match="'build' is both a command and a directory here"):
+        main(['build', '--dryrun'])
+
+    main(['./build', '--dryrun'])
+    assert 'Discovered 10 definition file(s)' in capsys.readouterr().out
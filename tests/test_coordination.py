@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+
+import pytest
+
+from eppo_metrics_sync.coordination import (
+    COALESCED,
+    SYNCED,
+    FileBackend,
+    MemoryBackend,
+    SyncCoordinator,
+    coordinated_sync,
+)
+from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+
+
+@pytest.fixture(params=['memory', 'file'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryBackend()
+    return FileBackend(os.path.join(str(tmp_path), 'locks'))
+
+
+def test_single_sync(backend):
+    sent = []
+    result = SyncCoordinator(backend).submit('deploy', {'n': 1}, sent.append, run_id='a')
+
+    assert sent == [{'n': 1}]
+    assert result.status == SYNCED
+    assert result.message == 'Run a synced'
+    assert backend.pending('deploy') == []
+
+
+def test_queued_syncs_are_coalesced(backend):
+    coordinator = SyncCoordinator(backend)
+    sent = []
+    first_sending = threading.Event()
+    release_first = threading.Event()
+
+    def send(payload):
+        sent.append(payload)
+        if payload == {'n': 0}:
+            first_sending.set()
+            release_first.wait(10)
+
+    results = {}
+
+    def run(n):
+        results[n] = coordinator.submit('deploy', {'n': n}, send, run_id=f'run-{n}')
+
+    first = threading.Thread(target=run, args=(0,))
+    first.start()
+    assert first_sending.wait(10)
+
+    queued = []
+    for n in range(1, 4):
+        # enqueue in order, so run-3 holds the newest payload
+        backend_pending = len(backend.pending('deploy'))
+        thread = threading.Thread(target=run, args=(n,))
+        thread.start()
+        queued.append(thread)
+        while len(backend.pending('deploy')) == backend_pending:
+            time.sleep(0.001)
+    release_first.set()
+    for thread in [first] + queued:
+        thread.join(10)
+
+    # one upload while the lock was held, then one for the whole queue
+    assert sent == [{'n': 0}, {'n': 3}]
+    assert results[0].status == SYNCED
+    assert results[3].status == SYNCED
+    for n in (1, 2):
+        assert results[n].status == COALESCED
+        assert results[n].message == f'Run run-{n} coalesced into run run-3'
+    assert backend.pending('deploy') == []
+
+
+def test_sync_tags_are_independent(backend):
+    coordinator = SyncCoordinator(backend)
+    sent = []
+    coordinator.submit('a', {'tag': 'a'}, sent.append)
+    coordinator.submit('b', {'tag': 'b'}, sent.append)
+
+    assert sent == [{'tag': 'a'}, {'tag': 'b'}]
+
+
+def test_failed_send_withdraws_the_run(backend):
+    def send(payload):
+        raise Exception('Request failed 500')
+
+    with pytest.raises(Exception, match='Request failed 500'):
+        SyncCoordinator(backend).submit('deploy', {'n': 1}, send)
+    assert backend.pending('deploy') == []
+
+
+def test_coordinated_sync(remote_api, tmp_path):
+    coordinator = SyncCoordinator(FileBackend(str(tmp_path)))
+    result = EppoMetricsSync(directory='tests/yaml/valid', coordinator=coordinator).sync()
+
+    assert result.status == SYNCED
+    posts = [r for r in remote_api['requests'] if r['method'] == 'POST']
+    assert len(posts) == 1
+    assert posts[0]['body']['sync_tag'] == 'deploy'
+
+
+@pytest.mark.parametrize('newer_url', ['https://ci.example.com/pipelines/2', ''])
+def test_coalesced_payloads_keep_their_reference_url(remote_api, monkeypatch, newer_url):
+    monkeypatch.setenv('EPPO_REFERENCE_URL', 'https://ci.example.com/pipelines/1')
+    backend = MemoryBackend()
+    enqueue = backend.enqueue
+
+    def enqueue_and_queue_newer(sync_tag, run_id, payload):
+        enqueue(sync_tag, run_id, payload)
+        # another pipeline queues a newer payload before this run gets the lock
+        enqueue(sync_tag, 'newer', dict(payload, metrics=[], reference_url=newer_url))
+
+    backend.enqueue = enqueue_and_queue_newer
+
+    result = coordinated_sync(SyncCoordinator(backend), [], [{'name': 'Revenue'}])
+
+    assert result.status == COALESCED
+    [post] = [r for r in remote_api['requests'] if r['method'] == 'POST']
+    assert post['body']['metrics'] == []
+    assert post['body'].get('reference_url', '') == newer_url
@@ -0,0 +1,116 @@
+import os
+
+from eppo_metrics_sync.discovery import discover_files, glob_to_regex
+from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+
+
+def write(root, relative, content=''):
+    path = os.path.join(root, relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+def relative_files(result, root):
+    return [os.path.relpath(f, root).replace(os.sep, '/') for f in result.files]
+
+
+def test_glob_to_regex():
+    assert glob_to_regex('*.yaml').match('a.yaml')
+    assert not glob_to_regex('*.yaml').match('dir/a.yaml')
+    assert glob_to_regex('**/*.yaml').match('dir/sub/a.yaml')
+    assert glob_to_regex('**/*.yaml').match('a.yaml')
+    assert glob_to_regex('legacy/**').match('legacy/a/b.yml')
+    assert glob_to_regex('metric_?.yml').match('metric_1.yml')
+
+
+def test_prunes_well_known_directories(tmp_path):
+    root = str(tmp_path)
+    write(root, 'metrics/a.yaml')
+    write(root, 'node_modules/pkg/b.yaml')
+    write(root, 'target/compiled.yml')
+    write(root, 'dbt_packages/dep/models.yml')
+    write(root, '.git/config.yaml')
+    write(root, 'README.md')
+
+    result = discover_files(root)
+
+    assert relative_files(result, root) == ['metrics/a.yaml']
+    assert result.considered == 1
+    assert result.skipped == 0
+    assert result.pruned_directories == 4
+
+
+def test_include_and_exclude(tmp_path):
+    root = str(tmp_path)
+    write(root, 'metrics/a.yaml')
+    write(root, 'metrics/b.yml')
+    write(root, 'metrics/legacy/c.yaml')
+    write(root, 'other/d.yaml')
+
+    result = discover_files(root, include=['metrics/**'], exclude=['metrics/legacy', '*.yml'])
+
+    assert relative_files(result, root) == ['metrics/a.yaml']
+    assert result.pruned_directories == 1
+    assert result.considered == 3
+    assert result.skipped == 2
+
+
+def test_leading_slash_anchors_globs(tmp_path):
+    root = str(tmp_path)
+    write(root, 'drafts/a.yaml')
+    write(root, 'teams/drafts/b.yaml')
+    write(root, 'teams/c.yaml')
+
+    assert relative_files(discover_files(root, exclude=['/drafts']), root) == ['teams/c.yaml', 'teams/drafts/b.yaml']
+    assert relative_files(discover_files(root, include=['/drafts/*']), root) == ['drafts/a.yaml']
+    assert relative_files(discover_files(root, exclude=['drafts/']), root) == ['teams/c.yaml']
+
+
+def test_include_reaches_pruned_directories_it_names(tmp_path):
+    root = str(tmp_path)
+    write(root, 'metrics/a.yaml')
+    write(root, 'target/generated/b.yaml')
+    write(root, 'node_modules/pkg/c.yaml')
+
+    assert relative_files(discover_files(root, include=['**/*.yaml']), root) == ['metrics/a.yaml']
+    assert relative_files(discover_files(root, include=['target/**']), root) == ['target/generated/b.yaml']
+
+
+def test_honours_ignore_files(tmp_path):
+    root = str(tmp_path)
+    write(root, '.gitignore', 'generated/\n*.tmp.yaml\n/build/\n')
+    write(root, 'team/.eppoignore', '# drafts are not synced\ndraft_*.yaml\n!draft_keep.yaml\n')
+    write(root, 'a.yaml')
+    write(root, 'b.tmp.yaml')
+    write(root, 'generated/c.yaml')
+    write(root, 'build/d.yaml')
+    write(root, 'team/build/e.yaml')
+    write(root, 'team/draft_x.yaml')
+    write(root, 'team/draft_keep.yaml')
+    write(root, 'team/final.yaml')
+
+    result = discover_files(root)
+
+    # /build/ is anchored to the root, so team/build/ is kept
+    assert relative_files(result, root) == [
+        'a.yaml', 'team/draft_keep.yaml', 'team/final.yaml', 'team/build/e.yaml'
+    ]
+    assert result.skipped == 2
+    assert result.pruned_directories == 2
+
+    result = discover_files(root, respect_gitignore=False)
+    assert 'generated/c.yaml' in relative_files(result, root)
+    assert 'team/draft_x.yaml' not in relative_files(result, root)
+
+
+def test_read_yaml_files_with_exclude():
+    eppo_metrics_sync = EppoMetricsSync(
+        directory='tests/yaml/valid',
+        exclude=['global_kpis']
+    )
+    eppo_metrics_sync.read_yaml_files()
+    eppo_metrics_sync.validate()
+
+    assert eppo_metrics_sync.discovery.pruned_directories == 1
+    assert not any('global_kpis' in f for f in eppo_metrics_sync.discovery.files)
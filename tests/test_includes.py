@@ -0,0 +1,159 @@
+import os
+import subprocess
+
+import pytest
+
+from eppo_metrics_sync import includes
+from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+from tests.conftest import read_definitions, write_file
+
+COMMON = """\
+entities:
+  user:
+    - entity_name: User
+      column: user_id
+aggregations:
+  winsorized_sum:
+    operation: sum
+    winsorization_upper_percentile: 0.99
+"""
+
+FACT_SOURCE = """\
+fact_sources:
+  - name: purchases
+    sql: SELECT * FROM purchases
+    timestamp_column: ts
+    entities:
+      $include: common/fragments.yaml#entities/user
+    facts:
+      - name: revenue
+        column: amount
+"""
+
+METRICS = """\
+metrics:
+  - name: Revenue
+    entity: User
+    numerator:
+      $include: ../common/fragments.yaml#aggregations/winsorized_sum
+      fact_name: revenue
+"""
+
+
+@pytest.fixture
+def metrics_dir(tmp_path):
+    directory = str(tmp_path / 'metrics')
+    write_file(directory, 'common/fragments.yaml', COMMON)
+    write_file(directory, 'purchases.yaml', FACT_SOURCE)
+    write_file(directory, 'metrics/revenue.yaml', METRICS)
+    return directory
+
+
+def test_includes_are_resolved(metrics_dir):
+    eppo_metrics_sync = read_definitions(metrics_dir)
+    eppo_metrics_sync.validate()
+
+    [fact_source] = eppo_metrics_sync.fact_sources
+    assert fact_source['entities'] == [{'entity_name': 'User', 'column': 'user_id'}]
+    [metric] = eppo_metrics_sync.metrics
+    assert metric['numerator'] == {
+        'operation': 'sum',
+        'winsorization_upper_percentile': 0.99,
+        'fact_name': 'revenue',
+    }
+
+
+def test_fragments_are_parsed_once(metrics_dir, monkeypatch):
+    write_file(metrics_dir, 'more.yaml', FACT_SOURCE.replace('purchases', 'refunds'))
+    loaded = []
+    load_yaml = includes.load_yaml
+    monkeypatch.setattr(includes, 'load_yaml', lambda path, *args: loaded.append(path) or load_yaml(path, *args))
+
+    eppo_metrics_sync = read_definitions(metrics_dir)
+
+    assert loaded == [os.path.realpath(os.path.join(metrics_dir, 'common', 'fragments.yaml'))]
+    # every inclusion is a copy of its own
+    first, second = eppo_metrics_sync.fact_sources
+    assert first['entities'] == second['entities']
+    assert first['entities'] is not second['entities']
+
+
+def test_dependencies_are_reported(metrics_dir):
+    result = EppoMetricsSync(directory=metrics_dir).read_file(os.path.join(metrics_dir, 'purchases.yaml'))
+
+    assert result['dependencies'] == [os.path.realpath(os.path.join(metrics_dir, 'common', 'fragments.yaml'))]
+
+
+def test_include_cycle(metrics_dir):
+    write_file(metrics_dir, 'common/a.yaml', 'x:\n  $include: b.yaml#y\n')
+    write_file(metrics_dir, 'common/b.yaml', 'y:\n  $include: a.yaml#x\n')
+    write_file(metrics_dir, 'cycle.yaml', 'metrics:\n  $include: common/a.yaml#x\n')
+
+    eppo_metrics_sync = read_definitions(metrics_dir)
+
+    errors = [e for e in eppo_metrics_sync.validation_errors if 'cycle.yaml' in e]
+    assert len(errors) == 1
+    assert 'Include cycle: ' in errors[0]
+    assert errors[0].count(' -> ') == 2
+
+
+@pytest.mark.parametrize('reference, message', [
+    ('common/missing.yaml', "Included file 'common/missing.yaml' not found"),
+    ('common/fragments.yaml#entities/admin', "Fragment 'entities/admin' not found in 'common/fragments.yaml'"),
+    ('#entities', 'Invalid $include'),
+    ('../secrets.yaml', "Included file '../secrets.yaml' is outside of"),
+])
+def test_include_errors(metrics_dir, reference, message):
+    write_file(os.path.dirname(metrics_dir), 'secrets.yaml', 'token: secret\n')
+    write_file(metrics_dir, 'broken.yaml', FACT_SOURCE.replace('common/fragments.yaml#entities/user', reference))
+
+    eppo_metrics_sync = read_definitions(metrics_dir)
+
+    [error] = [e for e in eppo_metrics_sync.validation_errors if 'broken.yaml' in e]
+    assert message in error
+    assert 'secret' not in str(eppo_metrics_sync.fact_sources)
+
+
+def test_symlinks_out_of_the_directory_are_not_followed(metrics_dir):
+    write_file(os.path.dirname(metrics_dir), 'outside/secrets.yaml', 'token: secret\n')
+    os.symlink(os.path.join(os.path.dirname(metrics_dir), 'outside'), os.path.join(metrics_dir, 'linked'))
+    write_file(metrics_dir, 'broken.yaml', METRICS.replace('../common/fragments.yaml#aggregations/winsorized_sum', 'linked/secrets.yaml'))
+
+    eppo_metrics_sync = read_definitions(metrics_dir)
+
+    [error] = [e for e in eppo_metrics_sync.validation_errors if 'broken.yaml' in e]
+    assert "Included file 'linked/secrets.yaml' is outside of" in error
+
+
+def test_index_reparses_files_depending_on_a_changed_fragment(metrics_dir, tmp_path, capsys):
+    index_path = str(tmp_path / 'index.sqlite')
+    write_file(metrics_dir, 'unrelated.yaml', 'metrics: []\n')
+    read_definitions(metrics_dir, index_path=index_path)
+
+    write_file(metrics_dir, 'common/fragments.yaml', COMMON.replace('0.99', '0.95'))
+    capsys.readouterr()
+    eppo_metrics_sync = read_definitions(metrics_dir, index_path=index_path)
+
+    assert eppo_metrics_sync.metrics[0]['numerator']['winsorization_upper_percentile'] == 0.95
+    # the fragment file and the two files including it
+    assert '3 file(s) parsed, 1 reused' in capsys.readouterr().out
+
+
+def test_changed_fragment_revalidates_dependents(metrics_dir):
+    def git(*args):
+        subprocess.run(
+            ['git', '-c', 'user.name=test', '-c', 'user.email=test@example.com', *args],
+            cwd=metrics_dir, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+
+    git('init', '-q', '-b', 'main')
+    git('add', '.')
+    git('commit', '-q', '-m', 'baseline')
+    write_file(metrics_dir, 'common/fragments.yaml', COMMON.replace('operation: sum', 'operation: median'))
+
+    eppo_metrics_sync = read_definitions(metrics_dir, changed_since='main')
+
+    # revenue.yaml itself is unchanged, but includes the changed fragment
+    assert eppo_metrics_sync.metrics == []
+    [error] = eppo_metrics_sync.validation_errors
+    assert 'revenue.yaml' in error and "'median' is not one of" in error
@@ -0,0 +1,102 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+from eppo_metrics_sync.index import MetricsIndex
+
+
+@pytest.fixture
+def metrics_dir(tmp_path):
+    directory = os.path.join(str(tmp_path), 'metrics')
+    shutil.copytree('tests/yaml/valid', directory)
+    return directory
+
+
+def index_repository(directory, index_path):
+    eppo_metrics_sync = EppoMetricsSync(directory=directory, index_path=index_path)
+    eppo_metrics_sync.read_yaml_files()
+    eppo_metrics_sync.validate()
+    return eppo_metrics_sync
+
+
+def test_index_matches_full_parse(metrics_dir, tmp_path):
+    index_path = os.path.join(str(tmp_path), 'index.sqlite')
+
+    expected = EppoMetricsSync(directory=metrics_dir)
+    expected.read_yaml_files()
+
+    first = index_repository(metrics_dir, index_path)
+    second = index_repository(metrics_dir, index_path)
+
+    assert first.fact_sources == expected.fact_sources
+    assert first.metrics == expected.metrics
+    assert second.fact_sources == expected.fact_sources
+    assert second.metrics == expected.metrics
+
+
+def test_incremental_update(metrics_dir, tmp_path, capsys):
+    index_path = os.path.join(str(tmp_path), 'index.sqlite')
+    index_repository(metrics_dir, index_path)
+    capsys.readouterr()
+
+    os.remove(os.path.join(metrics_dir, 'percentile_test.yaml'))
+    with open(os.path.join(metrics_dir, 'global_kpis', 'revenue.yaml'), 'a') as f:
+        f.write("""  - name: Total Margin
+    entity: User
+    numerator:
+      fact_name: Margin
+      operation: sum
+""")
+
+    eppo_metrics_sync = index_repository(metrics_dir, index_path)
+
+    assert 'Index ' + index_path + ': 1 file(s) parsed, 8 reused, 1 removed' in capsys.readouterr().out
+    assert 'Total Margin' in [m['name'] for m in eppo_metrics_sync.metrics]
+
+    with MetricsIndex(index_path) as index:
+        assert index.metrics_referencing_fact('Margin') == [
+            ('Total Margin', 'numerator', 'global_kpis/revenue.yaml')
+        ]
+        assert index.metrics_using_aggregation('percentile') == [
+            ('Watch Duration (p95)', 'all_api_fields.yml'),
+            ('Mobile App Opens (p90)', 'percentile_with_filters.yaml'),
+        ]
+        assert index.find_definition('Revenue') == [
+            ('fact_source', 'Revenue', 'global_kpis/revenue.yaml'),
+            ('fact', 'Revenue', 'global_kpis/revenue.yaml'),
+        ]
+
+
+def test_schema_errors_are_indexed(tmp_path):
+    directory = os.path.join(str(tmp_path), 'metrics')
+    shutil.copytree('tests/yaml/valid', directory)
+    shutil.copy('tests/yaml/invalid/invalid_metric_type.yaml', directory)
+    index_path = os.path.join(str(tmp_path), 'index.sqlite')
+
+    for _ in range(2):
+        eppo_metrics_sync = EppoMetricsSync(directory=directory, index_path=index_path)
+        eppo_metrics_sync.read_yaml_files()
+        errors = [e for e in eppo_metrics_sync.validation_errors if 'invalid_metric_type.yaml' in e]
+        assert len(errors) == 1
+        assert errors[0].startswith('Schema violation in ')
+
+
+def test_index_and_query_commands(metrics_dir, tmp_path):
+    index_path = os.path.join(str(tmp_path), 'index.sqlite')
+
+    result = subprocess.run(
+        ['python3', '-m', 'eppo_metrics_sync', 'index', metrics_dir, '--db', index_path],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert 'with 0 validation error(s)' in result.stdout
+
+    result = subprocess.run(
+        ['python3', '-m', 'eppo_metrics_sync', 'query', '--db', index_path, '--references-fact', 'Upgrades'],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert 'Total Upgrades to Paid Plan\tnumerator\tglobal_kpis/upgrades.yaml' in result.stdout
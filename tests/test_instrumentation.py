@@ -0,0 +1,80 @@
+import json
+import os
+import subprocess
+import sys
+
+from eppo_metrics_sync.instrumentation import NULL_RECORDER, Recorder, create_recorder, recorded_run
+
+
+def test_no_exporter_uses_null_recorder():
+    assert create_recorder() is NULL_RECORDER
+    with NULL_RECORDER.span('parse') as span:
+        span.set_attribute('files', 1)
+    NULL_RECORDER.set('metrics', 1)
+    NULL_RECORDER.export()
+
+
+def test_openmetrics_textfile(tmp_path):
+    metrics_path = os.path.join(str(tmp_path), 'eppo.prom')
+    recorder = Recorder(metrics_path=metrics_path, labels={'sync_tag': 'team "a"'})
+
+    with recorded_run(recorder, 'sync'):
+        with recorder.span('parse'):
+            pass
+        recorder.set('metrics', 3)
+
+    with open(metrics_path) as f:
+        lines = f.read().splitlines()
+
+    assert '# TYPE eppo_metrics_sync_metrics gauge' in lines
+    assert 'eppo_metrics_sync_metrics{sync_tag="team \\"a\\""} 3' in lines
+    assert 'eppo_metrics_sync_success{sync_tag="team \\"a\\""} 1' in lines
+    assert any(line.startswith('eppo_metrics_sync_stage_duration_seconds{stage="parse",') for line in lines)
+    assert any(line.startswith('eppo_metrics_sync_duration_seconds{') for line in lines)
+    assert lines[-1] == '# EOF'
+
+
+def test_failed_run_is_exported(tmp_path):
+    metrics_path = os.path.join(str(tmp_path), 'eppo.prom')
+    recorder = Recorder(metrics_path=metrics_path)
+
+    try:
+        with recorded_run(recorder, 'sync'):
+            raise ValueError('boom')
+    except ValueError:
+        pass
+
+    with open(metrics_path) as f:
+        assert 'eppo_metrics_sync_success 0' in f.read().splitlines()
+
+
+def test_cli_sync_exports_metrics_and_spans(tmp_path, api_server):
+    host, requests_received = api_server
+    metrics_path = os.path.join(str(tmp_path), 'eppo.prom')
+    trace_path = os.path.join(str(tmp_path), 'spans.jsonl')
+    env = dict(os.environ, EPPO_API_HOST=host, EPPO_API_KEY='key', EPPO_SYNC_TAG='ci')
+
+    result = subprocess.run(
+        [sys.executable, '-m', 'eppo_metrics_sync', 'tests/yaml/valid',
+         '--metrics-file', metrics_path, '--trace-file', trace_path],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env
+    )
+    assert result.returncode == 0, result.stderr
+    assert len(requests_received) == 1
+
+    with open(metrics_path) as f:
+        metrics = f.read()
+    assert 'eppo_metrics_sync_success{sync_tag="ci"} 1' in metrics
+    assert 'eppo_metrics_sync_validation_errors{sync_tag="ci"} 0' in metrics
+    assert 'eppo_metrics_sync_payload_bytes{sync_tag="ci"} ' in metrics
+    # requests are not retried, so no retry count is exported
+    assert 'retries' not in metrics
+
+    with open(trace_path) as f:
+        spans = [json.loads(line) for line in f]
+    names = [s['name'] for s in spans]
+    assert names == ['discovery', 'parse', 'validate', 'encode', 'upload', 'sync']
+    root = spans[-1]
+    assert root['parentSpanId'] is None
+    assert all(s['parentSpanId'] == root['spanId'] for s in spans[:-1])
+    assert len({s['traceId'] for s in spans}) == 1
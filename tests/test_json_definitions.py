@@ -0,0 +1,113 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from eppo_metrics_sync import helper
+from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+from eppo_metrics_sync.helper import load_documents, load_yaml_documents
+
+test_yaml_dir = 'tests/yaml/valid'
+
+
+def read(directory, **kwargs):
+    eppo_metrics_sync = EppoMetricsSync(directory=directory, **kwargs)
+    eppo_metrics_sync.read_yaml_files()
+    return eppo_metrics_sync
+
+
+def convert(directory, extension):
+    """
+    Replace every YAML file under `directory` with a JSON file of the same
+    documents.
+    """
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            documents = [d for d in load_yaml_documents(path) if d is not None]
+            with open(os.path.splitext(path)[0] + '.eppo' + extension, 'w') as f:
+                if extension == '.jsonl':
+                    f.writelines(json.dumps(d) + '\n' for d in documents)
+                else:
+                    [document] = documents
+                    json.dump(document, f, indent=2)
+            os.remove(path)
+
+
+@pytest.mark.parametrize('extension', ['.json', '.jsonl'])
+def test_json_matches_yaml(tmp_path, extension):
+    directory = str(tmp_path / 'metrics')
+    shutil.copytree(test_yaml_dir, directory)
+    convert(directory, extension)
+
+    expected = read(test_yaml_dir)
+    eppo_metrics_sync = read(directory)
+    eppo_metrics_sync.validate()
+
+    assert eppo_metrics_sync.fact_sources == expected.fact_sources
+    assert eppo_metrics_sync.metrics == expected.metrics
+
+
+@pytest.mark.parametrize('loads', [json.loads, helper.json_loads])
+def test_parsers_agree(tmp_path, monkeypatch, loads):
+    path = str(tmp_path / 'metrics.json')
+    with open(path, 'w') as f:
+        f.write('{"metrics": [{"name": "Ratio \\u00e9", "numerator": {"value": 1.0, "n": 3, "flag": true}}]}')
+    monkeypatch.setattr(helper, 'json_loads', loads)
+
+    [document] = load_documents(path)
+
+    numerator = document['metrics'][0]['numerator']
+    assert document['metrics'][0]['name'] == 'Ratio é'
+    assert type(numerator['value']) is float and type(numerator['n']) is int
+    assert numerator['flag'] is True
+
+
+def test_json_lines_errors_name_the_line(tmp_path):
+    directory = str(tmp_path)
+    with open(os.path.join(directory, 'generated.eppo.jsonl'), 'w') as f:
+        f.write(
+            '{"metrics": [{"name": "Revenue", "entity": "User", "numerator": {"fact_name": "revenue", "operation": "sum"}}]}\n'
+            '\n'
+            '{"metrics": [{"name": "Median", "entity": "User", "type": "median"}]}\n'
+        )
+
+    eppo_metrics_sync = read(directory)
+
+    assert [m['name'] for m in eppo_metrics_sync.metrics] == ['Revenue']
+    [error] = eppo_metrics_sync.validation_errors
+    assert 'generated.eppo.jsonl (document 3)' in error
+
+
+def test_malformed_json(tmp_path):
+    path = str(tmp_path / 'generated.jsonl')
+    with open(path, 'w') as f:
+        f.write('{"metrics": []}\n{"metrics": [\n')
+
+    with pytest.raises(ValueError, match=r"Error loading JSON file '.*generated.jsonl' \(line 2\)"):
+        list(load_documents(path))
+
+
+def test_dbt_schema_ignores_json(tmp_path):
+    shutil.copytree('tests/yaml/dbt/valid', str(tmp_path / 'dbt'))
+    with open(str(tmp_path / 'dbt' / 'manifest.json'), 'w') as f:
+        f.write('{"nodes": {}}')
+
+    eppo_metrics_sync = read(str(tmp_path / 'dbt'), schema_type='dbt-model', dbt_model_prefix='db.schema')
+
+    assert not any('manifest.json' in path for path in eppo_metrics_sync.discovery.files)
+
+
+def test_other_json_files_are_not_definitions(tmp_path):
+    directory = str(tmp_path / 'metrics')
+    shutil.copytree(test_yaml_dir, directory)
+    with open(os.path.join(directory, 'package.json'), 'w') as f:
+        f.write('{"name": "frontend", "version": "1.0.0"}')
+    with open(os.path.join(directory, 'shard-1-of-2.json'), 'w') as f:
+        f.write('{"shard": 1, "shards": 2}')
+
+    eppo_metrics_sync = read(directory)
+
+    assert not any(path.endswith('.json') for path in eppo_metrics_sync.discovery.files)
+    assert eppo_metrics_sync.validation_errors == []
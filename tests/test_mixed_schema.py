@@ -0,0 +1,82 @@
+import os
+import shutil
+
+import pytest
+
+from eppo_metrics_sync.cli import main
+from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+
+METRICS = """\
+metrics:
+  - name: Gross Revenue
+    entity: Anonymous User
+    numerator:
+      fact_name: gross_revenue_test
+      operation: sum
+"""
+
+
+@pytest.fixture
+def mixed_dir(tmp_path):
+    directory = str(tmp_path / 'project')
+    shutil.copytree('tests/yaml/dbt/valid', os.path.join(directory, 'models'))
+    os.makedirs(os.path.join(directory, 'metrics'))
+    with open(os.path.join(directory, 'metrics', 'revenue.yaml'), 'w') as f:
+        f.write(METRICS)
+    return directory
+
+
+def test_files_are_routed_by_content(mixed_dir):
+    eppo_metrics_sync = EppoMetricsSync(
+        directory=mixed_dir, schema_type='mixed', dbt_model_prefix='warehouse.analytics'
+    )
+    eppo_metrics_sync.read_yaml_files()
+    eppo_metrics_sync.validate()
+
+    dbt = EppoMetricsSync(
+        directory=os.path.join(mixed_dir, 'models'), schema_type='dbt-model', dbt_model_prefix='warehouse.analytics'
+    )
+    dbt.read_yaml_files()
+    assert eppo_metrics_sync.fact_sources == dbt.fact_sources
+    assert [m['name'] for m in eppo_metrics_sync.metrics] == ['Gross Revenue']
+
+
+def test_metrics_are_validated_against_dbt_facts(mixed_dir):
+    with open(os.path.join(mixed_dir, 'metrics', 'revenue.yaml'), 'a') as f:
+        f.write(METRICS.replace('metrics:\n', '').replace('Gross Revenue', 'Net').replace('gross_revenue_test', 'net'))
+    eppo_metrics_sync = EppoMetricsSync(
+        directory=mixed_dir, schema_type='mixed', dbt_model_prefix='warehouse.analytics'
+    )
+    eppo_metrics_sync.read_yaml_files()
+
+    with pytest.raises(ValueError, match=r'Invalid fact reference\(s\): net'):
+        eppo_metrics_sync.validate()
+
+
+def test_dbt_project_files_are_not_definitions(mixed_dir):
+    with open(os.path.join(mixed_dir, 'dbt_project.yml'), 'w') as f:
+        f.write("name: analytics\nversion: '1.0'\nmodels:\n  analytics:\n    +materialized: table\n")
+    with open(os.path.join(mixed_dir, 'packages.yml'), 'w') as f:
+        f.write("packages:\n  - package: dbt-labs/dbt_utils\n    version: 1.1.1\n")
+    eppo_metrics_sync = EppoMetricsSync(
+        directory=mixed_dir, schema_type='mixed', dbt_model_prefix='warehouse.analytics'
+    )
+
+    eppo_metrics_sync.read_yaml_files()
+
+    assert eppo_metrics_sync.validate()
+    assert eppo_metrics_sync.discovery.skipped == 2
+    # `models` config mappings elsewhere are not read as dbt models either
+    assert eppo_metrics_sync._document_schema_type({'models': {'analytics': {}}}) == 'eppo'
+    assert eppo_metrics_sync._document_schema_type({'models': []}) == 'dbt-model'
+
+
+def test_mixed_schema_needs_a_model_prefix(mixed_dir):
+    with pytest.raises(ValueError, match='Must specify dbt_model_prefix when schema_type=mixed'):
+        EppoMetricsSync(directory=mixed_dir, schema_type='mixed').read_yaml_files()
+
+
+def test_cli_dry_run(mixed_dir, capsys):
+    main([mixed_dir, '--schema', 'mixed', '--dbt-model-prefix', 'warehouse.analytics', '--dryrun'])
+
+    assert 'Discovered 4 definition file(s)' in capsys.readouterr().out
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+
+from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+from eppo_metrics_sync.helper import load_yaml_documents
+
+FACT_SOURCE_DOCUMENT = """fact_sources:
+  - name: Purchases
+    sql: select * from purchases
+    timestamp_column: ts
+    entities:
+      - entity_name: User
+        column: user_id
+    facts:
+      - name: Purchase Amount
+        column: amount
+"""
+
+METRIC_DOCUMENT = """metrics:
+  - name: Total Purchase Amount
+    entity: User
+    numerator:
+      fact_name: Purchase Amount
+      operation: sum
+"""
+
+INVALID_METRIC_DOCUMENT = """metrics:
+  - name: Purchase Amount Median
+    entity: User
+    type: median
+"""
+
+
+def write_directory(tmp_path, content):
+    directory = os.path.join(str(tmp_path), 'metrics')
+    os.makedirs(directory)
+    with open(os.path.join(directory, 'generated.yaml'), 'w') as f:
+        f.write(content)
+    return directory
+
+
+def test_documents_are_merged(tmp_path):
+    directory = write_directory(
+        tmp_path,
+        FACT_SOURCE_DOCUMENT + '---\n' + METRIC_DOCUMENT + '---\n'
+    )
+    eppo_metrics_sync = EppoMetricsSync(directory=directory)
+    eppo_metrics_sync.read_yaml_files()
+    eppo_metrics_sync.validate()
+
+    assert [f['name'] for f in eppo_metrics_sync.fact_sources] == ['Purchases']
+    assert [m['name'] for m in eppo_metrics_sync.metrics] == ['Total Purchase Amount']
+
+
+def test_schema_errors_point_to_document(tmp_path):
+    directory = write_directory(
+        tmp_path,
+        FACT_SOURCE_DOCUMENT + '---\n' + INVALID_METRIC_DOCUMENT + '---\n' + METRIC_DOCUMENT
+    )
+    eppo_metrics_sync = EppoMetricsSync(directory=directory)
+    eppo_metrics_sync.read_yaml_files()
+
+    assert len(eppo_metrics_sync.validation_errors) == 1
+    assert eppo_metrics_sync.validation_errors[0].startswith(
+        f"Schema violation in {os.path.join(directory, 'generated.yaml')} (document 2): \n"
+    )
+    # valid documents in the same file are still loaded
+    assert [m['name'] for m in eppo_metrics_sync.metrics] == ['Total Purchase Amount']
+
+
+def test_single_document_errors_do_not_mention_documents(tmp_path):
+    directory = write_directory(tmp_path, INVALID_METRIC_DOCUMENT)
+    eppo_metrics_sync = EppoMetricsSync(directory=directory)
+
+    with pytest.raises(ValueError) as excinfo:
+        eppo_metrics_sync.read_yaml_files()
+
+    assert f"Schema violation in {os.path.join(directory, 'generated.yaml')}: \n" in str(excinfo.value)
+
+
+def test_documents_are_loaded_lazily(tmp_path):
+    directory = write_directory(
+        tmp_path,
+        METRIC_DOCUMENT + '---\nmetrics: [unclosed\n'
+    )
+    documents = load_yaml_documents(os.path.join(directory, 'generated.yaml'))
+
+    assert next(documents)['metrics'][0]['name'] == 'Total Purchase Amount'
+    with pytest.raises(ValueError, match=r'\(document 2\)'):
+        next(documents)
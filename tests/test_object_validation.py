@@ -0,0 +1,68 @@
+import pytest
+
+from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+from tests.conftest import FACT_SOURCE, metric_item, read_definitions, write_file
+
+
+def write_metrics(directory, *metrics):
+    write_file(directory, 'metrics.yaml', 'metrics:\n' + ''.join(metrics))
+
+
+@pytest.fixture
+def metrics_dir(tmp_path):
+    directory = str(tmp_path / 'metrics')
+    write_file(directory, 'purchases.yaml', FACT_SOURCE)
+    return directory
+
+
+def test_invalid_metric_keeps_its_siblings(metrics_dir):
+    write_metrics(metrics_dir, metric_item('Revenue'), metric_item('Median', operation='median'), metric_item('Orders'))
+
+    eppo_metrics_sync = read_definitions(metrics_dir)
+
+    assert [m['name'] for m in eppo_metrics_sync.metrics] == ['Revenue', 'Orders']
+    [error] = eppo_metrics_sync.validation_errors
+    assert "Metric 2 (Median) at numerator.operation: 'median' is not one of" in error
+
+
+def test_valid_siblings_reach_the_cross_file_rules(metrics_dir):
+    write_metrics(metrics_dir, metric_item('Median', operation='median'), metric_item('Refunds', fact='refunds'))
+    eppo_metrics_sync = read_definitions(metrics_dir)
+
+    with pytest.raises(ValueError) as excinfo:
+        eppo_metrics_sync.validate()
+
+    assert 'Metric 1 (Median)' in str(excinfo.value)
+    assert 'Invalid fact reference(s): refunds' in str(excinfo.value)
+
+
+def test_invalid_document_is_rejected_as_a_whole(metrics_dir):
+    write_file(metrics_dir, 'metrics.yaml', 'sync_tag: 5\nmetrics:\n' + metric_item('Revenue'))
+
+    eppo_metrics_sync = read_definitions(metrics_dir)
+
+    assert eppo_metrics_sync.metrics == []
+    [error] = eppo_metrics_sync.validation_errors
+    assert "5 is not of type 'string'" in error
+
+
+def test_only_edited_objects_are_revalidated(metrics_dir, tmp_path, monkeypatch):
+    index_path = str(tmp_path / 'index.sqlite')
+    metrics = [metric_item(f'Metric {i}') for i in range(20)] + [metric_item('Median', operation='median')]
+    write_metrics(metrics_dir, *metrics)
+    read_definitions(metrics_dir, index_path=index_path)
+
+    validated = []
+    schema_error = EppoMetricsSync._schema_error
+    monkeypatch.setattr(
+        EppoMetricsSync, '_schema_error',
+        lambda self, data: validated.append(data) or schema_error(self, data)
+    )
+    metrics[3] = metric_item('Metric 3', operation='count')
+    write_metrics(metrics_dir, *metrics)
+    eppo_metrics_sync = read_definitions(metrics_dir, index_path=index_path)
+
+    validated_metrics = [m['name'] for data in validated for m in data.get('metrics', [])]
+    assert validated_metrics == ['Metric 3']
+    assert len(eppo_metrics_sync.metrics) == 20
+    assert len(eppo_metrics_sync.validation_errors) == 1
@@ -0,0 +1,139 @@
+import pytest
+import yaml
+
+from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+from eppo_metrics_sync.helper import load_documents
+from eppo_metrics_sync.parallel_yaml import ParallelYamlLoader, split_document
+
+
+def metric(i):
+    return (
+        f"  - name: Metric {i}  # generated\n"
+        f"    entity: User\n"
+        f"    description: |\n"
+        f"      Line one of {i}\n"
+        f"\n"
+        f"      - not an item\n"
+        f"    numerator:\n"
+        f"      fact_name: revenue\n"
+        f"      operation: sum\n"
+    )
+
+
+FACT_SOURCES = """\
+# fact sources, as an indentless sequence
+fact_sources:
+- name: purchases
+  sql: >
+    SELECT *
+    FROM purchases
+  timestamp_column: ts
+  entities:
+  - entity_name: User
+    column: user_id
+  facts:
+  - name: revenue
+    column: amount
+"""
+
+
+@pytest.fixture
+def loader():
+    loader = ParallelYamlLoader(workers=2, threshold=0)
+    yield loader
+    loader.close()
+
+
+def write(tmp_path, content, name='large.yaml'):
+    path = tmp_path / name
+    path.write_text(content)
+    return str(path)
+
+
+def test_chunks_match_a_serial_parse(tmp_path, loader):
+    content = FACT_SOURCES + 'sync_tag: generated\nmetrics:\n' + ''.join(metric(i) for i in range(50)) + 'trailing: 1\n'
+    path = write(tmp_path, content)
+
+    skeleton, chunks = split_document(content, 8)
+    assert len(chunks) > 2
+    assert skeleton.count('\n') == content.count('\n')
+
+    parsed, document = loader.load(path)
+    assert parsed
+    assert document == yaml.safe_load(content)
+    assert list(document) == ['fact_sources', 'sync_tag', 'metrics', 'trailing']
+
+
+@pytest.mark.parametrize('workers', [2, 3, 4, 7])
+@pytest.mark.parametrize('ending', ['\n', ''])
+def test_block_scalars_ending_chunks(tmp_path, workers, ending):
+    styles = ['|', '>', '|+', '>-', '|2']
+    content = 'fact_sources:\n' + ''.join(
+        f"  - name: table {i}\n"
+        f"    sql: {styles[i % len(styles)]}\n"
+        f"      SELECT * FROM table_{i}\n"
+        f"{chr(10) if i % 3 == 0 else ''}"
+        for i in range(23)
+    )
+    content = content.rstrip('\n') + ending
+    path = write(tmp_path, content)
+    loader = ParallelYamlLoader(workers=workers, threshold=0)
+
+    try:
+        parsed, document = loader.load(path)
+    finally:
+        loader.close()
+
+    assert parsed
+    assert document == yaml.safe_load(content)
+
+
+@pytest.mark.parametrize('content', [
+    'metrics:\n  - &shared\n    name: A\n  - *shared\n',
+    'metrics:\n  - name: A\n---\nmetrics:\n  - name: B\n',
+    '%YAML 1.1\n---\nmetrics:\n  - name: A\n',
+    '"metrics":\n  - name: A\n',
+    'metrics:\n  - name: A\nmetrics:\n  - name: B\n',
+    'metrics: [{name: A}]\n',
+])
+def test_unsafe_splits_are_parsed_serially(tmp_path, loader, content):
+    path = write(tmp_path, content)
+
+    assert loader.load(path) == (False, None)
+    assert list(load_documents(path, loader)) == list(yaml.safe_load_all(content))
+
+
+@pytest.mark.parametrize('broken', [
+    '  - name: [unclosed\n',
+    '  - name: A\n   bad indent: 1\n',
+])
+def test_errors_have_file_positions(tmp_path, loader, broken):
+    metrics = [metric(i) for i in range(40)]
+    metrics[27] = broken
+    path = write(tmp_path, 'metrics:\n' + ''.join(metrics))
+
+    with pytest.raises(ValueError) as serial:
+        list(load_documents(path))
+    with pytest.raises(ValueError) as parallel:
+        list(load_documents(path, loader))
+
+    assert str(parallel.value) == str(serial.value)
+
+
+def test_reading_a_directory(tmp_path):
+    directory = tmp_path / 'metrics'
+    directory.mkdir()
+    (directory / 'purchases.yaml').write_text(FACT_SOURCES)
+    (directory / 'metrics.yaml').write_text('metrics:\n' + ''.join(metric(i) for i in range(30)))
+
+    def read(parse_workers):
+        eppo_metrics_sync = EppoMetricsSync(directory=str(directory), parse_workers=parse_workers)
+        eppo_metrics_sync.parallel_yaml.threshold = 0
+        eppo_metrics_sync.read_yaml_files()
+        return eppo_metrics_sync
+
+    serial, parallel = read(1), read(2)
+
+    assert parallel.metrics == serial.metrics
+    assert len(parallel.metrics) == 30
+    assert parallel.parallel_yaml._executor is None
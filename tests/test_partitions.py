@@ -0,0 +1,112 @@
+import os
+
+import pytest
+
+from eppo_metrics_sync.cli import main
+from eppo_metrics_sync.partitions import PartitionedSync
+from tests.conftest import fact_source, metric, write_files
+
+
+@pytest.fixture
+def metrics_dir(tmp_path):
+    directory = str(tmp_path / 'metrics')
+    write_files(directory, {
+        'growth/purchases.yaml': fact_source(),
+        'growth/revenue.yaml': metric('Revenue'),
+        # refers to a fact of another partition
+        'search/searches.yaml': metric('Revenue per search', operation='count'),
+    })
+    return directory
+
+
+def run(directory, tmp_path, **kwargs):
+    partitioned_sync = PartitionedSync(directory, state_path=str(tmp_path / 'state.json'), **kwargs)
+    return partitioned_sync.run()
+
+
+def test_partitions_sync_to_their_own_tags(metrics_dir, tmp_path, remote_api):
+    partitions = run(metrics_dir, tmp_path)
+
+    assert [(p.name, p.sync_tag, p.status) for p in partitions] == [
+        ('growth', 'deploy/growth', 'synced'),
+        ('search', 'deploy/search', 'synced'),
+    ]
+    assert sorted(remote_api['definitions']) == ['deploy/growth', 'deploy/search']
+    assert [m['name'] for m in remote_api['definitions']['deploy/search']['metrics']] == ['Revenue per search']
+
+
+def test_only_changed_partitions_are_synced(metrics_dir, tmp_path, remote_api, monkeypatch):
+    monkeypatch.setenv('EPPO_REFERENCE_URL', 'https://ci.example.com/runs/1')
+    run(metrics_dir, tmp_path)
+    request_count = len(remote_api['requests'])
+
+    # a new CI run, with its own reference URL
+    monkeypatch.setenv('EPPO_REFERENCE_URL', 'https://ci.example.com/runs/2')
+    assert [p.status for p in run(metrics_dir, tmp_path)] == ['unchanged', 'unchanged']
+    assert len(remote_api['requests']) == request_count
+
+    write_files(metrics_dir, {'search/searches.yaml': metric('Revenue per search')})
+    assert [p.status for p in run(metrics_dir, tmp_path)] == ['unchanged', 'synced']
+    assert len(remote_api['requests']) == request_count + 1
+    assert remote_api['requests'][-1]['body']['reference_url'] == 'https://ci.example.com/runs/2'
+
+
+def test_invalid_partition_does_not_block_others(metrics_dir, tmp_path, remote_api):
+    write_files(metrics_dir, {
+        'search/searches.yaml': metric('Revenue per search', fact='refunds'),
+        'search/median.yaml': metric('Median', operation='median'),
+    })
+
+    with pytest.raises(ValueError) as excinfo:
+        run(metrics_dir, tmp_path)
+
+    message = str(excinfo.value)
+    assert message.startswith('1 of 2 partition(s) failed')
+    assert 'search: Invalid fact reference(s): refunds' in message
+    assert 'median.yaml' in message
+    assert sorted(remote_api['definitions']) == ['deploy/growth']
+
+
+def test_names_are_unique_across_partitions(metrics_dir, tmp_path, remote_api):
+    write_files(metrics_dir, {'search/revenue.yaml': metric('Revenue')})
+
+    with pytest.raises(ValueError) as excinfo:
+        run(metrics_dir, tmp_path)
+
+    assert str(excinfo.value).count('Metric names are not unique across partitions: Revenue (growth, search)') == 2
+    assert remote_api['definitions'] == {}
+
+
+def test_partition_map(metrics_dir, tmp_path, remote_api):
+    write_files(metrics_dir, {'shared/common.yaml': fact_source('searches', 'search_count')})
+    partition_map = tmp_path / 'partitions.yaml'
+    partition_map.write_text(
+        "partitions:\n"
+        "  - name: growth\n"
+        "    paths: [growth/, shared/common.yaml]\n"
+        "  - name: search\n"
+        "    paths: [search/*.yaml]\n"
+        "    sync_tag: search-metrics\n"
+    )
+
+    partitions = run(metrics_dir, tmp_path, partition_map=str(partition_map))
+
+    assert [(p.name, p.sync_tag, len(p.files)) for p in partitions] == [
+        ('growth', 'deploy/growth', 3),
+        ('search', 'search-metrics', 1),
+    ]
+
+    write_files(metrics_dir, {'other/orphan.yaml': metric('Orphan')})
+    with pytest.raises(ValueError, match='File\\(s\\) not in any partition: other/orphan.yaml'):
+        run(metrics_dir, tmp_path, partition_map=str(partition_map))
+
+
+def test_cli_dry_run(metrics_dir, tmp_path, remote_api, capsys):
+    state_path = str(tmp_path / 'state.json')
+
+    main([metrics_dir, '--partition-by-directory', '--partition-state', state_path, '--dryrun'])
+
+    output = capsys.readouterr().out
+    assert 'growth (deploy/growth): changed, 2 file(s), 1 fact source(s), 1 metric(s)' in output
+    assert not os.path.exists(state_path)
+    assert remote_api['requests'] == []
@@ -0,0 +1,128 @@
+import os
+import shutil
+
+import pytest
+
+from eppo_metrics_sync.cli import main
+from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+from eppo_metrics_sync.plan import changed_fields, diff_definitions
+from eppo_metrics_sync.testing import FakeEppoServer
+
+
+def posts(remote_api):
+    return [r for r in remote_api['requests'] if r['method'] == 'POST']
+
+
+def test_diff_definitions():
+    local = {
+        'fact_sources': [{'name': 'purchases', 'facts': [{'name': 'amount'}, {'name': 'count', 'column': 'n'}]}],
+        'metrics': [
+            {'name': 'Revenue', 'type': 'simple', 'description': None},
+            {'name': 'Orders', 'type': 'simple', 'numerator': {'fact_name': 'count', 'operation': 'sum'}},
+        ],
+    }
+    remote = {
+        'fact_sources': [{'name': 'purchases', 'facts': [{'name': 'count', 'column': 'n'}, {'name': 'amount'}]}],
+        'metrics': [
+            {'name': 'Revenue', 'type': 'simple'},
+            {'name': 'Orders', 'type': 'simple', 'numerator': {'fact_name': 'count', 'operation': 'count'}},
+            {'name': 'Legacy', 'type': 'simple'},
+        ],
+    }
+    local['metrics'].append({'name': 'New', 'type': 'ratio'})
+
+    plan = diff_definitions(local, remote)
+
+    assert [c.name for c in plan.creates] == ['New']
+    assert [(c.name, c.fields) for c in plan.updates] == [('Orders', ['numerator.operation'])]
+    assert [(c.kind, c.name) for c in plan.deletes] == [('metric', 'Legacy')]
+    assert sorted(c.name for c in plan.unchanged) == ['Revenue', 'purchases']
+    assert plan.summary() == 'Plan: 1 to create, 1 to update, 1 to delete, 2 unchanged'
+
+
+def test_changed_fields():
+    assert changed_fields({'a': 1}, {'a': 1.0}) == []
+    assert changed_fields({'a': True}, {'a': 1}) == ['a']
+    assert changed_fields({'a': [1, 2]}, {'a': [1, 3]}) == ['a[1]']
+    assert changed_fields({'a': [1, 2]}, {'a': [1]}) == ['a']
+    assert changed_fields(
+        {'facts': [{'name': 'x', 'column': 'a'}]},
+        {'facts': [{'name': 'x', 'column': 'b'}]}
+    ) == ['facts[x].column']
+
+
+def test_plan_against_empty_sync_tag(remote_api):
+    plan = EppoMetricsSync(directory='tests/yaml/valid').plan()
+
+    assert plan.has_changes
+    assert not plan.updates and not plan.deletes and not plan.unchanged
+    assert len(plan.creates) > 0
+    assert remote_api['requests'][0]['method'] == 'GET'
+
+
+def test_apply_skips_sync_without_changes(remote_api, tmp_path):
+    cache_path = os.path.join(str(tmp_path), 'remote.json')
+
+    first = EppoMetricsSync(directory='tests/yaml/valid').apply(cache_path=cache_path)
+    assert len(first.creates) > 0
+    assert len(posts(remote_api)) == 1
+
+    second = EppoMetricsSync(directory='tests/yaml/valid').apply(cache_path=cache_path)
+    assert not second.has_changes
+    assert len(second.unchanged) == len(first.creates)
+    assert len(posts(remote_api)) == 1
+
+    # the first fetch after the sync downloads the new state; later ones are
+    # answered from the cache
+    third = EppoMetricsSync(directory='tests/yaml/valid').plan(cache_path=cache_path)
+    assert not third.has_changes
+    last_get = remote_api['requests'][-1]
+    assert last_get['method'] == 'GET'
+    assert 'If-None-Match' in last_get['headers']
+
+
+def test_apply_syncs_changes(remote_api, tmp_path):
+    directory = os.path.join(str(tmp_path), 'metrics')
+    shutil.copytree('tests/yaml/valid', directory)
+    EppoMetricsSync(directory=directory).apply()
+
+    path = os.path.join(directory, 'purchases.yaml')
+    with open(path) as f:
+        content = f.read()
+    with open(path, 'w') as f:
+        f.write(content.replace('operation: sum', 'operation: count', 1))
+
+    plan = EppoMetricsSync(directory=directory).apply()
+
+    assert [c.action for c in plan.changes].count('update') == 1
+    assert plan.updates[0].fields == ['numerator.operation']
+    assert len(posts(remote_api)) == 2
+    # the sync endpoint replaces the sync tag, so unchanged objects are sent too
+    synced = posts(remote_api)[-1]['body']
+    assert len(synced['metrics']) == len([c for c in plan.changes if c.kind == 'metric'])
+
+
+def test_cli_plan(remote_api, capsys):
+    main(['plan', 'tests/yaml/valid', '--sync-prefix', 'qa', '--no-remote-cache'])
+    output = capsys.readouterr().out
+
+    assert '+ create metric "[qa] ' in output
+    assert 'to create, 0 to update, 0 to delete, 0 unchanged' in output
+    assert remote_api['requests'][0]['path'].endswith('?sync_tag=qa')
+    assert not posts(remote_api)
+
+
+@pytest.mark.parametrize('status', [404, 405])
+def test_plan_without_a_readable_remote(remote_api, monkeypatch, status):
+    respond = FakeEppoServer._respond
+
+    def without_get(self, method, query, headers, body):
+        if method == 'GET':
+            return status, {}, {'error': 'Not found'}
+        return respond(self, method, query, headers, body)
+
+    monkeypatch.setattr(FakeEppoServer, '_respond', without_get)
+
+    with pytest.raises(ValueError, match=f'GET answered {status}.*plan and apply are unavailable'):
+        EppoMetricsSync(directory='tests/yaml/valid').apply()
+    assert [r['method'] for r in remote_api['requests']] == ['GET']
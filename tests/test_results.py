@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+from eppo_metrics_sync.cli import main
+from tests.conftest import FACT_SOURCE, metric, write_files
+
+
+@pytest.fixture
+def metrics_dir(tmp_path):
+    directory = str(tmp_path / 'metrics')
+    write_files(directory, {
+        'a_purchases.yaml': FACT_SOURCE,
+        'b_median.yaml': metric('Median', operation='median'),
+        'c_refunds.yaml': metric('Refunds', fact='refunds'),
+        'd_revenue.yaml': metric('Revenue'),
+    })
+    return directory
+
+
+def run(args, tmp_path):
+    results_path = str(tmp_path / 'results.jsonl')
+    with pytest.raises(ValueError) as excinfo:
+        main([*args, '--dryrun', '--results', results_path])
+    with open(results_path) as f:
+        return [json.loads(line) for line in f], str(excinfo.value)
+
+
+def test_results_are_streamed(metrics_dir, tmp_path):
+    events, _ = run([metrics_dir], tmp_path)
+
+    assert [e['path'] for e in events if e['event'] == 'file'] == [
+        'a_purchases.yaml', 'b_median.yaml', 'c_refunds.yaml', 'd_revenue.yaml'
+    ]
+    errors = [e for e in events if e['event'] == 'error']
+    assert [(e['stage'], e.get('path')) for e in errors] == [
+        ('schema', 'b_median.yaml'),
+        ('fact_references', None),
+    ]
+    # an error is written as soon as its file is read
+    assert events.index(errors[0]) == 2
+    assert events[-1] == {
+        'event': 'summary', 'passed': False, 'stopped': False,
+        'files': 4, 'fact_sources': 1, 'metrics': 2, 'errors': 2,
+    }
+
+
+def test_fail_fast_stops_reading(metrics_dir, tmp_path):
+    events, message = run([metrics_dir, '--fail-fast'], tmp_path)
+
+    assert [e['path'] for e in events if e['event'] == 'file'] == ['a_purchases.yaml', 'b_median.yaml']
+    assert events[-1]['stopped'] is True
+    assert message.startswith('Stopped at the first failure with 1 error(s)')
+
+
+def test_fail_fast_stops_validating(metrics_dir, tmp_path):
+    write_files(metrics_dir, {'b_median.yaml': None, 'e_duplicate.yaml': metric('Revenue')})
+
+    events, _ = run([metrics_dir, '--fail-fast'], tmp_path)
+
+    # names are checked before fact references, which are not checked at all
+    assert [e['stage'] for e in events if e['event'] == 'error'] == ['unique_names']
+
+
+def test_results_on_stdout(metrics_dir, capsys):
+    write_files(metrics_dir, {'b_median.yaml': None, 'c_refunds.yaml': None})
+
+    main([metrics_dir, '--dryrun', '--results', '-'])
+
+    captured = capsys.readouterr()
+    events = [json.loads(line) for line in captured.out.splitlines()]
+    assert events[-1]['passed'] is True
+    assert 'Discovered 2 definition file(s)' in captured.err
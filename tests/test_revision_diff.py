@@ -0,0 +1,147 @@
+import os
+
+import pytest
+
+from eppo_metrics_sync import revision_diff
+from eppo_metrics_sync.cli import main
+from eppo_metrics_sync.git import BlobReader
+from eppo_metrics_sync.revision_diff import diff_revisions
+from tests.conftest import FACT_SOURCE, git, metric_item, write_files
+
+
+def commit(repo, files):
+    write_files(repo, files)
+    git(repo, 'add', '-A')
+    git(repo, 'commit', '-q', '-m', 'change')
+    return git(repo, 'rev-parse', 'HEAD')
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = str(tmp_path / 'repo')
+    os.makedirs(repo)
+    git(repo, 'init', '-q')
+    commit(repo, {
+        'metrics/purchases.yaml': FACT_SOURCE,
+        'metrics/revenue.yaml': 'metrics:\n' + metric_item('Revenue') + metric_item('Orders', operation='count'),
+        'metrics/other.yaml': 'metrics:\n' + metric_item('Other'),
+    })
+    return repo
+
+
+def test_semantic_changes(repo):
+    first = git(repo, 'rev-parse', 'HEAD')
+    second = commit(repo, {
+        # reordered and reformatted, but the same objects
+        'metrics/revenue.yaml': 'metrics:\n' + metric_item('Orders', operation='count') + metric_item('Revenue', operation='count'),
+        'metrics/new.eppo.json': '{"metrics": [{"name": "New", "entity": "User", '
+                            '"numerator": {"fact_name": "revenue", "operation": "sum"}}]}',
+        'metrics/other.yaml': None,
+    })
+
+    diff = diff_revisions(os.path.join(repo, 'metrics'), first, second)
+
+    assert [c.describe() for c in diff.changes] == [
+        '+ create metric "New"',
+        '~ update metric "Revenue" (numerator.operation)',
+        '- delete metric "Other"',
+    ]
+    assert diff.changed_files == ['metrics/new.eppo.json', 'metrics/other.yaml', 'metrics/revenue.yaml']
+    assert [c.name for c in diff.plan.unchanged] == ['Orders']
+    assert diff.summary().endswith('3 of 4 definition file(s) changed; 1 created, 1 updated, 1 deleted, 1 unchanged in the changed files')
+
+
+def test_moves_are_not_changes(repo):
+    first = git(repo, 'rev-parse', 'HEAD')
+    second = commit(repo, {
+        'metrics/revenue.yaml': 'metrics:\n' + metric_item('Revenue'),
+        'metrics/orders.yaml': 'metrics:\n' + metric_item('Orders', operation='count'),
+    })
+
+    diff = diff_revisions(os.path.join(repo, 'metrics'), first, second)
+
+    assert not diff.has_changes
+    assert len(diff.plan.unchanged) == 2
+
+
+def test_unchanged_blobs_are_not_read(repo, monkeypatch):
+    first = git(repo, 'rev-parse', 'HEAD')
+    second = commit(repo, {'metrics/other.yaml': 'metrics:\n' + metric_item('Other', operation='count')})
+
+    read = []
+    read_many = BlobReader.read_many
+
+    def recording_read_many(self, names):
+        names = list(names)
+        read.extend(names)
+        return read_many(self, names)
+
+    monkeypatch.setattr(BlobReader, 'read_many', recording_read_many)
+
+    diff = diff_revisions(os.path.join(repo, 'metrics'), first, second)
+
+    assert len(read) == 2
+    assert [c.name for c in diff.changes] == ['Other']
+
+
+def test_nothing_is_searched_without_changes(repo, monkeypatch):
+    monkeypatch.setattr(revision_diff, 'files_containing', lambda *args: pytest.fail('searched for includes'))
+    head = git(repo, 'rev-parse', 'HEAD')
+
+    diff = diff_revisions(os.path.join(repo, 'metrics'), head, head)
+
+    assert not diff.has_changes
+    assert diff.changed_files == []
+
+
+def test_changed_includes(repo):
+    first = commit(repo, {
+        'metrics/common/aggregations.yaml': 'sum:\n  fact_name: revenue\n  operation: sum\n',
+        'metrics/included.yaml': (
+            'metrics:\n  - name: Included\n    entity: User\n'
+            '    numerator:\n      $include: common/aggregations.yaml#sum\n'
+        ),
+    })
+    second = commit(repo, {'metrics/common/aggregations.yaml': 'sum:\n  fact_name: revenue\n  operation: count\n'})
+
+    diff = diff_revisions(os.path.join(repo, 'metrics'), first, second)
+
+    assert [c.describe() for c in diff.changes] == ['~ update metric "Included" (numerator.operation)']
+    assert diff.changed_files == ['metrics/common/aggregations.yaml']
+
+
+def test_includes_outside_the_directory(repo):
+    first = git(repo, 'rev-parse', 'HEAD')
+    second = commit(repo, {
+        'secrets.yaml': 'token: secret\n',
+        'metrics/other.yaml': 'metrics:\n' + metric_item('Other').replace('fact_name: revenue', '$include: ../secrets.yaml'),
+    })
+
+    diff = diff_revisions(os.path.join(repo, 'metrics'), first, second)
+
+    # the document cannot be read, so its metric is gone
+    assert [c.describe() for c in diff.changes] == ['- delete metric "Other"']
+
+
+def test_parse_errors_and_unknown_revisions(repo):
+    first = git(repo, 'rev-parse', 'HEAD')
+    second = commit(repo, {'metrics/other.yaml': 'metrics: [\n'})
+
+    with pytest.raises(ValueError, match=f"Error loading YAML file '{second}:metrics/other.yaml'"):
+        diff_revisions(os.path.join(repo, 'metrics'), first, second)
+    with pytest.raises(ValueError, match='git ls-tree'):
+        diff_revisions(os.path.join(repo, 'metrics'), first, 'no-such-revision')
+
+
+def test_cli(repo, capsys):
+    first = git(repo, 'rev-parse', 'HEAD')
+    second = commit(repo, {'metrics/other.yaml': 'metrics:\n' + metric_item('Other', operation='count')})
+    directory = os.path.join(repo, 'metrics')
+
+    main(['diff', first, second, directory])
+    assert capsys.readouterr().out.startswith('~ update metric "Other" (numerator.operation)\n')
+
+    with pytest.raises(SystemExit) as excinfo:
+        main(['diff', first, second, directory, '--exit-code'])
+    assert excinfo.value.code == 1
+    main(['diff', second, second, directory, '--exit-code'])
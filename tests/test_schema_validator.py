@@ -0,0 +1,109 @@
+import copy
+import glob
+import random
+
+import jsonschema
+import pytest
+
+from eppo_metrics_sync import _schema_validator
+from eppo_metrics_sync.helper import load_yaml_documents
+from eppo_metrics_sync.schema_codegen import GENERATED_PATH, generate
+from eppo_metrics_sync.schema_validation import bundled_schema_validator
+
+fixture_paths = sorted(
+    glob.glob('tests/yaml/valid/*.y*ml') + glob.glob('tests/yaml/invalid/*.y*ml')
+    + glob.glob('tests/yaml/templates/*.y*ml')
+)
+
+REPLACEMENT_VALUES = ['text', '', 0, 7, -1.5, 2.5, True, False, None, [], ['text'], {}, {'x': 1}]
+
+
+def fixture_documents():
+    for path in fixture_paths:
+        try:
+            for document in load_yaml_documents(path):
+                if document is not None:
+                    yield document
+        except ValueError:
+            pass
+
+
+def jsonschema_validator():
+    schema = bundled_schema_validator().schema
+    return jsonschema.validators.validator_for(schema)(schema)
+
+
+def nodes(data, path=()):
+    yield path, data
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield from nodes(value, path + (key,))
+    elif isinstance(data, list):
+        for i, value in enumerate(data):
+            yield from nodes(value, path + (i,))
+
+
+def mutate(data, rng):
+    """
+    Return a copy of `data` with one randomly chosen node deleted,
+    replaced or given an unknown key.
+    """
+    data = copy.deepcopy(data)
+    path, node = rng.choice(list(nodes(data)))
+    if not path:
+        return rng.choice(REPLACEMENT_VALUES)
+    parent = data
+    for key in path[:-1]:
+        parent = parent[key]
+    action = rng.randrange(3)
+    if action == 0:
+        del parent[path[-1]]
+    elif action == 1 or not isinstance(node, dict):
+        parent[path[-1]] = copy.deepcopy(rng.choice(REPLACEMENT_VALUES))
+    else:
+        node['unknown_key'] = 'value'
+    return data
+
+
+def test_generated_validator_is_up_to_date():
+    with open(GENERATED_PATH) as f:
+        assert f.read() == generate(), \
+            'Schema changed, run `python -m eppo_metrics_sync.schema_codegen`'
+
+
+def test_bundled_schema_uses_generated_validator():
+    assert bundled_schema_validator().is_valid is _schema_validator.is_valid
+
+
+@pytest.mark.parametrize('document', list(fixture_documents()))
+def test_generated_validator_agrees_on_fixtures(document):
+    assert _schema_validator.is_valid(document) == jsonschema_validator().is_valid(document)
+
+
+def test_generated_validator_agrees_on_mutations():
+    reference = jsonschema_validator()
+    rng = random.Random(20240521)
+    documents = list(fixture_documents())
+    rejected = 0
+    for _ in range(3000):
+        document = mutate(rng.choice(documents), rng)
+        expected = reference.is_valid(document)
+        assert _schema_validator.is_valid(document) == expected, document
+        rejected += not expected
+    # the mutations should exercise both outcomes
+    assert 0 < rejected < 3000
+
+
+def test_error_messages_match_jsonschema():
+    validator = bundled_schema_validator()
+    rng = random.Random(7)
+    documents = list(fixture_documents())
+    for _ in range(50):
+        document = mutate(rng.choice(documents), rng)
+        try:
+            jsonschema.validate(document, validator.schema)
+            expected = None
+        except jsonschema.exceptions.ValidationError as e:
+            expected = str(e)
+        error = validator.error(document)
+        assert (None if error is None else str(error)) == expected
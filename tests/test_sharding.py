@@ -0,0 +1,115 @@
+import os
+import shutil
+
+import pytest
+
+from eppo_metrics_sync.cli import main
+from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+from eppo_metrics_sync.sharding import (
+    merge_summaries,
+    parse_shard,
+    read_summary,
+    shard_of
+)
+
+test_yaml_dir = 'tests/yaml/valid'
+
+
+def shard_summaries(directory, count):
+    summaries = []
+    for index in range(1, count + 1):
+        eppo_metrics_sync = EppoMetricsSync(directory=directory, shard=(index, count))
+        eppo_metrics_sync.read_yaml_files()
+        try:
+            eppo_metrics_sync.validate()
+        except ValueError:
+            pass
+        summaries.append(eppo_metrics_sync.shard_summary())
+    return summaries
+
+
+def test_parse_shard():
+    assert parse_shard('2/4') == (2, 4)
+    for value in ('0/4', '5/4', '1', 'a/b', '1/0'):
+        with pytest.raises(ValueError):
+            parse_shard(value)
+
+
+def test_shards_partition_the_files():
+    summaries = shard_summaries(test_yaml_dir, 3)
+    full = EppoMetricsSync(directory=test_yaml_dir)
+    full.read_yaml_files()
+
+    assert sum(len(s['metrics']) for s in summaries) == len(full.metrics)
+    assert sum(len(s['fact_sources']) for s in summaries) == len(full.fact_sources)
+    assert len({s['files_fingerprint'] for s in summaries}) == 1
+
+    view = merge_summaries(summaries)
+    assert view.validation_errors == []
+    assert sorted(m['name'] for m in view.metrics) == sorted(m['name'] for m in full.metrics)
+
+
+def test_merge_finds_cross_shard_errors(tmp_path):
+    directory = str(tmp_path)
+    shutil.copy(os.path.join(test_yaml_dir, 'purchases.yaml'), directory)
+    # a copy of the same definitions that lands in another shard
+    name = next(
+        f'copy_{i}.yaml' for i in range(100)
+        if shard_of(f'copy_{i}.yaml', 2) != shard_of('purchases.yaml', 2)
+    )
+    shutil.copy(os.path.join(test_yaml_dir, 'purchases.yaml'), os.path.join(directory, name))
+
+    summaries = shard_summaries(directory, 2)
+    # each shard is valid on its own
+    assert all(s['validation_errors'] == [] for s in summaries)
+
+    errors = merge_summaries(summaries).validation_errors
+    assert any(e.startswith('Fact source names are not unique') for e in errors)
+    assert any(e.startswith('Metric names are not unique') for e in errors)
+
+
+def test_merge_keeps_shard_errors(tmp_path):
+    directory = str(tmp_path)
+    shutil.copy(os.path.join(test_yaml_dir, 'purchases.yaml'), directory)
+    with open(os.path.join(directory, 'broken.yaml'), 'w') as f:
+        f.write('metrics:\n  - name: broken\n')
+
+    errors = merge_summaries(shard_summaries(directory, 2)).validation_errors
+
+    assert len([e for e in errors if e.startswith('Schema violation in')]) == 1
+
+
+def test_merge_requires_every_shard():
+    summaries = shard_summaries(test_yaml_dir, 3)
+
+    with pytest.raises(ValueError, match=r'missing: \[2\]'):
+        merge_summaries([summaries[0], summaries[2]])
+    with pytest.raises(ValueError, match=r'duplicated: \[1\]'):
+        merge_summaries([summaries[0], summaries[0], summaries[1], summaries[2]])
+
+
+def test_cli_shard_and_merge(tmp_path, capsys):
+    paths = []
+    for index in (1, 2):
+        path = os.path.join(str(tmp_path), f'shard-{index}.json')
+        main([test_yaml_dir, '--dryrun', '--shard', f'{index}/2', '--shard-summary', path])
+        paths.append(path)
+
+    assert read_summary(paths[0])['shard'] == 1
+    main(['merge'] + paths)
+    assert 'Merged 2 shard(s)' in capsys.readouterr().out
+
+
+def test_cli_shard_summary_stays_out_of_the_directory(tmp_path, monkeypatch):
+    directory = str(tmp_path / 'metrics')
+    shutil.copytree(test_yaml_dir, directory)
+    files = sorted(os.listdir(directory))
+    monkeypatch.chdir(directory)
+
+    with pytest.raises(SystemExit):
+        main(['.', '--dryrun', '--shard', '1/2'])
+    assert sorted(os.listdir(directory)) == files
+
+    monkeypatch.chdir(str(tmp_path))
+    main([directory, '--dryrun', '--shard', '1/2'])
+    assert read_summary(str(tmp_path / 'shard-1-of-2.json'))['shard'] == 1
@@ -0,0 +1,85 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+from eppo_metrics_sync.snapshot import RepositorySnapshot, read_snapshot
+
+test_yaml_dir = 'tests/yaml/valid'
+
+
+@pytest.fixture(scope='module')
+def snapshot():
+    return read_snapshot(test_yaml_dir)
+
+
+def test_snapshot_matches_a_full_read(snapshot):
+    eppo_metrics_sync = EppoMetricsSync(directory=test_yaml_dir)
+    eppo_metrics_sync.read_yaml_files()
+
+    assert snapshot.to_payload() == {
+        'fact_sources': eppo_metrics_sync.fact_sources,
+        'metrics': eppo_metrics_sync.metrics,
+    }
+    assert snapshot.validate().passed
+
+
+def test_snapshot_is_immutable(snapshot):
+    with pytest.raises(TypeError):
+        snapshot.metrics[0]['name'] = 'changed'
+    with pytest.raises(AttributeError):
+        snapshot.metrics[0]['numerator'].clear()
+
+    payload = snapshot.to_payload()
+    payload['metrics'][0]['numerator']['fact_name'] = 'changed'
+    assert snapshot.to_payload()['metrics'][0]['numerator']['fact_name'] != 'changed'
+
+
+def test_prefixes_are_copy_on_write(snapshot):
+    prefixed = snapshot.with_prefix('staging')
+
+    assert prefixed.metrics[0]['name'] == f"[staging] {snapshot.metrics[0]['name']}"
+    assert not snapshot.metrics[0]['name'].startswith('[staging]')
+    # only the renamed objects are new
+    assert prefixed.metrics[0]['numerator'] is snapshot.metrics[0]['numerator']
+
+
+def test_validation_reports_rules():
+    snapshot = RepositorySnapshot(
+        [{'name': 'purchases', 'facts': [{'name': 'revenue'}]}],
+        [
+            {'name': 'Revenue', 'numerator': {'fact_name': 'revenue', 'operation': 'sum'}},
+            {'name': 'Revenue', 'numerator': {'fact_name': 'refunds', 'operation': 'sum'}},
+        ],
+        read_errors=['Schema violation in broken.yaml: \nbad']
+    )
+
+    report = snapshot.validate()
+
+    assert [issue.rule for issue in report.issues] == ['schema', 'unique_names', 'fact_references']
+    assert report.errors[1] == 'Metric names are not unique: Revenue'
+    with pytest.raises(ValueError, match=r'Validation failed with 3 error\(s\)'):
+        report.raise_for_errors()
+
+
+def test_empty_directory(tmp_path):
+    report = read_snapshot(str(tmp_path)).validate()
+
+    assert [issue.rule for issue in report.issues] == ['empty']
+
+
+def test_concurrent_syncs_from_one_snapshot(snapshot, remote_api):
+    prefixes = [f'tenant-{i}' for i in range(8)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda prefix: snapshot.sync(sync_prefix=prefix), prefixes * 2))
+        reports = list(executor.map(lambda _: snapshot.validate(), range(16)))
+
+    assert all(report.passed for report in reports)
+    assert sorted(remote_api['definitions']) == sorted(prefixes)
+    for prefix in prefixes:
+        names = [m['name'] for m in remote_api['definitions'][prefix]['metrics']]
+        assert names == [f"[{prefix}] {m['name']}" for m in snapshot.metrics]
+    # the snapshot itself is untouched
+    assert json.dumps(snapshot.to_payload()) == json.dumps(read_snapshot(test_yaml_dir).to_payload())
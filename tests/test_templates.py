@@ -0,0 +1,108 @@
+import pytest
+
+from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+from eppo_metrics_sync.templates import MetricTemplate, TemplateError
+
+test_yaml_dir = 'tests/yaml/templates'
+
+
+def read(directory=test_yaml_dir):
+    eppo_metrics_sync = EppoMetricsSync(directory=directory)
+    eppo_metrics_sync.read_yaml_files()
+    return eppo_metrics_sync
+
+
+def test_templates_are_expanded():
+    eppo_metrics_sync = read()
+    eppo_metrics_sync.validate()
+
+    names = [m['name'] for m in eppo_metrics_sync.metrics]
+    assert len(names) == 3 * 3 + 3 * 2
+    assert names[0] == 'Purchase Revenue (us, ios)'
+    assert names[-1] == 'Purchases per user, 30 days, winsorized at 0.999'
+
+    numerator = eppo_metrics_sync.metrics[-1]['numerator']
+    # a placeholder filling a whole value keeps the parameter's type
+    assert numerator['aggregation_timeframe_end_value'] == 30
+    assert numerator['winsorization_upper_percentile'] == 0.999
+    assert eppo_metrics_sync.metrics[0]['numerator']['filters'][0]['values'] == ['us']
+
+
+def test_sub_structures_are_shared():
+    template = MetricTemplate(
+        {
+            'name': '{metric} in {region}',
+            'entity': 'User',
+            'numerator': {'fact_name': '{metric}', 'operation': 'sum'},
+            'denominator': {'fact_name': 'sessions', 'operation': 'count'},
+        },
+        {'region': ['us', 'eu'], 'metric': ['revenue', 'orders']}
+    )
+    metrics = list(template)
+
+    assert len(metrics) == len(template) == 4
+    assert metrics[0]['numerator'] is metrics[2]['numerator']
+    assert metrics[0]['numerator'] is not metrics[1]['numerator']
+    assert all(m['denominator'] is metrics[0]['denominator'] for m in metrics)
+    # but every variant is a metric of its own
+    assert len({id(m) for m in metrics}) == 4
+
+
+def test_booleans_and_integers_are_kept_apart():
+    metrics = list(MetricTemplate({'name': 'm{v}', 'is_guardrail': '{v}'}, {'v': [1, True]}))
+
+    assert [m['is_guardrail'] for m in metrics] == [1, True]
+    assert type(metrics[1]['is_guardrail']) is bool
+
+
+def test_unknown_parameter():
+    with pytest.raises(TemplateError, match=r'Unknown template parameter\(s\) regoin in template.name'):
+        MetricTemplate({'name': 'Revenue {regoin}'}, {'region': ['us']})
+
+
+def test_invalid_variant_is_reported(tmp_path):
+    with open(tmp_path / 'templates.yaml', 'w') as f:
+        f.write(
+            'metric_templates:\n'
+            '  - parameters:\n'
+            '      operation: [sum, median]\n'
+            '    template:\n'
+            '      name: Revenue ({operation})\n'
+            '      entity: User\n'
+            '      numerator:\n'
+            '        fact_name: revenue\n'
+            '        operation: "{operation}"\n'
+        )
+    eppo_metrics_sync = EppoMetricsSync(directory=str(tmp_path))
+    with pytest.raises(ValueError, match='No valid yaml files found'):
+        eppo_metrics_sync.read_yaml_files()
+
+    [error] = eppo_metrics_sync.validation_errors
+    assert 'Metric template 1 with operation=median at numerator.operation' in error
+    assert "'median' is not one of" in error
+
+
+def test_template_metrics_are_validated_across_files(tmp_path):
+    with open(tmp_path / 'templates.yaml', 'w') as f:
+        f.write(
+            'metric_templates:\n'
+            '  - parameters:\n'
+            '      fact: [missing_fact]\n'
+            '    template:\n'
+            '      name: Metric on {fact}\n'
+            '      entity: User\n'
+            '      numerator:\n'
+            '        fact_name: "{fact}"\n'
+            '        operation: sum\n'
+        )
+    eppo_metrics_sync = read(str(tmp_path))
+
+    with pytest.raises(ValueError, match=r'Invalid fact reference\(s\): missing_fact'):
+        eppo_metrics_sync.validate()
+
+
+def test_reference_summaries_include_templates():
+    eppo_metrics_sync = EppoMetricsSync(directory=None)
+    eppo_metrics_sync.load_reference_yaml(test_yaml_dir + '/regional_purchases.yaml')
+
+    assert len(eppo_metrics_sync.reference_metrics) == 15
@@ -0,0 +1,95 @@
+import time
+
+import pytest
+import requests
+
+from eppo_metrics_sync.api import fetch_definitions, sync_definitions
+from eppo_metrics_sync.testing import FakeEppoServer
+
+METRIC = {'name': 'Revenue', 'entity': 'User', 'numerator': {'fact_name': 'revenue', 'operation': 'sum'}}
+
+
+@pytest.fixture
+def environment(monkeypatch):
+    monkeypatch.setenv('EPPO_API_KEY', 'key')
+    monkeypatch.setenv('EPPO_SYNC_TAG', 'load-test')
+    monkeypatch.delenv('EPPO_REFERENCE_URL', raising=False)
+
+
+def test_host_is_read_when_syncing(environment, monkeypatch):
+    with FakeEppoServer() as server:
+        # set after eppo_metrics_sync.api was imported
+        monkeypatch.setenv('EPPO_API_HOST', server.host)
+        sync_definitions([], [METRIC])
+
+        assert fetch_definitions() == {'fact_sources': [], 'metrics': [METRIC]}
+    stats = server.stats.summary()
+    assert stats['requests'] == 2
+    assert stats['statuses'] == {'200': 2}
+    assert stats['bytes_received'] > 0 and stats['bytes_sent'] > 0
+
+
+def test_latency(environment, monkeypatch):
+    with FakeEppoServer(latency=0.2) as server:
+        monkeypatch.setenv('EPPO_API_HOST', server.host)
+        start = time.perf_counter()
+        sync_definitions([], [METRIC])
+
+        assert time.perf_counter() - start >= 0.2
+    assert server.stats.summary()['duration_p50'] >= 0.2
+
+
+def test_error_rate(environment):
+    with FakeEppoServer(error_rate=0.5, error_status=503, seed=1) as server:
+        for _ in range(200):
+            requests.post(server.endpoint, json={'sync_tag': 't', 'fact_sources': [], 'metrics': []},
+                          headers={'X-Eppo-Token': 'key'})
+
+    statuses = server.stats.summary()['statuses']
+    assert set(statuses) == {'200', '503'}
+    assert 60 < statuses['503'] < 140
+
+
+def test_payload_size_limit(environment, monkeypatch):
+    with FakeEppoServer(max_payload_bytes=100) as server:
+        monkeypatch.setenv('EPPO_API_HOST', server.host)
+        with pytest.raises(Exception, match='Request failed 413'):
+            sync_definitions([], [METRIC] * 10)
+
+    assert server.definitions == {}
+
+
+def test_throttling(environment):
+    with FakeEppoServer(rate_limit=1, burst=2) as server:
+        responses = [
+            requests.get(server.endpoint, params={'sync_tag': 't'}, headers={'X-Eppo-Token': 'key'})
+            for _ in range(4)
+        ]
+
+    assert [r.status_code for r in responses] == [200, 200, 429, 429]
+    assert int(responses[2].headers['Retry-After']) >= 1
+
+
+def test_requests_need_a_token():
+    with FakeEppoServer() as server:
+        response = requests.get(server.endpoint, params={'sync_tag': 't'})
+
+    assert response.status_code == 401
+
+
+def test_malformed_payloads_are_rejected():
+    with FakeEppoServer() as server:
+        response = requests.post(server.endpoint, data=b'{"sync_tag": ', headers={'X-Eppo-Token': 'key'})
+
+    assert response.status_code == 400
+    assert response.json()['error'].startswith('Invalid payload')
+    assert server.requests[0]['body'] == b'{"sync_tag": '
+
+
+def test_requests_can_go_unrecorded(environment, monkeypatch):
+    with FakeEppoServer(record_requests=False) as server:
+        monkeypatch.setenv('EPPO_API_HOST', server.host)
+        sync_definitions([], [METRIC])
+
+    assert server.requests == []
+    assert server.stats.summary()['requests'] == 1
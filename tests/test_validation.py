@@ -286,3 +286,25 @@ def test_percentile_metrics():
     }
     error = percentile_metric_is_valid(metric)
     assert error is None
+
+def test_memoized_aggregation_checks_match_direct_checks():
+    from eppo_metrics_sync.validation import (
+        _aggregation_errors,
+        _aggregation_errors_for_signature,
+        signature_parameters,
+        valid_operations
+    )
+
+    for operation in sorted(valid_operations) + ['median']:
+        for mask in range(1 << len(signature_parameters)):
+            aggregation = {'operation': operation, 'fact_name': 'fact'}
+            for bit, name in enumerate(signature_parameters):
+                if mask & (1 << bit):
+                    aggregation[name] = 1
+            assert aggregation_is_valid(aggregation) == _aggregation_errors(aggregation)
+
+    # each distinct configuration is only checked once
+    _aggregation_errors_for_signature.cache_clear()
+    for _ in range(3):
+        aggregation_is_valid({'operation': 'sum', 'winsorization_upper_percentile': 0.99})
+    assert _aggregation_errors_for_signature.cache_info().misses == 1
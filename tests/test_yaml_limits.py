@@ -0,0 +1,129 @@
+import os
+import time
+
+import pytest
+import yaml
+
+from eppo_metrics_sync.cli import main
+from eppo_metrics_sync.eppo_metrics_sync import EppoMetricsSync
+from eppo_metrics_sync.helper import load_yaml_documents
+from eppo_metrics_sync.limits import ResourceLimitError, YamlLimits
+from eppo_metrics_sync.parallel_yaml import ParallelYamlLoader
+from tests.conftest import metric, read_definitions, write_file
+
+# nine levels of ten aliases each expand into a billion strings
+BILLION_LAUGHS = "a: &a [lol, lol, lol, lol, lol, lol, lol, lol, lol, lol]\n" + "".join(
+    f"{level}: &{level} [{', '.join([f'*{previous}'] * 10)}]\n"
+    for previous, level in zip('abcdefgh', 'bcdefghi')
+)
+
+
+@pytest.fixture
+def metrics_dir(tmp_path):
+    directory = str(tmp_path)
+    write_file(directory, 'revenue.yaml', metric('Revenue'))
+    return directory
+
+
+def test_alias_bomb_is_stopped_early():
+    start = time.perf_counter()
+    with pytest.raises(ResourceLimitError, match="'<unicode string>' exceeds the limit of 5000000 nodes at line 7"):
+        YamlLimits().load(BILLION_LAUGHS)
+    assert time.perf_counter() - start < 1
+
+
+@pytest.mark.parametrize('limits, content, message', [
+    (YamlLimits(max_aliases=2), 'a: &a [1]\nb: [*a, *a, *a]\n', 'the limit of 2 aliases at line 2'),
+    (YamlLimits(max_nodes=5), 'a: [1, 2, 3]\n', 'the limit of 5 nodes at line 1'),
+    (YamlLimits(max_depth=3), 'a:\n  b:\n    c:\n      d: 1\n', 'the limit of 3 levels of nesting at line 4'),
+    (YamlLimits(max_depth=10), '[' * 11 + ']' * 11, 'the limit of 10 levels of nesting at line 1'),
+])
+def test_limits(limits, content, message):
+    with pytest.raises(ResourceLimitError, match=message):
+        limits.load(content)
+
+
+def test_documents_within_limits_load_unchanged():
+    content = 'base: &base {operation: sum}\nnumerator:\n  <<: *base\n  fact_name: revenue\n'
+
+    assert YamlLimits().load(content)['numerator'] == {'operation': 'sum', 'fact_name': 'revenue'}
+
+
+def test_limits_apply_to_chunks(tmp_path):
+    path = str(tmp_path / 'metrics.yaml')
+    write_file(str(tmp_path), 'metrics.yaml', 'metrics:\n' + '  - name: M\n' * 20 + '  - name: {a: {b: 1}}\n')
+    loader = ParallelYamlLoader(workers=2, threshold=0, limits=YamlLimits(max_depth=4))
+
+    try:
+        with pytest.raises(ResourceLimitError, match="metrics.yaml' exceeds the limit of 4 levels of nesting at line 22"):
+            list(load_yaml_documents(path, loader, loader.limits))
+    finally:
+        loader.close()
+
+
+def test_node_limit_holds_for_the_whole_chunked_file(tmp_path):
+    content = 'metrics:\n' + ''.join(f'  - name: M{i}\n    entity: User\n' for i in range(40))
+    path = str(tmp_path / 'metrics.yaml')
+    write_file(str(tmp_path), 'metrics.yaml', content)
+    nodes = YamlLimits().load_counted(content)[1]
+
+    for max_nodes, fits in ((nodes, True), (nodes - 1, False)):
+        loader = ParallelYamlLoader(workers=4, threshold=0, limits=YamlLimits(max_nodes=max_nodes))
+        try:
+            if fits:
+                assert loader.load(path) == (True, yaml.safe_load(content))
+            else:
+                # every chunk is far below the limit on its own
+                with pytest.raises(ResourceLimitError, match=f"exceeds the limit of {max_nodes} nodes"):
+                    loader.load(path)
+        finally:
+            loader.close()
+
+
+def test_offending_files_are_skipped(metrics_dir):
+    write_file(metrics_dir, 'bomb.yaml', BILLION_LAUGHS)
+    write_file(metrics_dir, 'large.yaml', metric('Large') + '#' * 2000 + '\n')
+    limits = YamlLimits(max_file_bytes=1000)
+    eppo_metrics_sync = EppoMetricsSync(directory=metrics_dir, yaml_limits=limits)
+
+    eppo_metrics_sync.read_yaml_files()
+
+    assert [m['name'] for m in eppo_metrics_sync.metrics] == ['Revenue']
+    bomb, large = eppo_metrics_sync.validation_errors
+    assert bomb.startswith(f"Skipped file: '{os.path.join(metrics_dir, 'bomb.yaml')}' exceeds the limit of 5000000 nodes")
+    assert large == f"Skipped file: '{os.path.join(metrics_dir, 'large.yaml')}' exceeds the limit of 1000 bytes with 2104 bytes"
+
+
+def test_skipped_files_are_not_indexed(metrics_dir, tmp_path, capsys):
+    write_file(metrics_dir, 'bomb.yaml', BILLION_LAUGHS)
+    index_path = str(tmp_path / 'index.sqlite')
+    for _ in range(2):
+        eppo_metrics_sync = EppoMetricsSync(directory=metrics_dir, index_path=index_path)
+        eppo_metrics_sync.read_yaml_files()
+        assert len(eppo_metrics_sync.validation_errors) == 1
+
+    assert '1 file(s) parsed, 1 reused' in capsys.readouterr().out.splitlines()[-1]
+
+
+def test_cli(metrics_dir, monkeypatch):
+    write_file(metrics_dir, 'nested.yaml', 'metrics:\n  - name: Nested\n    entity: {a: {b: 1}}\n')
+    monkeypatch.setenv('EPPO_SYNC_TAG', 'test')
+
+    with pytest.raises(ValueError, match="nested.yaml' exceeds the limit of 4 levels of nesting at line 3"):
+        main([metrics_dir, '--dryrun', '--max-yaml-depth', '4'])
+
+
+@pytest.mark.parametrize('name, content, line', [
+    ('deep.eppo.json', '{"metrics":\n' + '[' * 100000 + ']' * 100000 + '}', 2),
+    ('deep.eppo.jsonl', '{"metrics": []}\n{"metrics": "[[[["}\n' + '[' * 100000 + ']' * 100000 + '\n', 3),
+], ids=['json', 'jsonl'])
+def test_deep_json_is_skipped(metrics_dir, name, content, line):
+    # deep enough to overflow the stack of either JSON parser
+    write_file(metrics_dir, name, content)
+
+    eppo_metrics_sync = read_definitions(metrics_dir, yaml_limits=YamlLimits(max_depth=10))
+
+    assert [m['name'] for m in eppo_metrics_sync.metrics] == ['Revenue']
+    assert eppo_metrics_sync.validation_errors == [
+        f"Skipped file: '{os.path.join(metrics_dir, name)}' exceeds the limit of 10 levels of nesting at line {line}"
+    ]